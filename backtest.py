@@ -0,0 +1,376 @@
+# backtest.py
+# Offline backtest - local klines file တွေကို bot ရဲ့ fallback decision + 3-layer exit + budget check နဲ့ ပြန် run
+# Network မလို၊ 5m data လပေါင်းများစွာကို စက္ကန့်ပိုင်းအတွင်း ပြီး
+
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+import bot
+from data_collector import build_ml_row
+from klines import load_klines, resample
+from llm_replay import LLMReplayStore, REPLAY
+from pattern_index import market_context
+from position_manager import PositionLedger
+from trade_records import Position, ClosedTrade, dump_trade_history
+
+MINUTE_MS = 60 * 1000
+
+# bot.get_price_history() နဲ့ timeframe တူတူ (5m က base series)
+TIMEFRAMES = {
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+    "4h": 240 * MINUTE_MS,
+    "1d": 1440 * MINUTE_MS,
+}
+# Fallback decision က ဒီ timeframe တွေကို သုံးတယ် - EMA21 ရဖို့ bar အရေအတွက် လိုမယ်
+DECISION_TIMEFRAMES = ("15m", "1h", "4h")
+WARMUP_BARS = 22
+
+THAILAND_TZ = pytz.timezone('Asia/Bangkok')
+
+
+# === INDICATORS (whole series at once - bot.calculate_* နဲ့ formula တူ) ===
+def compute_indicators(bars, interval_ms):
+    """
+    One timeframe → per-bar indicator arrays.
+    EMA is seeded from the first bar of the file instead of the bot's 50-bar window,
+    so the first few dozen bars differ slightly until it converges.
+    """
+    close = pd.Series(bars["close"])
+    high = pd.Series(bars["high"])
+    low = pd.Series(bars["low"])
+    volume = pd.Series(bars["volume"])
+
+    ema9 = close.ewm(span=9, adjust=False).mean()
+    ema21 = close.ewm(span=21, adjust=False).mean()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi = (100 - (100 / (1 + gain / loss))).fillna(50)
+
+    prev_close = close.shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    atr = tr.iloc[1:].rolling(window=14, min_periods=1).mean().reindex(tr.index).fillna(0.0)
+
+    above = (ema9 > ema21).to_numpy()
+    crossover = np.zeros(len(close), dtype=np.int8)
+    crossover[1:][(ema9.shift(1) < ema21.shift(1)).to_numpy()[1:] & above[1:]] = 1
+    crossover[1:][(ema9.shift(1) > ema21.shift(1)).to_numpy()[1:] & ~above[1:]] = -1
+
+    avg_vol = volume.shift(1).rolling(window=10).mean()
+
+    return {
+        "close_time": bars["open_time"] + interval_ms,
+        "close": close.to_numpy(),
+        "change": (close.pct_change().fillna(0) * 100).to_numpy(),
+        "ema9": ema9.to_numpy(),
+        "ema21": ema21.to_numpy(),
+        "bullish": above,
+        "crossover": crossover,
+        "rsi": rsi.to_numpy(),
+        "vol_spike": (volume > avg_vol * 1.8).to_numpy(),
+        "atr": atr.to_numpy(),
+        "atr_percent": (atr / close * 100).to_numpy(),
+        "support": low.rolling(window=10, min_periods=1).min().to_numpy(),
+        "resistance": high.rolling(window=10, min_periods=1).max().to_numpy(),
+    }
+
+
+class MarketSeries:
+    """
+    One pair: base 5m klines + precomputed indicators for every timeframe.
+    At base bar i only *completed* higher-timeframe bars are visible (no look-ahead).
+    """
+
+    def __init__(self, pair, klines):
+        self.pair = pair
+        self.base = klines
+        self.arrays = {}       # tf → numpy indicator arrays (vector_backtest)
+        self.indicators = {}   # tf → same values as Python lists (fast scalar access)
+        self.index = {}        # tf → completed-bar index for every base bar (-1 = none yet)
+        base_close_time = klines["open_time"] + TIMEFRAMES["5m"]
+        for name, interval_ms in TIMEFRAMES.items():
+            bars = klines if name == "5m" else resample(klines, interval_ms)
+            ind = compute_indicators(bars, interval_ms)
+            self.arrays[name] = ind
+            self.indicators[name] = {k: v.tolist() for k, v in ind.items()}
+            self.index[name] = np.searchsorted(ind["close_time"], base_close_time, side="right") - 1
+        self.close = klines["close"].tolist()
+        self.open_time = klines["open_time"]
+        self._rows = {}
+        ready = np.ones(len(base_close_time), dtype=bool)
+        for name in DECISION_TIMEFRAMES:
+            ready &= self.index[name] >= WARMUP_BARS - 1
+        self.first_ready = int(np.argmax(ready)) if ready.any() else len(ready)
+
+    def _row(self, name, idx):
+        """get_price_history() ရဲ့ mtf[name] dict (higher TF row ကို cache)"""
+        cached = self._rows.get(name)
+        if cached is not None and cached[0] == idx:
+            return cached[1]
+        ind = self.indicators[name]
+        crossover = ind["crossover"][idx]
+        row = {
+            'current_price': ind["close"][idx],
+            'change_1h': ind["change"][idx],
+            'ema9': round(ind["ema9"][idx], 6),
+            'ema21': round(ind["ema21"][idx], 6),
+            'trend': 'BULLISH' if ind["bullish"][idx] else 'BEARISH',
+            'crossover': 'GOLDEN' if crossover == 1 else ('DEATH' if crossover == -1 else 'NONE'),
+            'rsi': round(ind["rsi"][idx], 1),
+            'vol_spike': ind["vol_spike"][idx],
+            'atr_percent': round(ind["atr_percent"][idx], 3),
+            'support': round(ind["support"][idx], 6),
+            'resistance': round(ind["resistance"][idx], 6)
+        }
+        self._rows[name] = (idx, row)
+        return row
+
+    def market_data(self, i):
+        """Base bar i မှာ bot.get_price_history() return shape အတိုင်း"""
+        mtf = {}
+        for name in TIMEFRAMES:
+            idx = self.index[name][i]
+            if idx >= 0:
+                mtf[name] = self._row(name, int(idx))
+        main = mtf.get('1h', {})
+        return {
+            'current_price': self.close[i],
+            'price_change': main.get('change_1h', 0),
+            'support_levels': [mtf['1h']['support'], mtf['4h']['support']] if '4h' in mtf else [],
+            'resistance_levels': [mtf['1h']['resistance'], mtf['4h']['resistance']] if '4h' in mtf else [],
+            'mtf_analysis': mtf
+        }
+
+    def atr_14(self, i):
+        """1H ATR(14) in price units (bot.get_atr_14 equivalent)"""
+        idx = self.index["1h"][i]
+        return self.indicators["1h"]["atr"][idx] if idx >= 0 else None
+
+
+# === ENGINE ===
+class Backtester:
+    """
+    Bot ရဲ့ function တွေကို simulated time ပေါ်မှာ ပြန် run:
+      entry  → get_improved_fallback_decision + can_open_new_position + PositionLedger reserve/commit
+      exit   → should_close_trade (live bot/paper trader နဲ့ rule တစ်ခုတည်း)
+      output → ClosedTrade records + ML dataset rows (build_ml_row)
+    With an llm_replay store the entries go through get_ai_trading_decision instead
+    (replay mode: recorded responses, misses fall back to the rule-based decision).
+    Prices are the 5m bar closes, the same polling view the live bot has.
+    """
+    get_improved_fallback_decision = bot.get_improved_fallback_decision
+    get_ai_trading_decision = bot.get_ai_trading_decision
+    get_llm_router = bot.get_llm_router
+    get_breaker = bot.get_breaker
+    parse_ai_trading_decision = bot.parse_ai_trading_decision
+    can_open_new_position = bot.can_open_new_position
+    calculate_current_pnl = bot.calculate_current_pnl
+    Fore = bot.Fore
+    Style = bot.Style
+    allow_reverse_positions = False
+
+    def __init__(self, total_budget=500, max_position_size_percent=10, max_concurrent_trades=4,
+                 quantity_precision=3, min_free_budget=100, decision_fn=None, llm_replay=None,
+                 verbose=False):
+        self.total_budget = total_budget
+        self.max_position_size_percent = max_position_size_percent
+        self.max_concurrent_trades = max_concurrent_trades
+        self.quantity_precision = quantity_precision
+        self.min_free_budget = min_free_budget
+        self.llm_replay = llm_replay
+        self.openrouter_key = os.getenv('OPENROUTER_API_KEY') if llm_replay is not None else None
+        if decision_fn is None:
+            decision_fn = self.get_ai_trading_decision if llm_replay is not None else self.get_improved_fallback_decision
+        self.decision_fn = decision_fn
+        self.verbose = verbose
+        self.ai_opened_trades = PositionLedger(total_budget, max_concurrent_trades)
+        self.trade_history = []
+        self.ml_rows = []
+
+    @property
+    def available_budget(self):
+        return self.ai_opened_trades.available_budget
+
+    def _log(self, text):
+        if self.verbose:
+            print(text)
+
+    def print_color(self, text, color="", style="", level=None, sample=None):
+        """Same signature as the bot's (level / sample only matter for its structured log)"""
+        if self.verbose:
+            print(f"{style}{color}{text}")
+
+    @staticmethod
+    def _thailand_time(ts):
+        return datetime.fromtimestamp(ts, pytz.utc).astimezone(THAILAND_TZ).strftime('%Y-%m-%d %H:%M:%S')
+
+    # --- entry ---
+    def _try_open(self, series, i, ts):
+        pair = series.pair
+        market_data = series.market_data(i)
+        ai_decision = self.decision_fn(pair, market_data)
+        decision = ai_decision["decision"]
+        position_size_usd = ai_decision["position_size_usd"]
+        if decision not in ("LONG", "SHORT") or position_size_usd <= 0:
+            return None
+
+        ok, reason = self.can_open_new_position(pair, position_size_usd)
+        if not ok:
+            self._log(f"[BT] {pair} skip: {reason}")
+            return None
+        entry_price = market_data['current_price']
+        leverage = ai_decision["leverage"]
+        quantity = round(position_size_usd * leverage / entry_price, self.quantity_precision)
+        if quantity <= 0:
+            return None
+        reserved, reason = self.ai_opened_trades.reserve(pair, position_size_usd)
+        if not reserved:
+            return None
+        position = self.ai_opened_trades.commit(pair, Position(
+            pair, decision, entry_price, quantity, position_size_usd, leverage,
+            entry_time=ts,
+            entry_time_th=self._thailand_time(ts),
+            ai_confidence=ai_decision["confidence"],
+            ai_reasoning=ai_decision["reasoning"],
+            entry_context=market_context(market_data, now=ts),
+            has_tp_sl=False,
+            peak_pnl=0
+        ))
+        self._log(f"[BT] {self._thailand_time(ts)} OPEN {pair} {decision} @ {entry_price:.4f}")
+        return position
+
+    # --- exit ---
+    def _check_exit(self, series, i, ts, trade):
+        pair = series.pair
+        price = series.close[i]
+        close_decision = bot.should_close_trade(trade, price, lambda: series.atr_14(i))
+        if close_decision.get('close_type') == 'BREAKEVEN_ACTIVATED':
+            self.ai_opened_trades.mark('BREAKEVEN', pair, breakeven_done=True, peak_pnl=trade['peak_pnl'])
+        if not close_decision.get("should_close", False):
+            return
+        partial_percent = close_decision.get("partial_percent", 100)
+        close_reason = f"BOUNCE-PROOF V2: {close_decision.get('close_type', 'AI_DECISION')} - {close_decision.get('reason', '')}"
+        if trade['direction'] == 'LONG':
+            pnl = (price - trade['entry_price']) * trade['quantity'] * (partial_percent / 100)
+        else:
+            pnl = (trade['entry_price'] - price) * trade['quantity'] * (partial_percent / 100)
+
+        if partial_percent < 100:
+            closed_quantity, closed_position_size = self.ai_opened_trades.partial_close(pair, partial_percent, pnl)
+            closed = ClosedTrade.from_position(
+                trade, price, pnl, close_reason,
+                partial_percent=partial_percent,
+                closed_quantity=closed_quantity,
+                closed_position_size=closed_position_size
+            )
+        else:
+            self.ai_opened_trades.close(pair, pnl)
+            trade['status'] = 'CLOSED'
+            closed = ClosedTrade.from_position(trade, price, pnl, close_reason)
+        self._record(closed, ts)
+
+    def _record(self, closed, ts):
+        closed.close_time = self._thailand_time(ts)
+        closed.close_timestamp = ts
+        closed.trade_type = 'BACKTEST'
+        self.trade_history.append(closed)
+        row, outcome, _ = build_ml_row(closed, closed.get('entry_context'))
+        self.ml_rows.append(row)
+        self._log(f"[BT] {closed.close_time} {closed.display_type} {closed.pair} P&L ${closed.pnl:.2f} ({outcome})")
+
+    # --- main loop ---
+    def run(self, data, decision_every=1):
+        """
+        data: {pair: klines dict (load_klines) or MarketSeries}
+        decision_every: ask for a new entry every N base bars (1 = every 5m close)
+        """
+        series = {pair: s if isinstance(s, MarketSeries) else MarketSeries(pair, s) for pair, s in data.items()}
+        timeline = np.unique(np.concatenate([s.open_time for s in series.values()]))
+        cursors = {pair: np.searchsorted(s.open_time, timeline) for pair, s in series.items()}
+
+        started = time.perf_counter()
+        for step, open_time in enumerate(timeline.tolist()):
+            ts = (open_time + TIMEFRAMES["5m"]) / 1000.0  # decision at bar close
+            for pair, s in series.items():
+                i = int(cursors[pair][step])
+                if i >= len(s.open_time) or s.open_time[i] != open_time or i < s.first_ready:
+                    continue
+                trade = self.ai_opened_trades.get(pair)
+                if trade is not None:
+                    self._check_exit(s, i, ts, trade)
+                elif step % decision_every == 0 and self.available_budget > self.min_free_budget:
+                    self._try_open(s, i, ts)
+        elapsed = time.perf_counter() - started
+        return self.summary(elapsed, len(timeline))
+
+    def summary(self, elapsed=0.0, bars=0):
+        full = [t for t in self.trade_history if t.partial_percent >= 100]
+        pnl = [t.pnl for t in self.trade_history]
+        equity = np.cumsum(pnl) if pnl else np.zeros(1)
+        drawdown = float(np.max(np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity)) if pnl else 0.0
+        outcomes = {}
+        for row in self.ml_rows:
+            outcomes[row["outcome_class"]] = outcomes.get(row["outcome_class"], 0) + 1
+        return {
+            "bars": bars,
+            "elapsed_sec": round(elapsed, 3),
+            "trades": len(full),
+            "closes": len(self.trade_history),
+            "win_rate": round(sum(1 for t in full if t.pnl > 0) / len(full) * 100, 1) if full else 0.0,
+            "total_pnl": round(float(sum(pnl)), 2),
+            "max_drawdown": round(drawdown, 2),
+            "open_positions": len(self.ai_opened_trades),
+            "outcomes": outcomes,
+            "llm": self.llm_replay.stats() if self.llm_replay is not None else None,
+        }
+
+    # --- output ---
+    def save(self, history_file, ml_file=None):
+        with open(history_file, 'w', encoding='utf-8') as f:
+            json.dump(dump_trade_history(self.trade_history), f, indent=2, ensure_ascii=False)
+        if ml_file and self.ml_rows:
+            with open(ml_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=self.ml_rows[0].keys())
+                writer.writeheader()
+                writer.writerows(self.ml_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline backtest on local 5m klines")
+    parser.add_argument("files", nargs="+", help="PAIR=path (CSV or JSON 5m klines)")
+    parser.add_argument("--budget", type=float, default=500)
+    parser.add_argument("--decision-every", type=int, default=1, help="entry check every N 5m bars")
+    parser.add_argument("--history", default="backtest_trade_history.json")
+    parser.add_argument("--ml", default="backtest_ml_training_data.csv")
+    parser.add_argument("--llm-store", help="drive entries through get_ai_trading_decision with this record/replay store")
+    parser.add_argument("--llm-mode", default=REPLAY, choices=("record", "replay"))
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    data = {}
+    for spec in args.files:
+        pair, _, path = spec.partition("=")
+        if not path:
+            pair, path = os.path.basename(spec).split("-")[0].split(".")[0].upper(), spec
+        data[pair] = load_klines(path)
+
+    llm_replay = LLMReplayStore(args.llm_store, args.llm_mode) if args.llm_store else None
+    engine = Backtester(total_budget=args.budget, llm_replay=llm_replay, verbose=args.verbose)
+    result = engine.run(data, decision_every=args.decision_every)
+    engine.save(args.history, args.ml)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
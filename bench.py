@@ -0,0 +1,309 @@
+# bench.py
+# Hot-path benchmark suite - network မသုံး၊ fixtures/bench_klines.json (recorded klines) ပေါ်မှာ run
+#   python bench.py                          → all benchmarks, bench_results.json ထဲ run တစ်ခု append
+#   python bench.py --only exit,indicators   → name prefix filter
+#   python bench.py --sizes 1000,10000       → history-size benchmarks (default 1k..1M)
+#   python bench.py --record-fixture SOLUSDT=data/sol_5m.csv --at 1707523200000
+# Run တစ်ခုချင်း နောက်ဆုံး run နဲ့ mean ကို နှိုင်းယှဉ်ပြ (regression ရှာဖို့)
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+import bot
+import data_collector
+import structured_log
+from ml_predictor import SLPredictor
+from sim_clock import SystemClock
+from trade_records import ClosedTrade, Position
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "bench_klines.json")
+RESULTS = "bench_results.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+INTERVALS = {"5m": 50, "15m": 50, "1h": 50, "4h": 30, "1d": 30}
+
+
+# === FIXTURE ===
+class FixtureClient:
+    """Replays recorded futures_klines responses (one snapshot per interval)"""
+
+    def __init__(self, klines):
+        self.klines = klines
+
+    @classmethod
+    def load(cls, path=FIXTURE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["pair"], cls(data["klines"])
+
+    def futures_klines(self, symbol, interval, limit=500, **params):
+        return self.klines[interval][-limit:]
+
+    def futures_symbol_ticker(self, symbol):
+        return {"symbol": symbol, "price": self.klines["5m"][-1][4]}
+
+
+def record_fixture(spec, at_ms, path=FIXTURE):
+    """Local 5m klines → FakeBinanceClient at `at_ms` → the exact responses bot.py would get"""
+    from fake_exchange import FakeBinanceClient
+    client = FakeBinanceClient.from_spec(spec, start_ms=at_ms)
+    pair = next(iter(client.klines))
+    klines = {name: client.futures_klines(symbol=pair, interval=name, limit=limit) for name, limit in INTERVALS.items()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"pair": pair, "recorded_at_ms": at_ms, "klines": klines}, f, separators=(",", ":"))
+    print(f"[BENCH] fixture → {path} ({pair}, {sum(len(v) for v in klines.values())} bars)")
+
+
+class Harness:
+    """Just enough of FullyAutonomous1HourAITrader for the bot.py functions under test"""
+    calculate_ema = bot.calculate_ema
+    calculate_rsi = bot.calculate_rsi
+    calculate_atr_percent = bot.calculate_atr_percent
+    calculate_volume_spike = bot.calculate_volume_spike
+    get_current_price = bot.get_current_price
+    _fetch_current_price = bot._fetch_current_price
+    get_price_history = bot.get_price_history
+    _fetch_price_history = bot._fetch_price_history
+    _mtf_fallback = bot._mtf_fallback
+    get_breaker = bot.get_breaker
+    get_atr_14 = bot.get_atr_14
+    get_ai_close_decision_v2 = bot.get_ai_close_decision_v2
+    save_real_trade_history = bot.save_real_trade_history
+    Fore = bot.Fore
+    Style = bot.Style
+
+    def __init__(self, client, history_file="bench_history.json"):
+        self.binance = self.market_client = client
+        self.clock = SystemClock()
+        self.breakers = {}
+        self.last_prices = {}
+        self.last_market_data = {}
+        self.price_max_age = 60.0
+        self.real_trade_history = []
+        self.real_trade_history_file = history_file
+
+    def print_color(self, text, color="", style="", level=None, sample=None):
+        print(text)
+
+    def _get_mtf_data_via_api(self, pair, limit=50):
+        raise RuntimeError("benchmark must not hit the network")
+
+
+# === TIMING ===
+def measure(fn, repeat, warmup=3):
+    """Per-call wall time (µs): count / mean / p50 / p95 / min"""
+    for _ in range(min(warmup, repeat)):
+        fn()
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        started = time.perf_counter_ns()
+        fn()
+        samples[i] = (time.perf_counter_ns() - started) / 1000
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {
+        "count": repeat,
+        "mean_us": round(float(samples.mean()), 2),
+        "p50_us": round(float(p50), 2),
+        "p95_us": round(float(p95), 2),
+        "min_us": round(float(samples.min()), 2),
+    }
+
+
+def sample_position(price, direction="LONG", peak=0.0):
+    return Position("SOLUSDT", direction, price, 1.0, 50.0, 5, entry_time=time.time(), peak_pnl=peak)
+
+
+def sample_closed_trade(i, price=100.0):
+    position = sample_position(price, "LONG" if i % 2 else "SHORT", peak=float(i % 15))
+    exit_price = price * (1 + ((i % 21) - 10) / 1000)
+    trade = ClosedTrade.from_position(position, exit_price, (exit_price - price) * 0.5, "BOUNCE-PROOF V2: STOP_LOSS - bench",
+                                      close_time="2024-02-10 12:00:00")
+    trade.close_timestamp = 1707566400.0 + i
+    return trade
+
+
+# === BENCHMARKS ===
+def bench_indicators(harness, pair, results):
+    closes = [float(k[4]) for k in harness.binance.klines["5m"]]
+    volumes = [float(k[5]) for k in harness.binance.klines["5m"]]
+    long_closes = closes * 10
+    results["indicators.ema21_50"] = measure(lambda: harness.calculate_ema(closes, 21), 2000)
+    results["indicators.ema21_500"] = measure(lambda: harness.calculate_ema(long_closes, 21), 1000)
+    results["indicators.rsi14_50"] = measure(lambda: harness.calculate_rsi(closes, 14), 2000)
+    results["indicators.rsi14_500"] = measure(lambda: harness.calculate_rsi(long_closes, 14), 1000)
+    results["indicators.volume_spike_50"] = measure(lambda: harness.calculate_volume_spike(volumes), 5000)
+
+
+def bench_mtf(harness, pair, results):
+    # REST response ပြီးနောက် ကုန်တဲ့ CPU: float parse + 5 timeframe indicator + dict build
+    results["mtf.get_price_history"] = measure(lambda: harness.get_price_history(pair), 300)
+
+
+def bench_exit(harness, pair, results):
+    rng = random.Random(0)
+    price = float(harness.binance.klines["5m"][-1][4])
+    cases = [(sample_position(price * (1 + rng.uniform(-0.01, 0.01)), rng.choice(["LONG", "SHORT"]), rng.uniform(0, 20)),
+              price * (1 + rng.uniform(-0.03, 0.03))) for _ in range(1000)]
+    rule_cases = itertools.cycle(cases)
+    decision_cases = itertools.cycle(cases)
+
+    def rules():
+        trade, current = next(rule_cases)
+        trade.partial_done = trade.breakeven_done = False
+        bot.should_close_trade(trade, current, 0.5)
+
+    def close_decision():
+        trade, _ = next(decision_cases)
+        trade.partial_done = trade.breakeven_done = False
+        harness.get_ai_close_decision_v2(pair, trade)
+
+    results["exit.should_close_trade"] = measure(rules, 20000)
+    results["exit.get_ai_close_decision_v2"] = measure(close_decision, 2000)
+    started = time.perf_counter()
+    for trade, current in cases * 20:
+        trade.partial_done = trade.breakeven_done = False
+        bot.should_close_trade(trade, current, 0.5)
+    results["exit.should_close_trade"]["decisions_per_sec"] = round(len(cases) * 20 / (time.perf_counter() - started))
+
+
+def bench_ml(harness, pair, results):
+    from sklearn.ensemble import RandomForestClassifier
+    import pandas as pd
+    predictor = SLPredictor()
+    trade = sample_closed_trade(3).to_dict()
+    market = {"atr_percent": 1.2, "rsi": 41.0, "trend_strength": 0.4}
+    results["ml.predict_mistake_fallback"] = measure(lambda: predictor.predict_mistake(trade, market), 5000)
+
+    # train_ml_model.py နဲ့ တူတဲ့ model (synthetic rows) - latency ပဲ တိုင်း
+    rng = np.random.default_rng(0)
+    columns = ["direction", "entry_price", "exit_price", "pnl", "leverage", "position_size_usd", "loss_percent",
+               "atr_percent", "volatility_spike", "trend_strength", "rsi", "volume_change", "news_impact", "sl_distance_pct"]
+    X = pd.DataFrame(rng.random((400, len(columns))), columns=columns)
+    y = (X["pnl"] < 0.4).astype(int)
+    predictor.model = RandomForestClassifier(n_estimators=200, max_depth=10, random_state=42, class_weight="balanced").fit(X, y)
+    results["ml.predict_mistake_rf200"] = measure(lambda: predictor.predict_mistake(trade, market), 100)
+
+
+def bench_persistence(harness, pair, results, sizes):
+    trade = sample_closed_trade(7).to_dict()
+    row, _, _ = data_collector.build_ml_row(trade)
+    for size in sizes:
+        # log_trade_for_ml: N rows ရှိပြီးသား CSV ထဲ append
+        with open(data_collector.DATA_FILE, "w", newline="", encoding="utf-8") as f:
+            header = ",".join(row.keys())
+            line = ",".join(str(v) for v in row.values())
+            f.write(header + "\n" + (line + "\n") * size)
+        results[f"persistence.log_trade_for_ml.{size}"] = measure(lambda: data_collector.log_trade_for_ml(trade), 200)
+
+        # save_real_trade_history: N trades ကို JSON အပြည့် ပြန်ရေး
+        harness.real_trade_history = [sample_closed_trade(i) for i in range(size)]
+        repeat = max(1, min(20, 200_000 // size))
+        results[f"persistence.save_real_trade_history.{size}"] = measure(harness.save_real_trade_history, repeat, warmup=0)
+        results[f"persistence.save_real_trade_history.{size}"]["file_mb"] = round(os.path.getsize(harness.real_trade_history_file) / 1e6, 2)
+        harness.real_trade_history = []
+
+
+BENCHMARKS = {
+    "indicators": bench_indicators,
+    "mtf": bench_mtf,
+    "exit": bench_exit,
+    "ml": bench_ml,
+}
+
+
+# === RESULTS ===
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def save_run(run, path):
+    runs = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            runs = json.load(f)
+    previous = runs[-1] if runs else None
+    runs.append(run)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2)
+    return previous
+
+
+def print_report(run, previous):
+    for name, stats in run["results"].items():
+        line = f"{name:<46} mean {stats['mean_us']:>12.1f}µs  p95 {stats['p95_us']:>12.1f}µs"
+        before = (previous or {}).get("results", {}).get(name)
+        if before and before["mean_us"]:
+            change = (stats["mean_us"] - before["mean_us"]) / before["mean_us"] * 100
+            line += f"  ({change:+.1f}% vs {previous.get('commit') or 'previous'})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path benchmarks (no network)")
+    parser.add_argument("--only", default="", help="comma-separated name prefixes (indicators, mtf, exit, ml, persistence)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="history sizes for persistence")
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--record-fixture", metavar="PAIR=path", help="rebuild the fixture from local 5m klines")
+    parser.add_argument("--at", type=int, help="fixture snapshot time (epoch ms) for --record-fixture")
+    args = parser.parse_args()
+
+    if args.record_fixture:
+        record_fixture(args.record_fixture, args.at, args.fixture)
+        return
+
+    structured_log.setup(console="off", json_file="")   # logging cost = enqueue only, no files
+    only = [p for p in args.only.split(",") if p]
+    selected = lambda name: not only or any(name.startswith(p) for p in only)
+    out = os.path.abspath(args.out)
+    pair, client = FixtureClient.load(args.fixture)
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)   # ML CSV / history JSON / model lookups stay out of the repo
+        harness = Harness(client)
+        # bot / data_collector / predictor print ကို မတိုင်းချင် → stdout ပိတ်
+        with contextlib.redirect_stdout(io.StringIO()) as sink:
+            for name, fn in BENCHMARKS.items():
+                if selected(name):
+                    fn(harness, pair, results)
+                    sink.seek(0)
+                    sink.truncate()
+            if selected("persistence"):
+                sizes = [int(s) for s in args.sizes.split(",") if s]
+                bench_persistence(harness, pair, results, sizes)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    run = {
+        "ts": time.time(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    previous = save_run(run, out)
+    print_report(run, previous)
+    print(f"[BENCH] {len(results)} benchmarks → {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,16 +16,29 @@ except ImportError as e:
 
 import requests
 import json
+import logging
 import time
-import re
 import math
 import numpy as np
-from binance.client import Client
-from binance.exceptions import BinanceAPIException
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
 import pytz
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from position_manager import PositionLedger
+from trade_records import Position, ClosedTrade, load_trade_history, dump_trade_history
+from position_journal import PositionJournal
+from pattern_index import market_context
+from llm_replay import LLMReplayStore
+from sim_clock import clock_from_env
+from instrumentation import LatencyRecorder, timed
+from metrics_server import Metrics, MetricsServer
+from exchange_cache import SymbolMetadataCache, binance_fetcher
+from universe_scanner import UniverseScanner, PublicFuturesREST
+from llm_router import LLMRouter, LLMRouterError, first_json_object
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+import prefilter
+import prompt_builder
+import structured_log
 
 # Colorama setup
 try:
@@ -39,6 +52,12 @@ except ImportError:
 # Load environment variables
 load_dotenv()
 
+# Circuit breaker slow-call thresholds (sec) - BREAKER_SLOW_<NAME> overrides
+BREAKER_SLOW_SECONDS = {"binance": 5.0, "binance_public": 5.0, "openrouter": 15.0}
+
+# OpenRouter attribution headers (bot's own router + the orchestrator's shared one)
+LLM_HEADERS = {"HTTP-Referer": "https://github.com", "X-Title": "Fully Autonomous AI Trader"}
+
 # Global color variables for fallback
 if not COLORAMA_AVAILABLE:
     class DummyColors:
@@ -50,8 +69,12 @@ if not COLORAMA_AVAILABLE:
     Style = DummyColors()
 
 # ==================== V4.1 TRUE SMART NEVER GIVE BACK ====================
-def should_close_trade(trade, current_price, atr_14):
-    """BOUNCE-PROOF 3-LAYER EXIT - NO WINNER-TURN-LOSER"""
+def should_close_trade(trade, current_price, atr_14=None):
+    """
+    BOUNCE-PROOF 3-LAYER EXIT - NO WINNER-TURN-LOSER
+    Live bot, paper trader, backtest အားလုံး ဒီ rule တစ်ခုတည်းကို သုံး
+    atr_14: number, or a zero-arg callable (trailing rule ရောက်မှ klines ဆွဲ)
+    """
     # လက်ရှိ PnL % တွက်တာ
     if trade['direction'] == 'LONG':
         pnl_pct = (current_price - trade['entry_price']) / trade['entry_price'] * 100 * trade['leverage']
@@ -64,6 +87,16 @@ def should_close_trade(trade, current_price, atr_14):
 
     peak = trade['peak_pnl']
 
+    # ==================== ၀. Hard stop -5% က ဘယ်လိုမှ မလွတ် ====================
+    if pnl_pct <= -5.0:
+        return {
+            "should_close": True,
+            "partial_percent": 100,
+            "close_type": "STOP_LOSS",
+            "reason": "Hard -5% rule",
+            "confidence": 100
+        }
+
     # ==================== ၁. 60% Partial @ +9% ====================
     if peak >= 9.0 and not trade.get('partial_done', False):
         trade['partial_done'] = True
@@ -100,11 +133,18 @@ def should_close_trade(trade, current_price, atr_14):
 
     # ==================== ၄. 2×ATR Trailing (optional boost) ====================
     if trade.get('partial_done', False) and peak >= 9.0:
+        if callable(atr_14):
+            try:
+                atr_14 = atr_14()
+            except Exception:
+                atr_14 = None
+        if atr_14 is None:
+            atr_14 = 0.001
         trail_price = current_price + (2 * atr_14) if trade['direction'] == 'LONG' else current_price - (2 * atr_14)
         if trade['direction'] == 'LONG' and current_price <= trail_price:
-            return {"should_close": True, "partial_percent": 100, "close_type": "TRAILING_HIT", "reason": "2×ATR Trailing ထိပြီး ထွက်"}
+            return {"should_close": True, "partial_percent": 100, "close_type": "TRAILING_HIT", "reason": "2×ATR Trailing ထိပြီး ထွက်", "confidence": 95}
         if trade['direction'] == 'SHORT' and current_price >= trail_price:
-            return {"should_close": True, "partial_percent": 100, "close_type": "TRAILING_HIT", "reason": "2×ATR Trailing ထိပြီး ထွက်"}
+            return {"should_close": True, "partial_percent": 100, "close_type": "TRAILING_HIT", "reason": "2×ATR Trailing ထိပြီး ထွက်", "confidence": 95}
 
     # ==================== ၅. Winner-Turn-Loser = လုံးဝ မရှိတော့ဘူး ====================
     # ❌❌❌ ဒီတစ်ကြောင်းကို လုံးဝ ဖျက်ထားပြီး → တစ်ခါမှ အမြတ်ပြန်မပေးတော့ဘူး
@@ -114,14 +154,18 @@ def should_close_trade(trade, current_price, atr_14):
 # Use conditional inheritance with proper method placement
 if LEARN_SCRIPT_AVAILABLE:
     class FullyAutonomous1HourAITrader(SelfLearningAITrader):
-        def __init__(self):
-            # Initialize learning component first
-            super().__init__()
+        def __init__(self, clock=None, profile=None):
+            # profile = orchestrator trader config (name, budget, pairs, state_dir, shared services); None → defaults
+            self.profile = profile or {}
+            # Initialize learning component first (learning + trading share one clock)
+            super().__init__(clock or clock_from_env(), self.profile.get("state_dir", ""))
             # Then initialize trading components
             self._initialize_trading()
 else:
     class FullyAutonomous1HourAITrader(object):
-        def __init__(self):
+        def __init__(self, clock=None, profile=None):
+            self.profile = profile or {}
+            self.clock = clock or clock_from_env()
             # Fallback initialization without learning
             self.mistakes_history = []
             self.learned_patterns = {}
@@ -139,6 +183,7 @@ def calculate_ema(self, data, period):
     """Calculate Exponential Moving Average"""
     if len(data) < period:
         return [None] * len(data)
+    import pandas as pd  # lazy - startup မှာ pandas import မစောင့်ရ
     df = pd.Series(data)
     return df.ewm(span=period, adjust=False).mean().tolist()
 
@@ -146,6 +191,7 @@ def calculate_rsi(self, data, period=14):
     """Calculate Relative Strength Index"""
     if len(data) < period + 1:
         return [50] * len(data)
+    import pandas as pd
     df = pd.Series(data)
     delta = df.diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -154,6 +200,14 @@ def calculate_rsi(self, data, period=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi.fillna(50).tolist()
 
+def calculate_atr_percent(self, highs, lows, closes, period=14):
+    """Average True Range as % of the last close"""
+    if len(closes) < 2 or not closes[-1]:
+        return 0.0
+    tr = [max(highs[i] - lows[i], abs(highs[i] - closes[i-1]), abs(lows[i] - closes[i-1])) for i in range(1, len(closes))]
+    recent = tr[-period:]
+    return sum(recent) / len(recent) / closes[-1] * 100
+
 def calculate_volume_spike(self, volumes, window=10):
     """Calculate if current volume is a spike"""
     if len(volumes) < window + 1:
@@ -188,9 +242,17 @@ def validate_api_keys(self):
 # Common trading initialization for both cases
 def _initialize_trading(self):
     """Initialize trading components (common for both cases)"""
-    # Load config from .env file
-    self.binance_api_key = os.getenv('BINANCE_API_KEY')
-    self.binance_secret = os.getenv('BINANCE_SECRET_KEY')
+    # Orchestrator profile (orchestrator.py) - empty → single bot with the settings below
+    profile = self.profile
+    self.trader_name = profile.get("name", "")
+    self.state_dir = profile.get("state_dir", "")
+    if self.state_dir:
+        os.makedirs(self.state_dir, exist_ok=True)
+    shared = profile.get("shared")
+    
+    # Load config from .env file (profile key_env → this account's own key variables)
+    self.binance_api_key = os.getenv(profile.get("api_key_env", 'BINANCE_API_KEY'))
+    self.binance_secret = os.getenv(profile.get("secret_key_env", 'BINANCE_SECRET_KEY'))
     self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
     
     # Store colorama references
@@ -203,22 +265,30 @@ def _initialize_trading(self):
     self.thailand_tz = pytz.timezone('Asia/Bangkok')
     
     # 🎯 FULLY AUTONOMOUS AI TRADING PARAMETERS
-    self.total_budget = 500  # $500 budget for AI to manage
-    self.available_budget = 500  # Current available budget
-    self.max_position_size_percent = 10  # Max 10% of budget per trade for 1hr
-    self.max_concurrent_trades = 4  # Maximum concurrent positions
+    self.total_budget = profile.get("budget", 500)  # $500 budget for AI to manage
+    self.max_position_size_percent = profile.get("max_position_size_percent", 10)  # Max 10% of budget per trade for 1hr
+    self.max_concurrent_trades = profile.get("max_concurrent_trades", 4)  # Maximum concurrent positions
     
     # AI can trade selected 3 major pairs only
-    self.available_pairs = [
+    self.available_pairs = list(profile.get("pairs", [
         "SOLUSDT"
-    ]
+    ]))
+    # UNIVERSE_TOP_N > 0 → available_pairs ကို cycle တိုင်း market-wide scan နဲ့ ပြန်ရွေး (profile "universe" → this trader's own scan settings)
+    self.universe = UniverseScanner(**profile["universe"]) if "universe" in profile else UniverseScanner.from_env()
+    self.prefilter_stats = {}  # reason → count (prefilter.screen)
+    # Strategy switches - profile wins over PREFILTER / LLM_BATCH (env is process-wide, profiles are per trader)
+    self.prefilter_enabled = profile.get("prefilter", prefilter.enabled())
+    self.llm_batch = profile.get("llm_batch", prompt_builder.batch_enabled())
     
-    # Track AI-opened trades
-    self.ai_opened_trades = {}
+    # Track AI-opened trades + available budget (thread-safe ledger, journaled for crash recovery)
+    self.position_journal = PositionJournal(self.state_path("fully_autonomous_1hour_positions.wal"))
+    self.ai_opened_trades = PositionLedger(self.total_budget, self.max_concurrent_trades, journal=self.position_journal)
     
     # REAL TRADE HISTORY
-    self.real_trade_history_file = "fully_autonomous_1hour_ai_trading_history.json"
+    self.real_trade_history_file = self.state_path("fully_autonomous_1hour_ai_trading_history.json")
     self.real_trade_history = self.load_real_trade_history()
+    if LEARN_SCRIPT_AVAILABLE and len(self.pattern_index) == 0:
+        self.rebuild_pattern_index(self.real_trade_history)
     
     # Trading statistics
     self.real_total_trades = 0
@@ -235,12 +305,67 @@ def _initialize_trading(self):
     # NEW: Monitoring interval (3 minute)
     self.monitoring_interval = 180  # 3 minute in seconds
     
+    # Per-stage latency (p50/p95/p99 → LATENCY_FILE, periodic + on exit)
+    self.latency = LatencyRecorder.from_env()
+    if self.latency.path:
+        self.latency.path = self.state_path(self.latency.path)
+    
+    # Per-dependency circuit breakers (get_breaker) + last live price / MTF per pair (never a made-up price)
+    # Orchestrated → one set for every trader: an outage trips once, the cache serves all of them
+    self.breakers = shared.breakers if shared is not None else {}
+    self.last_prices = shared.last_prices if shared is not None else {}
+    self.last_market_data = shared.last_market_data if shared is not None else {}
+    self.price_max_age = float(os.getenv("PRICE_MAX_AGE", "60"))
+    # Shared MTF / price cache (market_cache.py) + LLM router - orchestrator only
+    self.market_cache = shared.market_cache if shared is not None else None
+    if shared is not None:
+        self.llm_router = shared.llm_router
+    
+    # Prometheus metrics (METRICS_PORT, 0 = off) - background thread, never blocks trading
+    self.metrics = Metrics()
+    self.metrics.counter("cycles_total", "Trading cycles started")
+    LLMRouter.declare_metrics(self.metrics)
+    self.metrics.summary("llm_latency_seconds", "LLM decision latency (hedged, end to end)")
+    self.metrics.counter("prefilter_total", "Pre-LLM gate results by reason")
+    circuit_breaker.declare_metrics(self.metrics, self.breakers)
+    self.metrics.declare_rest_metrics()
+    self.metrics.counter("ml_log_failures_total", "Closed trades that could not be logged for ML")
+    self.metrics.counter("exit_rule_hits_total", "Exit rule decisions by close_type")
+    self.metrics.gauge("open_positions", "Open positions", lambda: len(self.ai_opened_trades))
+    self.metrics.gauge("available_budget_usd", "Budget not reserved by open positions", lambda: self.ai_opened_trades.available_budget)
+    self.metrics.gauge("unrealized_pnl_usd", "Unrealized PnL at the last dashboard refresh")
+    self.metrics_server = MetricsServer.from_env(self.metrics)
+    if shared is not None:
+        self.metrics_server.port = 0  # orchestrator serves every trader's registry on one endpoint
+    if self.metrics_server.start():
+        self.print_color(f"📈 METRICS: http://{self.metrics_server.host}:{self.metrics_server.port}/metrics", self.Fore.BLUE)
+    
+    # LLM record/replay (LLM_REPLAY_MODE=off|record|replay)
+    self.llm_replay = LLMReplayStore.from_env()
+    if self.llm_replay.mode != 'off':
+        self.print_color(f"📼 LLM {self.llm_replay.mode.upper()} MODE: {len(self.llm_replay)} stored responses ({self.llm_replay.path})", self.Fore.MAGENTA)
+    
     # Validate APIs before starting
     self.validate_api_keys()
     
-    # Initialize Binance client
+    # Initialize Binance client (FAKE_EXCHANGE_KLINES → in-process simulator, no account needed)
     try:
-        self.binance = Client(self.binance_api_key, self.binance_secret)
+        if profile.get("mode") == "paper":
+            # Orchestrated paper trader: no account connection, market data only (shared client)
+            self.binance = None
+        elif os.getenv('FAKE_EXCHANGE_KLINES'):
+            from fake_exchange import FakeBinanceClient
+            # SIM_CLOCK → exchange time = bot time; every sleep() jumps straight to the next cycle
+            self.binance = FakeBinanceClient.for_clock(self.clock)
+            if self.clock.simulated:
+                self.print_color(f"🧪 FAKE EXCHANGE: {', '.join(self.binance.klines)} @ SIMULATED CLOCK from {self.clock.now():%Y-%m-%d %H:%M}", self.Fore.MAGENTA + self.Style.BRIGHT)
+            else:
+                self.print_color(f"🧪 FAKE EXCHANGE: {', '.join(self.binance.klines)} @ {self.binance.speed}x", self.Fore.MAGENTA + self.Style.BRIGHT)
+        else:
+            # Lazy import (python-binance + dateparser/aiohttp ~0.6s); ping=False - first real call warms the connection
+            from binance.client import Client
+            self.binance = Client(self.binance_api_key, self.binance_secret, ping=False)
+            self.metrics.track_requests_session(self.binance.session)
         self.print_color(f"🤖 FULLY AUTONOMOUS AI TRADER ACTIVATED! 🤖", self.Fore.CYAN + self.Style.BRIGHT)
         self.print_color(f"💰 TOTAL BUDGET: ${self.total_budget}", self.Fore.GREEN + self.Style.BRIGHT)
         self.print_color(f"🔄 REVERSE POSITION FEATURE: ENABLED", self.Fore.MAGENTA + self.Style.BRIGHT)
@@ -252,22 +377,111 @@ def _initialize_trading(self):
     except Exception as e:
         self.print_color(f"Binance initialization failed: {e}", self.Fore.RED)
         self.binance = None
+    # Klines / ticker source - the account client, or the orchestrator's one shared market-data client
+    self.market_client = shared.market_client if shared is not None else self.binance
     
-    self.validate_config()
-    if self.binance:
-        self.setup_futures()
-        self.load_symbol_precision()
+    # Symbol metadata disk cache (EXCHANGE_INFO_TTL) - restart တိုင်း full exchangeInfo မဆွဲရ
+    # Orchestrated → one cache + one refresher for every trader's pairs (shared.symbol_meta)
+    if shared is not None:
+        self.symbol_meta = shared.symbol_meta
+    else:
+        self.symbol_meta = SymbolMetadataCache.from_env()   # FAKE_EXCHANGE_KLINES → memory only
+    self.run_startup_calls()
 
 # Add the method to both classes
 FullyAutonomous1HourAITrader._initialize_trading = _initialize_trading
 
 # Now add all the other methods to the class
+def run_startup_calls(self):
+    """
+    Startup network calls in parallel: symbol precision, leverage/margin setup and
+    journal replay + position reconcile, then the connectivity check.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup") as pool:
+        jobs = [pool.submit(self.load_symbol_precision), pool.submit(self.recover_positions)]
+        if self.binance:
+            jobs.append(pool.submit(self.setup_futures))
+        for job in jobs:
+            try:
+                job.result()
+            except Exception as e:
+                self.print_color(f"Startup step failed: {e}", self.Fore.RED)
+    self.validate_config()
+    self.print_color(f"⚡ Startup calls finished in {(time.perf_counter() - started) * 1000:.0f}ms", self.Fore.CYAN)
+
+def apply_symbol_meta(self, symbols=None):
+    """Cached symbol metadata → quantity/price precision maps (also the background refresh callback)"""
+    for pair, meta in (symbols if symbols is not None else self.symbol_meta.symbols).items():
+        self.quantity_precision[pair] = meta["qty_precision"]
+        self.price_precision[pair] = meta["price_precision"]
+
+def recover_positions(self):
+    """Restart ပြီးရင် journal replay + Binance reconcile - unmanaged leveraged position မကျန်အောင်"""
+    started = time.perf_counter()
+    try:
+        replayed = self.position_journal.replay()
+    except Exception as e:
+        self.print_color(f"Position journal replay failed: {e}", self.Fore.RED)
+        replayed = {}
+    for pair, position in replayed.items():
+        self.ai_opened_trades.restore(pair, position)
+    
+    adopted = 0
+    if self.binance:
+        try:
+            exchange_positions = {
+                p['symbol']: p for p in self.binance.futures_position_information()
+                if float(p.get('positionAmt', 0)) != 0
+            }
+        except Exception as e:
+            self.print_color(f"Position reconcile failed: {e}", self.Fore.RED)
+            exchange_positions = None
+        
+        if exchange_positions is not None:
+            # Journal says open, exchange is flat → closed while the bot was down
+            for pair in self.ai_opened_trades.pairs():
+                if pair not in exchange_positions:
+                    self.print_color(f"⚠️ {pair} no longer open on Binance - dropping from active positions", self.Fore.YELLOW)
+                    self.ai_opened_trades.close(pair, 0.0)
+            
+            # Exchange is the source of truth for size/direction
+            for pair, info in exchange_positions.items():
+                amount = float(info['positionAmt'])
+                direction = 'LONG' if amount > 0 else 'SHORT'
+                tracked = self.ai_opened_trades.get(pair)
+                if tracked is not None and tracked['direction'] == direction:
+                    tracked['quantity'] = abs(amount)
+                    continue
+                
+                leverage = int(float(info.get('leverage') or 5))
+                entry_price = float(info['entryPrice'])
+                margin = float(info.get('isolatedMargin') or 0) or abs(amount) * entry_price / leverage
+                self.ai_opened_trades.restore(pair, Position(
+                    pair, direction, entry_price, abs(amount), margin, leverage,
+                    entry_time=self.clock.time(),
+                    entry_time_th=self.get_thailand_time(),
+                    ai_reasoning="RECOVERED from Binance position",
+                    has_tp_sl=False  # 3-layer exit takes over
+                ))
+                adopted += 1
+    
+    # Snapshot current state so the next replay stays short
+    try:
+        self.position_journal.compact(dict(self.ai_opened_trades.items()))
+    except Exception as e:
+        self.print_color(f"Position journal compaction failed: {e}", self.Fore.YELLOW)
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if len(self.ai_opened_trades) > 0:
+        self.print_color(f"♻️ Recovered {len(self.ai_opened_trades)} open positions ({adopted} adopted from Binance) in {elapsed_ms:.1f}ms", self.Fore.CYAN + self.Style.BRIGHT)
+
 def load_real_trade_history(self):
     """Load trading history"""
     try:
         if os.path.exists(self.real_trade_history_file):
             with open(self.real_trade_history_file, 'r') as f:
-                history = json.load(f)
+                history = load_trade_history(json.load(f))
                 self.real_total_trades = len(history)
                 self.real_winning_trades = len([t for t in history if t.get('pnl', 0) > 0])
                 self.real_total_pnl = sum(t.get('pnl', 0) for t in history)
@@ -281,46 +495,27 @@ def save_real_trade_history(self):
     """Save trading history"""
     try:
         with open(self.real_trade_history_file, 'w') as f:
-            json.dump(self.real_trade_history, f, indent=2)
+            json.dump(dump_trade_history(self.real_trade_history), f, indent=2)
     except Exception as e:
         self.print_color(f"Error saving trade history: {e}", self.Fore.RED)
 
+@timed("add_trade_to_history")
 def add_trade_to_history(self, trade_data):
     """Add trade to history WITH learning and partial close support"""
     try:
-        trade_data['close_time'] = self.get_thailand_time()
-        trade_data['close_timestamp'] = time.time()
-        trade_data['trade_type'] = 'REAL'
-        
-        # === FIX: Add missing fields for ML logging ===
-        if 'exit_price' not in trade_data:
-            # Get current price for exit price
-            current_price = self.get_current_price(trade_data['pair'])
-            trade_data['exit_price'] = current_price
-        
-        # Calculate peak_pnl_pct if not present
-        if 'peak_pnl_pct' not in trade_data:
-            if 'peak_pnl' in trade_data:
-                trade_data['peak_pnl_pct'] = trade_data['peak_pnl']
-            else:
-                # Calculate from entry and exit
-                if trade_data['direction'] == 'LONG':
-                    peak_pct = ((trade_data['exit_price'] - trade_data['entry_price']) / trade_data['entry_price']) * 100 * trade_data.get('leverage', 1)
-                else:
-                    peak_pct = ((trade_data['entry_price'] - trade_data['exit_price']) / trade_data['entry_price']) * 100 * trade_data.get('leverage', 1)
-                trade_data['peak_pnl_pct'] = max(0, peak_pct)  # At least 0
-        
-        # Add partial close indicator to display
-        if trade_data.get('partial_percent', 100) < 100:
-            trade_data['display_type'] = f"PARTIAL_{trade_data['partial_percent']}%"
-        else:
-            trade_data['display_type'] = "FULL_CLOSE"
+        # ClosedTrade always carries exit_price / peak_pnl_pct / display_type
+        if not isinstance(trade_data, ClosedTrade):
+            trade_data = ClosedTrade.from_dict(trade_data)
+        trade_data.close_time = self.get_thailand_time()
+        trade_data.close_timestamp = self.clock.time()
+        trade_data.trade_type = 'REAL'
         
         self.real_trade_history.append(trade_data)
         
-        # 🧠 Learn from this trade (especially if it's a loss)
+        # 🧠 Learn from this trade (especially if it's a loss) - verdict ကို ML row ထဲ တစ်ခါတည်း ရေး
+        is_mistake = None
         if LEARN_SCRIPT_AVAILABLE:
-            self.learn_from_mistake(trade_data)
+            is_mistake = self.learn_from_mistake(trade_data, trade_data.get('entry_context'))
             self.adaptive_learning_adjustment()
         
         # Update performance stats
@@ -342,16 +537,18 @@ def add_trade_to_history(self, trade_data):
             from data_collector import log_trade_for_ml
             
             # Print what we're sending to debug
-            print(f"🔧 [ML DEBUG] Sending trade data: {trade_data['pair']} | PnL: ${pnl:.2f}")
+            self.print_color(f"🔧 [ML DEBUG] Sending trade data: {trade_data['pair']} | PnL: ${pnl:.2f}", level=logging.DEBUG)
             
             # Call ML logging
-            log_trade_for_ml(trade_data)
-            print("✅ ML data logged → ml_training_data.csv updated!")
+            log_trade_for_ml(trade_data, trade_data.get('entry_context'), is_mistake=is_mistake, path=self.state_path("ml_training_data.csv"))
+            self.print_color("✅ ML data logged → ml_training_data.csv updated!", level=logging.DEBUG)
             
         except ImportError as e:
-            print(f"❌ [ML ERROR] Cannot import data_collector: {e}")
+            self.metrics.inc("ml_log_failures_total")
+            self.print_color(f"❌ [ML ERROR] Cannot import data_collector: {e}")
         except Exception as e:
-            print(f"❌ [ML ERROR] Logging failed: {e}")
+            self.metrics.inc("ml_log_failures_total")
+            self.print_color(f"❌ [ML ERROR] Logging failed: {e}")
             # Try to create a simple CSV as fallback
             self._create_fallback_ml_log(trade_data)
         
@@ -370,7 +567,7 @@ def _create_fallback_ml_log(self, trade_data):
         import csv
         import os
         
-        csv_file = "ml_training_data_fallback.csv"
+        csv_file = self.state_path("ml_training_data_fallback.csv")
         file_exists = os.path.isfile(csv_file)
         
         with open(csv_file, 'a', newline='', encoding='utf-8') as f:
@@ -382,7 +579,7 @@ def _create_fallback_ml_log(self, trade_data):
             
             # Write data
             writer.writerow([
-                trade_data.get('close_time', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                trade_data.get('close_time', self.clock.now().strftime('%Y-%m-%d %H:%M:%S')),
                 trade_data.get('pair', ''),
                 trade_data.get('direction', ''),
                 trade_data.get('entry_price', 0),
@@ -391,21 +588,37 @@ def _create_fallback_ml_log(self, trade_data):
                 trade_data.get('close_reason', '')
             ])
         
-        print(f"✅ Fallback ML data saved to {csv_file}")
+        self.print_color(f"✅ Fallback ML data saved to {csv_file}")
         
     except Exception as e:
-        print(f"❌ Fallback ML logging also failed: {e}")
+        self.print_color(f"❌ Fallback ML logging also failed: {e}")
+
+def state_path(self, filename):
+    """Per-trader state file (profile state_dir) - no state_dir → working dir, the single-bot layout"""
+    return os.path.join(self.state_dir, filename)
+
+def pause(self, seconds):
+    """
+    Short wait between exchange actions inside a cycle. Orchestrated on SIM_CLOCK → skipped:
+    traders run in parallel on one shared clock and only Orchestrator.run may move it.
+    """
+    if self.profile.get("shared") is not None and self.clock.simulated:
+        return
+    self.clock.sleep(seconds)
 
 def get_thailand_time(self):
-    now_utc = datetime.now(pytz.utc)
+    now_utc = self.clock.now(pytz.utc)
     thailand_time = now_utc.astimezone(self.thailand_tz)
     return thailand_time.strftime('%Y-%m-%d %H:%M:%S')
 
-def print_color(self, text, color="", style=""):
-    if self.COLORAMA_AVAILABLE:
-        print(f"{style}{color}{text}")
-    else:
-        print(text)
+def print_color(self, text, color="", style="", level=None, sample=None):
+    """Queued console + JSON log line (structured_log) - cycle က terminal speed ကို မစောင့်ရ"""
+    name = getattr(self, 'trader_name', "")
+    if name:
+        # Orchestrated traders share one console: [name] after the leading blank lines
+        body = text.lstrip("\n")
+        text = f"{text[:len(text) - len(body)]}[{name}] {body}"
+    structured_log.console(text, f"{style}{color}" if self.COLORAMA_AVAILABLE else "", level=level, sample=sample, name=name or None)
 
 def validate_config(self):
     if not all([self.binance_api_key, self.binance_secret, self.openrouter_key]):
@@ -413,7 +626,7 @@ def validate_config(self):
         return False
     try:
         if self.binance:
-            self.binance.futures_exchange_info()
+            self.binance.futures_ping()
             self.print_color("✅ Binance connection successful!", self.Fore.GREEN + self.Style.BRIGHT)
         else:
             self.print_color("Binance client not available - Paper Trading only", self.Fore.YELLOW)
@@ -423,25 +636,31 @@ def validate_config(self):
         return False
     return True
 
-def setup_futures(self):
+def setup_futures(self, pairs=None):
     if not self.binance:
         return
+    pairs = self.available_pairs if pairs is None else pairs
         
+    def setup_pair(pair):
+        try:
+            # Set initial leverage to 5x (AI can change later)
+            self.binance.futures_change_leverage(symbol=pair, leverage=5)
+            self.binance.futures_change_margin_type(symbol=pair, marginType='ISOLATED')
+            self.print_color(f"✅ Leverage set for {pair}", self.Fore.GREEN)
+        except Exception as e:
+            self.print_color(f"Leverage setup failed for {pair}: {e}", self.Fore.YELLOW)
+    
     try:
-        for pair in self.available_pairs:
-            try:
-                # Set initial leverage to 5x (AI can change later)
-                self.binance.futures_change_leverage(symbol=pair, leverage=5)
-                self.binance.futures_change_margin_type(symbol=pair, marginType='ISOLATED')
-                self.print_color(f"✅ Leverage set for {pair}", self.Fore.GREEN)
-            except Exception as e:
-                self.print_color(f"Leverage setup failed for {pair}: {e}", self.Fore.YELLOW)
+        # Pair တစ်ခုချင်း round trip 2 ခု - pair အားလုံး တပြိုင်နက်
+        with ThreadPoolExecutor(max_workers=min(8, len(pairs) or 1), thread_name_prefix="leverage") as pool:
+            list(pool.map(setup_pair, pairs))
         self.print_color("✅ Futures setup completed!", self.Fore.GREEN + self.Style.BRIGHT)
     except Exception as e:
         self.print_color(f"Futures setup failed: {e}", self.Fore.RED)
 
 def load_symbol_precision(self):
-    if not self.binance:
+    client = self.binance or self.market_client  # orchestrated paper trader → shared market-data client
+    if not client:
         # For paper trading, get precision from Binance public API
         for pair in self.available_pairs:
             try:
@@ -471,21 +690,17 @@ def load_symbol_precision(self):
         return
         
     try:
-        exchange_info = self.binance.futures_exchange_info()
-        for symbol in exchange_info['symbols']:
-            pair = symbol['symbol']
-            if pair not in self.available_pairs:
-                continue
-            for f in symbol['filters']:
-                if f['filterType'] == 'LOT_SIZE':
-                    step_size = f['stepSize']
-                    qty_precision = len(step_size.split('.')[1].rstrip('0')) if '.' in step_size else 0
-                    self.quantity_precision[pair] = qty_precision
-                elif f['filterType'] == 'PRICE_FILTER':
-                    tick_size = f['tickSize']
-                    price_precision = len(tick_size.split('.')[1].rstrip('0')) if '.' in tick_size else 0
-                    self.price_precision[pair] = price_precision
-        self.print_color("✅ Symbol precision loaded", self.Fore.GREEN + self.Style.BRIGHT)
+        # Disk cache first (stale → background ETag revalidation), full exchangeInfo only when a pair is missing
+        fetch = binance_fetcher(client)
+        pairs, on_update = self.available_pairs, self.apply_symbol_meta
+        shared = self.profile.get("shared")
+        if shared is not None:
+            # Shared cache covers the union of every trader's pairs; a refresh reaches all of them
+            pairs, on_update = shared.watch_symbols(self.available_pairs, self.apply_symbol_meta)
+        source = self.symbol_meta.ensure(fetch, pairs)
+        self.apply_symbol_meta()
+        self.symbol_meta.start_refresh(fetch, pairs, on_update=on_update)
+        self.print_color(f"✅ Symbol precision loaded ({source})", self.Fore.GREEN + self.Style.BRIGHT)
     except Exception as e:
         self.print_color(f"Error loading symbol precision: {e}", self.Fore.RED)
 
@@ -499,147 +714,177 @@ def get_market_news_sentiment(self):
     except:
         return "General crypto market news monitoring"
 
+@timed("get_ai_trading_decision")
 def get_ai_trading_decision(self, pair, market_data, current_trade=None):
-    """AI makes COMPLETE trading decisions including REVERSE positions"""
-    max_retries = 3
-    retry_delay = 2
-    
-    for attempt in range(max_retries):
-        try:
-            if not self.openrouter_key:
-                self.print_color("❌ OpenRouter API key missing!", self.Fore.RED)
+    """AI makes COMPLETE trading decisions including REVERSE positions (one LLMRouter call: hedged across models, single deadline)"""
+    metrics = getattr(self, 'metrics', None)
+    try:
+        llm_replay = getattr(self, 'llm_replay', None)
+        replaying = llm_replay is not None and llm_replay.replaying
+        if not self.openrouter_key and not replaying:
+            self.print_color("❌ OpenRouter API key missing!", self.Fore.RED)
+            return self.get_improved_fallback_decision(pair, market_data)
+        router = self.get_llm_router()
+        
+        current_price = market_data.get('current_price', 0)
+
+        # === REVERSE CONTEXT ===
+        position = None
+        if current_trade and self.allow_reverse_positions:
+            position = (current_trade['direction'], current_trade['entry_price'], self.calculate_current_pnl(current_trade, current_price))
+
+        # === LEARNING CONTEXT ===
+        learning_context = ""
+        if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'get_learning_enhanced_prompt'):
+            learning_context = self.get_learning_enhanced_prompt(pair, market_data)
+
+        # Static (cacheable) system block + compact market block; PROMPT_STYLE=legacy → the old free-form prompt
+        data = prompt_builder.build_payload(router.models[0], pair, market_data, self.available_budget, position, learning_context)
+        
+        # 📼 Replay: recorded response or fallback, never the network
+        if replaying:
+            ai_response = llm_replay.lookup(data)
+            if ai_response is None:
                 return self.get_improved_fallback_decision(pair, market_data)
-            
-            current_price = market_data.get('current_price', 0)
-            mtf = market_data.get('mtf_analysis', {})
-
-            # === MULTI-TIMEFRAME TEXT SUMMARY ===
-            mtf_text = "MULTI-TIMEFRAME ANALYSIS:\n"
-            for tf in ['5m', '15m', '1h', '4h', '1d']:
-                if tf in mtf:
-                    d = mtf[tf]
-                    mtf_text += f"- {tf.upper()}: {d.get('trend', 'N/A')} | "
-                    if 'crossover' in d:
-                        mtf_text += f"Signal: {d['crossover']} | "
-                    if 'rsi' in d:
-                        mtf_text += f"RSI: {d['rsi']} | "
-                    if 'vol_spike' in d:
-                        mtf_text += f"Vol: {'SPIKE' if d['vol_spike'] else 'Normal'} | "
-                    if 'support' in d and 'resistance' in d:
-                        mtf_text += f"S/R: {d['support']:.4f}/{d['resistance']:.4f}"
-                    mtf_text += "\n"
-
-            # === TREND ALIGNMENT ===
-            h1_trend = mtf.get('1h', {}).get('trend')
-            h4_trend = mtf.get('4h', {}).get('trend')
-            alignment = "STRONG" if h1_trend == h4_trend and h1_trend else "WEAK"
-
-            # === REVERSE ANALYSIS ===
-            reverse_analysis = ""
-            if current_trade and self.allow_reverse_positions:
-                pnl = self.calculate_current_pnl(current_trade, current_price)
-                reverse_analysis = f"""
-                EXISTING POSITION:
-                - Direction: {current_trade['direction']}
-                - Entry: ${current_trade['entry_price']:.4f}
-                - PnL: {pnl:.2f}%
-                - REVERSE if trend flipped?
-                """
-
-            # === LEARNING CONTEXT ===
-            learning_context = ""
-            if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'get_learning_enhanced_prompt'):
-                learning_context = self.get_learning_enhanced_prompt(pair, market_data)
-
-            # === FINAL PROMPT ===
-            prompt = f"""
-YOU ARE A PROFESSIONAL AI TRADER. Budget: ${self.available_budget:.2f}
-
-{mtf_text}
-TREND ALIGNMENT: {alignment}
-
-1H TRADING PAIR: {pair}
-Current Price: ${current_price:.6f}
-{reverse_analysis}
-{learning_context}
-
-RULES:
-- Only trade if 1H and 4H trend align
-- Confirm entry with 15m crossover + volume spike
-- RSI < 30 = oversold, > 70 = overbought
-- Position size: 5-10% of budget ($50 min)
-- Leverage: 5-10x based on volatility
-- NO TP/SL - you will close manually
-
-REVERSE POSITION STRATEGY (CRITICAL):
-- Use "REVERSE_LONG"  → Close current SHORT + Open LONG immediately
-- Use "REVERSE_SHORT" → Close current LONG  + Open SHORT immediately
-- REVERSE only if ALL conditions met:
-  1. Current PnL ≤ -2%
-  2. 1H and 4H trend flipped (opposite to current position)
-  3. 15m shows crossover in new direction
-  4. Volume spike confirms momentum
-- Example:
-  • You have SHORT @ $100 → Price now $103 → PnL: -3%
-  • 4H: BEARISH → BULLISH, 15m: GOLDEN cross, Volume: SPIKE
-  → Return "REVERSE_LONG"
-
-Return JSON:
-{{
-    "decision": "LONG" | "SHORT" | "HOLD" | "REVERSE_LONG" | "REVERSE_SHORT",
-    "position_size_usd": number,
-    "entry_price": number,
-    "leverage": number,
-    "confidence": 0-100,
-    "reasoning": "MTF alignment + signal + risk"
-}}
-"""
-            headers = {
-                "Authorization": f"Bearer {self.openrouter_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://github.com",
-                "X-Title": "Fully Autonomous AI Trader"
-            }
-            
-            data = {
-                "model": "deepseek/deepseek-chat-v3.1",
-                "messages": [
-                    {"role": "system", "content": "You are a fully autonomous AI trader with reverse position capability. You manually close positions based on market conditions - no TP/SL orders are set. Analyze when to enter AND when to exit based on technical analysis. Monitor every 3 minute."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 800
-            }
-            
-            self.print_color(f"🧠 DeepSeek Analyzing {pair} with 3MIN monitoring...", self.Fore.MAGENTA + self.Style.BRIGHT)
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=60)
-            
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result['choices'][0]['message']['content'].strip()
-                return self.parse_ai_trading_decision(ai_response, pair, current_price, current_trade)
-            else:
-                self.print_color(f"⚠️ DeepSeek API attempt {attempt+1} failed: {response.status_code}", self.Fore.YELLOW)
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    continue
-                    
-        except requests.exceptions.Timeout:
-            self.print_color(f"⏰ DeepSeek timeout attempt {attempt+1}", self.Fore.YELLOW)
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
-                
-        except Exception as e:
-            self.print_color(f"❌ DeepSeek error attempt {attempt+1}: {e}", self.Fore.RED)
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
+            return self.parse_ai_trading_decision(ai_response, pair, current_price, current_trade)
+        
+        self.print_color(f"🧠 DeepSeek Analyzing {pair} with 3MIN monitoring...", self.Fore.MAGENTA + self.Style.BRIGHT)
+        started = time.perf_counter()
+        try:
+            ai_response, model, _ = self.get_breaker("openrouter").call(router.complete, data)
+        finally:
+            if metrics is not None:
+                metrics.observe("llm_latency_seconds", time.perf_counter() - started)
+        if model != router.models[0]:
+            self.print_color(f"🔀 {pair} answered by {model}", self.Fore.MAGENTA, level=logging.DEBUG)
+        if llm_replay is not None:
+            llm_replay.record(data, ai_response)
+        return self.parse_ai_trading_decision(ai_response, pair, current_price, current_trade)
+    
+    except LLMRouterError as e:
+        self.print_color(f"⚠️ DeepSeek unavailable ({e.kind}): {e}", self.Fore.YELLOW)
+    except CircuitOpenError as e:
+        self.print_color(f"⛔ {e} - rule-based decision for {pair}", self.Fore.YELLOW, sample=10)
+        return self.get_improved_fallback_decision(pair, market_data)
+    except Exception as e:
+        self.print_color(f"❌ DeepSeek error: {e}", self.Fore.RED)
+        if metrics is not None:
+            metrics.inc("llm_errors_total", kind=type(e).__name__)
     
-    # All retries failed - use improved fallback
+    # Router gave up (all models failed / deadline) - use improved fallback
     self.print_color("🚨 All AI attempts failed, using improved fallback", self.Fore.RED)
     return self.get_improved_fallback_decision(pair, market_data)
 
+@timed("get_ai_batch_trading_decision")
+def get_ai_batch_trading_decision(self, entries, budget_usd):
+    """One LLM request for several pairs: entries = [(pair, market_data, current_trade or None)] → {pair: decision}"""
+    metrics = getattr(self, 'metrics', None)
+    try:
+        llm_replay = getattr(self, 'llm_replay', None)
+        replaying = llm_replay is not None and llm_replay.replaying
+        if not self.openrouter_key and not replaying:
+            self.print_color("❌ OpenRouter API key missing!", self.Fore.RED)
+            return {pair: self.get_improved_fallback_decision(pair, market_data) for pair, market_data, _ in entries}
+        router = self.get_llm_router()
+        
+        prompt_entries = []
+        for pair, market_data, current_trade in entries:
+            position = None
+            if current_trade and self.allow_reverse_positions:
+                position = (current_trade['direction'], current_trade['entry_price'],
+                            self.calculate_current_pnl(current_trade, market_data.get('current_price', 0)))
+            prompt_entries.append((pair, market_data, position))
+        
+        learning_context = ""
+        if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'get_learning_enhanced_prompt'):
+            learning_context = self.get_learning_enhanced_prompt(entries[0][0], entries[0][1])
+        
+        data = prompt_builder.batch_payload(router.models[0], prompt_entries, budget_usd, learning_context)
+        
+        if replaying:
+            ai_response = llm_replay.lookup(data)
+            if ai_response is not None:
+                return self.parse_ai_batch_decision(ai_response, entries, budget_usd)
+            return {pair: self.get_improved_fallback_decision(pair, market_data) for pair, market_data, _ in entries}
+        
+        self.print_color(f"🧠 DeepSeek Analyzing {len(entries)} pairs in one request...", self.Fore.MAGENTA + self.Style.BRIGHT)
+        started = time.perf_counter()
+        try:
+            ai_response, model, _ = self.get_breaker("openrouter").call(router.complete, data, validate=prompt_builder.valid_batch_reply)
+        finally:
+            if metrics is not None:
+                metrics.observe("llm_latency_seconds", time.perf_counter() - started)
+        if llm_replay is not None:
+            llm_replay.record(data, ai_response)
+        return self.parse_ai_batch_decision(ai_response, entries, budget_usd)
+    
+    except LLMRouterError as e:
+        self.print_color(f"⚠️ DeepSeek unavailable ({e.kind}): {e}", self.Fore.YELLOW)
+    except CircuitOpenError as e:
+        self.print_color(f"⛔ {e} - rule-based decisions for {len(entries)} pairs", self.Fore.YELLOW, sample=10)
+        return {pair: self.get_improved_fallback_decision(pair, market_data) for pair, market_data, _ in entries}
+    except Exception as e:
+        self.print_color(f"❌ DeepSeek batch error: {e}", self.Fore.RED)
+        if metrics is not None:
+            metrics.inc("llm_errors_total", kind=type(e).__name__)
+    
+    self.print_color("🚨 Batch AI request failed, using improved fallback", self.Fore.RED)
+    return {pair: self.get_improved_fallback_decision(pair, market_data) for pair, market_data, _ in entries}
+
+def parse_ai_batch_decision(self, ai_response, entries, budget_usd):
+    """Batch reply → {pair: decision}; every item goes through parse_ai_trading_decision, pairs the model skipped → HOLD"""
+    by_pair = {}
+    for item in prompt_builder.batch_decisions(ai_response) or []:
+        by_pair.setdefault(str(item.get('pair', '')).upper(), item)
+    
+    decisions = {}
+    for pair, market_data, current_trade in entries:
+        current_price = market_data.get('current_price', 0)
+        item = by_pair.get(pair)
+        if item is None:
+            decisions[pair] = {
+                "decision": "HOLD",
+                "position_size_usd": 0,
+                "entry_price": current_price,
+                "leverage": 5,
+                "confidence": 0,
+                "reasoning": "Missing from batch reply",
+                "should_reverse": False
+            }
+        else:
+            decisions[pair] = self.parse_ai_trading_decision(json.dumps(item), pair, current_price, current_trade)
+    
+    # The model splits the budget - scale new entries down if it over-allocated
+    new_entries = [d for d in decisions.values() if d["decision"] in ("LONG", "SHORT") and d["position_size_usd"] > 0]
+    total_usd = sum(d["position_size_usd"] for d in new_entries)
+    if total_usd > budget_usd > 0:
+        scale = budget_usd / total_usd
+        self.print_color(f"⚖️ Batch asked ${total_usd:.2f} of ${budget_usd:.2f} budget - sizes scaled x{scale:.2f}", self.Fore.YELLOW)
+        for d in new_entries:
+            d["position_size_usd"] = round(d["position_size_usd"] * scale, 2)
+    return decisions
+
+def get_llm_router(self):
+    """LLMRouter built on first use (also for Backtester, which borrows get_ai_trading_decision)"""
+    router = getattr(self, 'llm_router', None)
+    if router is None:
+        router = self.llm_router = LLMRouter.from_env(
+            self.openrouter_key,
+            headers=LLM_HEADERS,
+            metrics=getattr(self, 'metrics', None),
+        )
+    return router
+
+def get_breaker(self, name):
+    """CircuitBreaker for one dependency (binance / binance_public / openrouter), built on first use"""
+    breakers = getattr(self, 'breakers', None)
+    if breakers is None:
+        breakers = self.breakers = {}
+    if name not in breakers:
+        clock = getattr(self, 'clock', None)
+        breakers[name] = CircuitBreaker.from_env(name, BREAKER_SLOW_SECONDS.get(name, 0.0), clock.time if clock else time.time)
+    return breakers[name]
+
 def get_improved_fallback_decision(self, pair, market_data):
     """Better fallback that analyzes market conditions"""
     current_price = market_data['current_price']
@@ -714,10 +959,10 @@ def get_improved_fallback_decision(self, pair, market_data):
 def parse_ai_trading_decision(self, ai_response, pair, current_price, current_trade=None):
     """Parse AI's trading decision including REVERSE positions"""
     try:
-        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            decision_data = json.loads(json_str)
+        # First complete JSON object (streamed replies are already cut there; prose after it is ignored)
+        json_str = first_json_object(ai_response)
+        if json_str:
+            decision_data = prompt_builder.expand_reply(json.loads(json_str))
             
             decision = decision_data.get('decision', 'HOLD').upper()
             position_size_usd = float(decision_data.get('position_size_usd', 0))
@@ -770,12 +1015,12 @@ def execute_reverse_position(self, pair, ai_decision, current_trade):
         
         if close_success:
             # 2. Wait a moment for position to close
-            time.sleep(2)
+            self.pause(2)
             
             # 3. Verify position is actually removed
             if pair in self.ai_opened_trades:
                 self.print_color(f"⚠️  Position still exists after close, forcing removal...", self.Fore.RED)
-                del self.ai_opened_trades[pair]
+                self.ai_opened_trades.discard(pair)
             
             # 4. 🆕 ASK AI AGAIN BEFORE OPENING REVERSE POSITION
             self.print_color(f"🔍 Asking AI to confirm reverse position for {pair}...", self.Fore.BLUE)
@@ -817,6 +1062,24 @@ def close_trade_immediately(self, pair, trade, close_reason="AI_DECISION", parti
     """Close trade immediately at market price with AI reasoning"""
     try:
         current_price = self.get_current_price(pair)
+        if current_price is None:
+            self.print_color(f"🚫 Close of {pair} postponed: no live price for the PnL", self.Fore.RED)
+            return False
+        
+        # Reduce-only market order first - the ledger only changes once Binance has filled it
+        if self.binance:
+            close_side = 'SELL' if trade['direction'] == 'LONG' else 'BUY'
+            close_quantity = round(trade['quantity'] * partial_percent / 100, self.quantity_precision.get(pair, 3))
+            order = self.binance.futures_create_order(
+                symbol=pair,
+                side=close_side,
+                type='MARKET',
+                quantity=close_quantity,
+                reduceOnly=True
+            )
+            fill_price = float(order.get('avgPrice') or 0)
+            if fill_price > 0:
+                current_price = fill_price
         
         # Calculate PnL based on partial percentage
         if trade['direction'] == 'LONG':
@@ -824,42 +1087,25 @@ def close_trade_immediately(self, pair, trade, close_reason="AI_DECISION", parti
         else:
             pnl = (trade['entry_price'] - current_price) * trade['quantity'] * (partial_percent / 100)
         
-        # --- PEAK PnL CALCULATION (FIXED VERSION) ---
-        peak_pnl_pct = 0.0
-        if 'peak_pnl' in trade:
-            peak_pnl_pct = trade['peak_pnl']
-        else:
-            # Calculate peak from current close
-            if trade['direction'] == 'LONG':
-                peak_pnl_pct = ((current_price - trade['entry_price']) / trade['entry_price']) * 100 * trade['leverage']
-            else:
-                peak_pnl_pct = ((trade['entry_price'] - current_price) / trade['entry_price']) * 100 * trade['leverage']
-            peak_pnl_pct = max(0, peak_pnl_pct)  # At least 0
-        
         # If partial close, calculate the remaining position
         if partial_percent < 100:
-            # This is a partial close - update the existing trade
-            remaining_quantity = trade['quantity'] * (1 - partial_percent / 100)
-            closed_quantity = trade['quantity'] * (partial_percent / 100)
-            closed_position_size = trade['position_size_usd'] * (partial_percent / 100)
-            
-            # Update the existing trade with remaining quantity
-            trade['quantity'] = remaining_quantity
-            trade['position_size_usd'] = trade['position_size_usd'] * (1 - partial_percent / 100)
-            
-            # Add partial close to history
-            partial_trade = trade.copy()
-            partial_trade['status'] = 'PARTIAL_CLOSE'
-            partial_trade['exit_price'] = current_price
-            partial_trade['pnl'] = pnl
-            partial_trade['close_reason'] = close_reason
-            partial_trade['close_time'] = self.get_thailand_time()
-            partial_trade['partial_percent'] = partial_percent
-            partial_trade['closed_quantity'] = closed_quantity
-            partial_trade['closed_position_size'] = closed_position_size
-            partial_trade['peak_pnl_pct'] = round(peak_pnl_pct, 3)  # ✅ FIXED: Add peak_pnl_pct
-            
-            self.available_budget += closed_position_size + pnl
+            # This is a partial close - shrink the open position + credit budget atomically
+            closed = self.ai_opened_trades.partial_close(pair, partial_percent, pnl)
+            if closed is None:
+                self.print_color(f"❌ Partial close failed: no open position for {pair}", self.Fore.RED)
+                return False
+            closed_quantity, closed_position_size = closed
+            remaining_quantity = trade['quantity']
+            
+            # Add partial close to history (peak_pnl_pct is filled from the position's peak)
+            partial_trade = ClosedTrade.from_position(
+                trade, current_price, pnl, close_reason,
+                close_time=self.get_thailand_time(),
+                partial_percent=partial_percent,
+                closed_quantity=closed_quantity,
+                closed_position_size=closed_position_size
+            )
+            
             self.add_trade_to_history(partial_trade)
             
             pnl_color = self.Fore.GREEN if pnl > 0 else self.Fore.RED
@@ -869,25 +1115,20 @@ def close_trade_immediately(self, pair, trade, close_reason="AI_DECISION", parti
             return True
             
         else:
-            # Full close
+            # Full close - remove from active positions + credit margin and PnL atomically
+            self.ai_opened_trades.close(pair, pnl)
+            
             trade['status'] = 'CLOSED'
-            trade['exit_price'] = current_price
-            trade['pnl'] = pnl
-            trade['close_reason'] = close_reason
-            trade['close_time'] = self.get_thailand_time()
-            trade['partial_percent'] = 100  # Mark as full close
-            trade['peak_pnl_pct'] = round(peak_pnl_pct, 3)  # ✅ FIXED: Add peak_pnl_pct
+            closed_trade = ClosedTrade.from_position(
+                trade, current_price, pnl, close_reason,
+                close_time=self.get_thailand_time()
+            )
             
-            self.available_budget += trade['position_size_usd'] + pnl
-            self.add_trade_to_history(trade.copy())
+            self.add_trade_to_history(closed_trade)
             
             pnl_color = self.Fore.GREEN if pnl > 0 else self.Fore.RED
             self.print_color(f"✅ Full Close | {pair} | P&L: ${pnl:.2f} | Reason: {close_reason}", pnl_color)
             
-            # Remove from active positions after full closing
-            if pair in self.ai_opened_trades:
-                del self.ai_opened_trades[pair]
-            
             return True
             
     except Exception as e:
@@ -895,63 +1136,73 @@ def close_trade_immediately(self, pair, trade, close_reason="AI_DECISION", parti
         return False
 
 def get_current_price(self, pair):
-    """Get real price from Binance API (no mock prices)"""
-    max_retries = 3
-    retry_delay = 1
-    
-    for attempt in range(max_retries):
-        try:
-            # Try Binance Futures API first
-            if self.binance:
-                ticker = self.binance.futures_symbol_ticker(symbol=pair)
-                return float(ticker['price'])
-            
-            # Fallback to Binance Spot API (no authentication needed)
-            response = requests.get(
-                f'https://api.binance.com/api/v3/ticker/price?symbol={pair}',
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return float(data['price'])
-            else:
-                self.print_color(f"Binance API error: {response.status_code}", self.Fore.YELLOW)
-                
-        except Exception as e:
-            self.print_color(f"Price fetch attempt {attempt+1} failed: {e}", self.Fore.YELLOW)
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-                continue
-    
-    # Final fallback - use reasonable default based on pair
-    self.print_color(f"🚨 All price API attempts failed for {pair}, using fallback price", self.Fore.RED)
+    """
+    Live price from Binance through its circuit breaker (one attempt, no blind retries).
+    Fetch failed / breaker open → last live price if younger than price_max_age, else None -
+    callers refuse to trade or close on a missing price instead of using a made-up one.
+    Orchestrated → one ticker request per pair per MARKET_PRICE_TTL for all traders.
+    """
+    market_cache = getattr(self, 'market_cache', None)
+    if market_cache is not None:
+        return market_cache.get(("price", pair), lambda: self._fetch_current_price(pair), market_cache.price_ttl)
+    return self._fetch_current_price(pair)
+
+def _fetch_current_price(self, pair):
+    try:
+        if self.market_client:
+            # Binance Futures API first
+            price = float(self.get_breaker("binance").call(self.market_client.futures_symbol_ticker, symbol=pair)['price'])
+        else:
+            # Binance Spot API (no authentication needed)
+            response = self.get_breaker("binance_public").call(
+                requests.get, f'https://api.binance.com/api/v3/ticker/price?symbol={pair}', timeout=10)
+            response.raise_for_status()
+            price = float(response.json()['price'])
+        self.last_prices[pair] = (price, self.clock.time())
+        return price
+    except CircuitOpenError as e:
+        reason = str(e)
+    except Exception as e:
+        reason = f"price fetch failed: {e}"
     
-    fallback_prices = {
-        "SOLUSDT": 140.0,
-    }
-    return fallback_prices.get(pair, 100.0)
+    cached = self.last_prices.get(pair)
+    if cached is not None and self.clock.time() - cached[1] <= self.price_max_age:
+        return cached[0]
+    self.print_color(f"🚨 No live price for {pair} ({reason}) - trading on it refused", self.Fore.RED, sample=10)
+    return None
 
+@timed("get_price_history")
 def get_price_history(self, pair, limit=50):
-    """Multi-Timeframe Analysis with REAL Binance data"""
+    """Multi-Timeframe Analysis with REAL Binance data (orchestrated → one klines fetch per pair per MARKET_CACHE_TTL)"""
+    market_cache = getattr(self, 'market_cache', None)
+    if market_cache is None:
+        return self._fetch_price_history(pair, limit)
+    market_data = market_cache.get(("mtf", pair, limit), lambda: self._fetch_price_history(pair, limit))
+    if not market_data.get('mtf_analysis'):
+        return market_data  # no MTF (simulation fetch failed) - stays price-less so callers HOLD
+    # Trends can be a minute old, the price can't - price cache has its own (shorter) TTL
+    return dict(market_data, current_price=self.get_current_price(pair))
+
+def _fetch_price_history(self, pair, limit=50):
     try:
         # If no Binance client, use spot API for paper trading
-        if not self.binance:
-            return self._get_mtf_data_via_api(pair, limit)
+        if not self.market_client:
+            return self._mtf_fallback(pair, limit, "no market client")
         
         intervals = {
-            '5m': (Client.KLINE_INTERVAL_5MINUTE, 50),
-            '15m': (Client.KLINE_INTERVAL_15MINUTE, 50),
-            '1h': (Client.KLINE_INTERVAL_1HOUR, 50),
-            '4h': (Client.KLINE_INTERVAL_4HOUR, 30),
-            '1d': (Client.KLINE_INTERVAL_1DAY, 30)
+            '5m': ('5m', 50),
+            '15m': ('15m', 50),
+            '1h': ('1h', 50),
+            '4h': ('4h', 30),
+            '1d': ('1d', 30)
         }
 
         mtf = {}
         current_price = self.get_current_price(pair)
 
+        breaker = self.get_breaker("binance")
         for name, (interval, lim) in intervals.items():
-            klines = self.binance.futures_klines(symbol=pair, interval=interval, limit=lim)
+            klines = breaker.call(self.market_client.futures_klines, symbol=pair, interval=interval, limit=lim)
             if not klines:
                 continue
 
@@ -972,6 +1223,7 @@ def get_price_history(self, pair, limit=50):
                     crossover = 'DEATH'
 
             vol_spike = self.calculate_volume_spike(volumes)
+            atr_percent = self.calculate_atr_percent(highs, lows, closes)
 
             mtf[name] = {
                 'current_price': closes[-1],
@@ -982,22 +1234,42 @@ def get_price_history(self, pair, limit=50):
                 'crossover': crossover,
                 'rsi': round(rsi, 1),
                 'vol_spike': vol_spike,
+                'atr_percent': round(atr_percent, 3),
                 'support': round(min(lows[-10:]), 6),
                 'resistance': round(max(highs[-10:]), 6)
             }
 
         main = mtf.get('1h', {})
-        return {
+        market_data = {
             'current_price': current_price,
             'price_change': main.get('change_1h', 0),
             'support_levels': [mtf['1h']['support'], mtf['4h']['support']] if '4h' in mtf else [],
             'resistance_levels': [mtf['1h']['resistance'], mtf['4h']['resistance']] if '4h' in mtf else [],
             'mtf_analysis': mtf
         }
-
+        self.last_market_data[pair] = market_data
+        return market_data
+
+    except CircuitOpenError as e:
+        # Binance futures down - last good MTF (trends move slowly) with whatever live price there is
+        cached = self.last_market_data.get(pair)
+        if cached is not None:
+            self.print_color(f"⛔ {e} - cached MTF for {pair}", self.Fore.YELLOW, sample=10)
+            return dict(cached, current_price=self.get_current_price(pair))
+        return self._mtf_fallback(pair, limit, str(e))
     except Exception as e:
         self.print_color(f"MTF Analysis error: {e}", self.Fore.RED)
-        return self._get_mtf_data_via_api(pair, limit)  # Fallback to API
+        return self._mtf_fallback(pair, limit, str(e))  # Fallback to API
+
+def _mtf_fallback(self, pair, limit, reason):
+    """
+    Futures path failed → Binance public spot API. Never under FAKE_EXCHANGE_KLINES: a replay
+    must not quietly mix live network data in - the pair gets no MTF and no price (→ HOLD).
+    """
+    if os.getenv('FAKE_EXCHANGE_KLINES'):
+        self.print_color(f"⚠️ {pair}: no MTF data in simulation ({reason}) - pair skipped, no network fallback", self.Fore.YELLOW, sample=10)
+        return {'current_price': None, 'price_change': 0, 'support_levels': [], 'resistance_levels': [], 'mtf_analysis': {}}
+    return self._get_mtf_data_via_api(pair, limit)
 
 def _get_mtf_data_via_api(self, pair, limit=50):
     """Get MTF data using Binance public API"""
@@ -1021,7 +1293,7 @@ def _get_mtf_data_via_api(self, pair, limit=50):
                 'limit': limit
             }
             
-            response = requests.get(url, params=params, timeout=15)
+            response = self.get_breaker("binance_public").call(requests.get, url, params=params, timeout=15)
             if response.status_code == 200:
                 klines = response.json()
                 
@@ -1043,6 +1315,7 @@ def _get_mtf_data_via_api(self, pair, limit=50):
                         crossover = 'DEATH'
                 
                 vol_spike = self.calculate_volume_spike(volumes)
+                atr_percent = self.calculate_atr_percent(highs, lows, closes)
                 
                 mtf[name] = {
                     'current_price': closes[-1],
@@ -1053,6 +1326,7 @@ def _get_mtf_data_via_api(self, pair, limit=50):
                     'crossover': crossover,
                     'rsi': round(rsi, 1),
                     'vol_spike': vol_spike,
+                    'atr_percent': round(atr_percent, 3),
                     'support': round(min(lows[-10:]), 6),
                     'resistance': round(max(highs[-10:]), 6)
                 }
@@ -1090,12 +1364,18 @@ def calculate_quantity(self, pair, entry_price, position_size_usd, leverage):
         # Calculate quantity
         quantity = notional_value / entry_price
         
-        # Apply precision
-        precision = self.quantity_precision.get(pair, 3)
-        quantity = round(quantity, precision)
+        # Apply precision (cached LOT_SIZE step → round down so notional never exceeds the budget)
+        meta = self.symbol_meta.get(pair)
+        if meta and meta["step_size"] > 0:
+            quantity = round(math.floor(quantity / meta["step_size"] + 1e-9) * meta["step_size"], meta["qty_precision"])
+        else:
+            quantity = round(quantity, self.quantity_precision.get(pair, 3))
         
         if quantity <= 0:
             return None
+        if meta and quantity * entry_price < meta["min_notional"]:
+            self.print_color(f"🚫 {pair} notional ${quantity * entry_price:.2f} below exchange minimum ${meta['min_notional']:.2f}", self.Fore.YELLOW)
+            return None
             
         self.print_color(f"📊 Position: ${position_size_usd} | Leverage: {leverage}x | Notional: ${notional_value:.2f} | Quantity: {quantity}", self.Fore.CYAN)
         return quantity
@@ -1104,16 +1384,39 @@ def calculate_quantity(self, pair, entry_price, position_size_usd, leverage):
         self.print_color(f"Quantity calculation failed: {e}", self.Fore.RED)
         return None
 
+def scan_universe(self, pinned=(), current=()):
+    """Top-N pairs from the market-wide scan (+ pinned open positions); None when disabled or the scan failed"""
+    if not self.universe.enabled:
+        return None
+    try:
+        pairs = self.universe.select(self.market_client or PublicFuturesREST(), pinned, current)
+    except Exception as e:
+        self.print_color(f"Universe scan failed: {e}", self.Fore.YELLOW)
+        return None
+    return pairs or None
+
+def refresh_universe(self):
+    """Swap available_pairs in place (symbol-meta refresher holds the same list); new pairs get precision + leverage setup"""
+    pairs = self.scan_universe(self.ai_opened_trades.pairs(), self.available_pairs)
+    if pairs is None or pairs == self.available_pairs:
+        return
+    added = [pair for pair in pairs if pair not in self.symbol_meta.symbols]
+    self.available_pairs[:] = pairs
+    ranking = {row["symbol"]: row for row in self.universe.last_ranking}
+    self.print_color(f"🌐 UNIVERSE: {', '.join(pairs)}", self.Fore.BLUE + self.Style.BRIGHT)
+    for pair in pairs:
+        row = ranking.get(pair)
+        if row:
+            self.print_color(f"   {pair:<14} score {row['score']:.2f} | vol ${row['quote_volume'] / 1e6:,.0f}M | ATR {row['atr_percent']:.2f}% | trend {row['trend']:.2f}", self.Fore.WHITE, level=logging.DEBUG)
+    if added and self.binance:
+        self.load_symbol_precision()
+        self.setup_futures(added)
+
 def can_open_new_position(self, pair, position_size_usd):
     """Check if new position can be opened"""
-    if pair in self.ai_opened_trades:
-        return False, "Position already exists"
-    
-    if len(self.ai_opened_trades) >= self.max_concurrent_trades:
-        return False, f"Max concurrent trades reached ({self.max_concurrent_trades})"
-        
-    if position_size_usd > self.available_budget:
-        return False, f"Insufficient budget: ${position_size_usd:.2f} > ${self.available_budget:.2f}"
+    ok, reason = self.ai_opened_trades.can_open(pair, position_size_usd)
+    if not ok:
+        return False, reason
         
     max_allowed = self.total_budget * self.max_position_size_percent / 100
     if position_size_usd > max_allowed:
@@ -1121,10 +1424,65 @@ def can_open_new_position(self, pair, position_size_usd):
         
     return True, "OK"
 
-def get_ai_decision_with_learning(self, pair, market_data):
-    """Get AI decision enhanced with learned lessons"""
+def prefilter_decision(self, pair, market_data, position_direction=None):
+    """Deterministic gate before the LLM: HOLD decision when no setup is possible, None → ask the LLM"""
+    if not self.prefilter_enabled:
+        return None
+    result = prefilter.screen(market_data.get('mtf_analysis', {}), position_direction)
+    self.prefilter_stats[result["reason"]] = self.prefilter_stats.get(result["reason"], 0) + 1
+    metrics = getattr(self, 'metrics', None)
+    if metrics is not None:
+        metrics.inc("prefilter_total", reason=result["reason"])
+    if result["passed"]:
+        return None
+    self.print_color(f"⏭️ {pair}: {result['detail']} - LLM skipped ({result['reason']})", self.Fore.WHITE, level=logging.DEBUG)
+    return {
+        "decision": "HOLD",
+        "position_size_usd": 0,
+        "entry_price": market_data.get('current_price', 0),
+        "leverage": 5,
+        "confidence": 0,
+        "reasoning": f"Prefilter: {result['detail']}",
+        "should_reverse": False,
+        "prefilter": result["reason"]
+    }
+
+def get_ai_decision_with_learning(self, pair, market_data, position=False):
+    """
+    Get AI decision enhanced with learned lessons.
+    position = open trade on this pair from the real or paper ledger (False → look up the real ledger);
+    it goes into the prompt so a reverse_candidate pass can actually be judged.
+    """
+    if market_data.get('current_price') is None:
+        return self.no_price_decision(pair)
+    if position is False:
+        position = self.ai_opened_trades.get(pair)
+    skipped = self.prefilter_decision(pair, market_data, position['direction'] if position is not None else None)
+    if skipped is not None:
+        skipped["pair"] = pair
+        return skipped
+    
     # First get normal AI decision
-    ai_decision = self.get_ai_trading_decision(pair, market_data)
+    ai_decision = self.get_ai_trading_decision(pair, market_data, position)
+    return self.apply_learning(pair, market_data, ai_decision)
+
+def no_price_decision(self, pair):
+    """HOLD when there is no live price (breaker open / fetch failed) - never trade on a made-up one"""
+    return {
+        "decision": "HOLD",
+        "position_size_usd": 0,
+        "entry_price": None,
+        "leverage": 5,
+        "confidence": 0,
+        "reasoning": "No live price - trading refused",
+        "should_reverse": False,
+        "pair": pair
+    }
+
+def apply_learning(self, pair, market_data, ai_decision):
+    """Learned-mistake filter + reasoning note on top of an LLM decision"""
+    ai_decision["pair"] = pair
+    ai_decision["market_context"] = market_context(market_data, now=self.clock.time())
     
     # Check if this matches known mistake patterns
     if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'should_avoid_trade') and self.should_avoid_trade(ai_decision, market_data):
@@ -1140,12 +1498,42 @@ def get_ai_decision_with_learning(self, pair, market_data):
         }
     
     # Add learning context to reasoning
-    if ai_decision["decision"] != "HOLD" and LEARN_SCRIPT_AVAILABLE and hasattr(self, 'mistakes_history'):
-        learning_context = f" | Applying lessons from {len(self.mistakes_history)} past mistakes"
+    if ai_decision["decision"] != "HOLD" and LEARN_SCRIPT_AVAILABLE and hasattr(self, 'learning_memory'):
+        learning_context = f" | Applying lessons from {self.total_mistakes} past mistakes"
         ai_decision["reasoning"] += learning_context
     
     return ai_decision
 
+def get_ai_decisions_with_learning(self, pairs, positions, budget_usd):
+    """
+    Batch mode (LLM_BATCH=1): market data + prefilter for every pair, then ONE LLM request for the
+    pairs that passed (a lone survivor takes the normal per-pair request).
+    positions = real or paper ledger. Returns {pair: (market_data, decision)}.
+    """
+    market = {pair: self.get_price_history(pair) for pair in pairs}
+    decisions, asked = {}, []
+    for pair, market_data in market.items():
+        if market_data.get('current_price') is None:
+            decisions[pair] = self.no_price_decision(pair)
+            continue
+        position = positions.get(pair)
+        skipped = self.prefilter_decision(pair, market_data, position['direction'] if position is not None else None)
+        if skipped is not None:
+            skipped["pair"] = pair
+            decisions[pair] = skipped
+        else:
+            asked.append((pair, market_data, position))
+    
+    if len(asked) == 1:
+        pair, market_data, position = asked[0]
+        decisions[pair] = self.get_ai_trading_decision(pair, market_data, position)
+    elif asked:
+        decisions.update(self.get_ai_batch_trading_decision(asked, budget_usd))
+    for pair, market_data, _ in asked:
+        decisions[pair] = self.apply_learning(pair, market_data, decisions[pair])
+    return {pair: (market[pair], decisions[pair]) for pair in pairs}
+
+@timed("execute_ai_trade")
 def execute_ai_trade(self, pair, ai_decision):
     """Execute trade WITHOUT TP/SL orders - AI will close manually"""
     try:
@@ -1169,24 +1557,27 @@ def execute_ai_trade(self, pair, ai_decision):
             self.print_color(f"🟡 DeepSeek decides to HOLD {pair}", self.Fore.YELLOW)
             return False
         
-        # Check if we can open position (skip if reversing)
-        if pair in self.ai_opened_trades and not decision.startswith('REVERSE_'):
-            self.print_color(f"🚫 Cannot open {pair}: Position already exists", self.Fore.RED)
+        if not entry_price or entry_price <= 0:
+            self.print_color(f"🚫 Cannot open {pair}: no live price", self.Fore.RED)
             return False
         
-        if len(self.ai_opened_trades) >= self.max_concurrent_trades and pair not in self.ai_opened_trades:
-            self.print_color(f"🚫 Cannot open {pair}: Max concurrent trades reached", self.Fore.RED)
-            return False
-            
-        if position_size_usd > self.available_budget:
-            self.print_color(f"🚫 Cannot open {pair}: Insufficient budget", self.Fore.RED)
-            return False
+        # Exchange leverage cap (cached leverage bracket)
+        max_leverage = (self.symbol_meta.get(pair) or {}).get("max_leverage")
+        if max_leverage and leverage > max_leverage:
+            self.print_color(f"⚠️ {pair} leverage {leverage}x capped at exchange max {max_leverage}x", self.Fore.YELLOW)
+            leverage = max_leverage
         
         # Calculate quantity
         quantity = self.calculate_quantity(pair, entry_price, position_size_usd, leverage)
         if quantity is None:
             return False
         
+        # Check + reserve budget in one step (position exists / max trades / budget)
+        reserved, reason = self.ai_opened_trades.reserve(pair, position_size_usd)
+        if not reserved:
+            self.print_color(f"🚫 Cannot open {pair}: {reason}", self.Fore.RED)
+            return False
+        
         # Display AI trade decision (NO TP/SL)
         direction_color = self.Fore.GREEN + self.Style.BRIGHT if decision == 'LONG' else self.Fore.RED + self.Style.BRIGHT
         direction_icon = "🟢 LONG" if decision == 'LONG' else "🔴 SHORT"
@@ -1214,33 +1605,30 @@ def execute_ai_trade(self, pair, ai_decision):
                 self.print_color(f"Leverage change failed: {e}", self.Fore.YELLOW)
             
             # Execute order ONLY - no TP/SL orders
-            order = self.binance.futures_create_order(
-                symbol=pair,
-                side=entry_side,
-                type='MARKET',
-                quantity=quantity
-            )
+            try:
+                order = self.binance.futures_create_order(
+                    symbol=pair,
+                    side=entry_side,
+                    type='MARKET',
+                    quantity=quantity
+                )
+            except Exception:
+                self.ai_opened_trades.release(pair)
+                raise
             
             # ❌❌❌ NO TP/SL ORDERS CREATED ❌❌❌
         
-        # Update budget and track trade
-        self.available_budget -= position_size_usd
-        
-        self.ai_opened_trades[pair] = {
-            "pair": pair,
-            "direction": decision,
-            "entry_price": entry_price,
-            "quantity": quantity,
-            "position_size_usd": position_size_usd,
-            "leverage": leverage,
-            "entry_time": time.time(),
-            "status": 'ACTIVE',
-            'ai_confidence': confidence,
-            'ai_reasoning': reasoning,
-            'entry_time_th': self.get_thailand_time(),
-            'has_tp_sl': False,  # NEW: Mark as no TP/SL
-            'peak_pnl': 0  # NEW: For 3-layer system
-        }
+        # Budget already reserved → track trade
+        self.ai_opened_trades.commit(pair, Position(
+            pair, decision, entry_price, quantity, position_size_usd, leverage,
+            entry_time=self.clock.time(),
+            entry_time_th=self.get_thailand_time(),
+            ai_confidence=confidence,
+            ai_reasoning=reasoning,
+            entry_context=ai_decision.get("market_context"),
+            has_tp_sl=False,  # NEW: Mark as no TP/SL
+            peak_pnl=0  # For 3-layer system
+        ))
         
         self.print_color(f"✅ TRADE EXECUTED (BOUNCE-PROOF V2): {pair} {decision} | Leverage: {leverage}x", self.Fore.GREEN + self.Style.BRIGHT)
         self.print_color(f"📊 AI will monitor with Bounce-Proof 3-Layer Exit System", self.Fore.BLUE)
@@ -1250,113 +1638,45 @@ def execute_ai_trade(self, pair, ai_decision):
         self.print_color(f"❌ Trade execution failed: {e}", self.Fore.RED)
         return False
 
+def get_atr_14(self, pair):
+    """1H ATR(14) in price units - trailing rule လိုမှပဲ klines ဆွဲ"""
+    if not self.market_client:
+        return None
+    klines = self.market_client.futures_klines(symbol=pair, interval='1h', limit=50)
+    if len(klines) < 15:
+        return None
+    highs = [float(k[2]) for k in klines]
+    lows = [float(k[3]) for k in klines]
+    closes = [float(k[4]) for k in klines]
+    tr = [max(highs[i]-lows[i], abs(highs[i]-closes[i-1]), abs(lows[i]-closes[i-1])) for i in range(1, len(klines))]
+    return sum(tr[-14:]) / 14
+
 def get_ai_close_decision_v2(self, pair, trade):
-    """BOUNCE-PROOF 3-LAYER EXIT V2 – အမြတ်ပြန်မပေးရအောင် အပြတ်ပိတ်"""
+    """BOUNCE-PROOF 3-LAYER EXIT V2 – အမြတ်ပြန်မပေးရအောင် အပြတ်ပိတ် (rules: should_close_trade)"""
     try:
         current_price = self.get_current_price(pair)
-        current_pnl = self.calculate_current_pnl(trade, current_price)
-        
-        # Peak PnL tracking
-        if 'peak_pnl' not in trade:
-            trade['peak_pnl'] = current_pnl
-        if current_pnl > trade['peak_pnl']:
-            trade['peak_pnl'] = current_pnl
-        
-        peak = trade['peak_pnl']
-
-        # 1. Hard stop -5% က ဘယ်လိုမှ မလွတ်
-        if current_pnl <= -5.0:
-            return {
-                "should_close": True, 
-                "close_type": "STOP_LOSS", 
-                "close_reason": "Hard -5% rule", 
-                "confidence": 100,
-                "partial_percent": 100
-            }
-
-        # 2. 60% Partial @ +9%
-        if peak >= 9.0 and not trade.get('partial_done', False):
-            trade['partial_done'] = True
-            return {
-                "should_close": True,
-                "partial_percent": 60,
-                "close_type": "PARTIAL_60",
-                "reason": f"LOCK 60% PROFIT @ +{peak:.1f}% → အမြတ် ချက်ချင်း အိတ်ထဲ!",
-                "confidence": 100
-            }
-
-        # 3. Instant Breakeven @ +12%
-        if peak >= 12.0 and not trade.get('breakeven_done', False):
-            trade['breakeven_done'] = True
-            return {
-                "should_close": False,
-                "move_sl_to": trade['entry_price'],
-                "close_type": "BREAKEVEN_ACTIVATED", 
-                "reason": f"Peak +{peak:.1f}% → ကျန် 40% ကို BREAKEVEN ချပြီး → ဘယ်လိုမှ မရှုံးနိုင်တော့ဘူး!",
-                "confidence": 100
-            }
-
-        # 4. Dynamic Profit Floor (75% of Peak)
-        if peak >= 15.0:
-            profit_floor = peak * 0.75
-            if current_pnl <= profit_floor and trade.get('partial_done', False):
-                return {
-                    "should_close": True,
-                    "partial_percent": 100,
-                    "close_type": "PROFIT_FLOOR_HIT",
-                    "reason": f"Peak {peak:.1f}% → 75% floor ({profit_floor:.1f}%) ထိပြီး → ကျန်အကုန် အမြတ်နဲ့ ပိတ်!",
-                    "confidence": 100
-                }
-
-        # 5. 2×ATR Trailing
-        if trade.get('partial_done', False) and peak >= 9.0:
-            atr_14 = 0.001
-            try:
-                if self.binance:
-                    klines = self.binance.futures_klines(symbol=pair, interval='1h', limit=50)
-                    if len(klines) >= 15:
-                        highs = [float(k[2]) for k in klines]
-                        lows = [float(k[3]) for k in klines]
-                        closes = [float(k[4]) for k in klines]
-                        tr = [max(highs[i]-lows[i], abs(highs[i]-closes[i-1]), abs(lows[i]-closes[i-1])) for i in range(1, len(klines))]
-                        atr_14 = sum(tr[-14:]) / 14
-            except: pass
-            
-            trail_price = current_price + (2 * atr_14) if trade['direction'] == 'LONG' else current_price - (2 * atr_14)
-            if trade['direction'] == 'LONG' and current_price <= trail_price:
-                return {
-                    "should_close": True, 
-                    "partial_percent": 100, 
-                    "close_type": "TRAILING_HIT", 
-                    "reason": "2×ATR Trailing ထိပြီး ထွက်",
-                    "confidence": 95
-                }
-            if trade['direction'] == 'SHORT' and current_price >= trail_price:
-                return {
-                    "should_close": True, 
-                    "partial_percent": 100, 
-                    "close_type": "TRAILING_HIT", 
-                    "reason": "2×ATR Trailing ထိပြီး ထွက်",
-                    "confidence": 95
-                }
-
-        return {"should_close": False}
-
+        if current_price is None:
+            return {"should_close": False}
+        return should_close_trade(trade, current_price, lambda: self.get_atr_14(pair))
     except Exception as e:
         return {"should_close": False}
 
+@timed("monitor_positions")
 def monitor_positions(self):
     """Monitor positions and ask AI when to close (3-LAYER SYSTEM)"""
     try:
         closed_trades = []
-        for pair, trade in list(self.ai_opened_trades.items()):
+        for pair, trade in self.ai_opened_trades.items():
             if trade['status'] != 'ACTIVE':
                 continue
             
             # NEW: Ask AI whether to close this position using 3-Layer system
             if not trade.get('has_tp_sl', True):
-                self.print_color(f"🔍 Bounce-Proof V2 Checking {pair}...", self.Fore.BLUE)
+                self.print_color(f"🔍 Bounce-Proof V2 Checking {pair}...", self.Fore.BLUE, sample=10)
                 close_decision = self.get_ai_close_decision_v2(pair, trade)
+                self.ai_opened_trades.record_peak(pair)
+                if close_decision.get("close_type"):
+                    self.metrics.inc("exit_rule_hits_total", close_type=close_decision["close_type"], mode="live")
                 
                 if close_decision.get("should_close", False):
                     close_type = close_decision.get("close_type", "AI_DECISION")
@@ -1376,6 +1696,9 @@ def monitor_positions(self):
                     if success and partial_percent == 100:  # Only count as closed if full close
                         closed_trades.append(pair)
                 else:
+                    if close_decision.get('close_type') == 'BREAKEVEN_ACTIVATED':
+                        self.ai_opened_trades.mark('BREAKEVEN', pair, breakeven_done=True, peak_pnl=trade['peak_pnl'])
+                    
                     # Show 3-Layer system's decision to hold with reasoning
                     if close_decision.get('confidence', 0) > 0:
                         reasoning = close_decision.get('reasoning', 'No reason provided')
@@ -1407,8 +1730,8 @@ def display_dashboard(self):
         self.print_color("   " + "-" * 60, self.Fore.CYAN)
     
     # 🧠 Add learning stats
-    if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'mistakes_history'):
-        total_lessons = len(self.mistakes_history)
+    if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'learning_memory'):
+        total_lessons = self.total_mistakes
         if total_lessons > 0:
             self.print_color(f"🧠 AI HAS LEARNED FROM {total_lessons} MISTAKES", self.Fore.MAGENTA + self.Style.BRIGHT)
     
@@ -1421,6 +1744,9 @@ def display_dashboard(self):
             current_price = self.get_current_price(pair)
             
             direction_icon = "🟢 LONG" if trade['direction'] == 'LONG' else "🔴 SHORT"
+            if current_price is None:
+                self.print_color(f"{direction_icon} {pair} | Entry: ${trade['entry_price']:.4f} | Current: unavailable", self.Fore.WHITE)
+                continue
             
             if trade['direction'] == 'LONG':
                 unrealized_pnl = (current_price - trade['entry_price']) * trade['quantity']
@@ -1437,6 +1763,7 @@ def display_dashboard(self):
             self.print_color(f"   🎯 BOUNCE-PROOF V2 EXIT ACTIVE", self.Fore.YELLOW)
             self.print_color("   " + "-" * 60, self.Fore.CYAN)
     
+    self.metrics.set("unrealized_pnl_usd", total_unrealized)
     if active_count == 0:
         self.print_color("No active positions", self.Fore.YELLOW)
     else:
@@ -1494,21 +1821,43 @@ def show_trading_stats(self):
     self.print_color(f"Average P&L per Trade: ${avg_trade:.2f}", self.Fore.WHITE)
     self.print_color(f"Available Budget: ${self.available_budget:.2f}", self.Fore.CYAN + self.Style.BRIGHT)
 
+def show_prefilter_stats(self):
+    """How many pair checks reached the LLM vs were gated (and why)"""
+    if not self.prefilter_stats:
+        return
+    passed = sum(n for reason, n in self.prefilter_stats.items() if reason in ("setup", "reverse_candidate"))
+    skipped = ", ".join(f"{reason} {n}" for reason, n in sorted(self.prefilter_stats.items()) if reason not in ("setup", "reverse_candidate"))
+    self.print_color(f"🚦 LLM PREFILTER: {passed} sent | skipped: {skipped or '-'}", self.Fore.BLUE)
+
+def show_latency_stats(self):
+    """Per-stage cycle latency (current sample window)"""
+    lines = self.latency.summary_lines() if getattr(self, 'latency', None) else []
+    router = getattr(self, 'llm_router', None)
+    if router is not None:
+        lines += router.summary_lines()
+    lines += [b.summary_line() for b in getattr(self, 'breakers', {}).values()]
+    if not lines:
+        return
+    self.print_color(f"\n⏱️ STAGE LATENCY", self.Fore.BLUE + self.Style.BRIGHT)
+    self.print_color("=" * 60, self.Fore.BLUE)
+    for line in lines:
+        self.print_color(f"   {line}", self.Fore.WHITE)
+
 def show_advanced_learning_progress(self):
     """Display learning progress every 3 cycles"""
-    if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'mistakes_history'):
-        total_lessons = len(self.mistakes_history)
+    if LEARN_SCRIPT_AVAILABLE and hasattr(self, 'learning_memory'):
+        total_lessons = self.total_mistakes
         if total_lessons > 0:
             self.print_color(f"\n🧠 AI LEARNING PROGRESS (Cycle {getattr(self, 'cycle_count', 0)})", self.Fore.MAGENTA + self.Style.BRIGHT)
             self.print_color("=" * 50, self.Fore.MAGENTA)
             self.print_color(f"📚 Total Lessons Learned: {total_lessons}", self.Fore.CYAN)
             
             # Show recent mistakes patterns
-            recent_mistakes = self.mistakes_history[-5:] if len(self.mistakes_history) >= 5 else self.mistakes_history
+            recent_mistakes = list(self.mistakes_history)[-5:]
             if recent_mistakes:
                 self.print_color(f"🔄 Recent Patterns:", self.Fore.YELLOW)
                 for i, mistake in enumerate(reversed(recent_mistakes)):
-                    reason = mistake.get('reason', 'Unknown pattern')
+                    reason = mistake.get('mistake_type', 'Unknown pattern')
                     self.print_color(f"   {i+1}. {reason}", self.Fore.WHITE)
             
             # Show improvement stats
@@ -1527,6 +1876,7 @@ def show_advanced_learning_progress(self):
     else:
         self.print_color(f"\n🧠 Learning module not available", self.Fore.YELLOW)
 
+@timed("trading_cycle")
 def run_trading_cycle(self):
     """Run trading cycle with REVERSE position checking and 3-LAYER EXIT"""
     try:
@@ -1538,21 +1888,34 @@ def run_trading_cycle(self):
         if hasattr(self, 'cycle_count') and self.cycle_count % 4 == 0:  # Every 4 cycles (5 minutes)
             self.show_trade_history(8)
             self.show_trading_stats()
+            self.show_latency_stats()
+            self.show_prefilter_stats()
         
         # 🧠 Show advanced learning progress every 3 cycles
         if hasattr(self, 'cycle_count') and self.cycle_count % 3 == 0 and LEARN_SCRIPT_AVAILABLE:
             self.show_advanced_learning_progress()
         
+        # Market-wide shortlist first - only these pairs reach the LLM
+        self.refresh_universe()
         self.print_color(f"\n🔍 DEEPSEEK SCANNING {len(self.available_pairs)} PAIRS...", self.Fore.BLUE + self.Style.BRIGHT)
         
+        # LLM_BATCH=1 → every shortlisted pair decided in one LLM request up front
+        batch = {}
+        if self.llm_batch and self.available_budget > 100:
+            batch = self.get_ai_decisions_with_learning(self.available_pairs, self.ai_opened_trades, self.available_budget)
+        
         qualified_signals = 0
         for pair in self.available_pairs:
             if self.available_budget > 100:
-                market_data = self.get_price_history(pair)
-                self.last_mtf = market_data.get('mtf_analysis', {})
-                
-                # Use learning-enhanced AI decision
-                ai_decision = self.get_ai_decision_with_learning(pair, market_data)
+                if pair in batch:
+                    market_data, ai_decision = batch[pair]
+                    self.last_mtf = market_data.get('mtf_analysis', {})
+                else:
+                    market_data = self.get_price_history(pair)
+                    self.last_mtf = market_data.get('mtf_analysis', {})
+                    
+                    # Use learning-enhanced AI decision
+                    ai_decision = self.get_ai_decision_with_learning(pair, market_data)
                 
                 if ai_decision["decision"] != "HOLD" and ai_decision["position_size_usd"] > 0:
                     qualified_signals += 1
@@ -1566,10 +1929,10 @@ def run_trading_cycle(self):
                     
                     success = self.execute_ai_trade(pair, ai_decision)
                     if success:
-                        time.sleep(2)  # Reduced delay for faster 3min cycles
+                        self.pause(2)  # Reduced delay for faster 3min cycles
             
         if qualified_signals == 0:
-            self.print_color("No qualified DeepSeek signals this cycle", self.Fore.YELLOW)
+            self.print_color("No qualified DeepSeek signals this cycle", self.Fore.YELLOW, sample=10)
             
     except Exception as e:
         self.print_color(f"Trading cycle error: {e}", self.Fore.RED)
@@ -1589,44 +1952,51 @@ def start_trading(self):
     while True:
         try:
             self.cycle_count += 1
+            self.metrics.inc("cycles_total", mode="live")
             self.print_color(f"\n🔄 TRADING CYCLE {self.cycle_count} (BOUNCE-PROOF V2)", self.Fore.CYAN + self.Style.BRIGHT)
             self.print_color("=" * 60, self.Fore.CYAN)
             self.run_trading_cycle()
             self.print_color(f"⏳ Next Bounce-Proof V2 analysis in 3 minute...", self.Fore.BLUE)
-            time.sleep(self.monitoring_interval)  # 3 minute
+            self.clock.sleep(self.monitoring_interval)  # 3 minute
             
         except KeyboardInterrupt:
             self.print_color(f"\n🛑 TRADING STOPPED", self.Fore.RED + self.Style.BRIGHT)
             self.show_trade_history(15)
             self.show_trading_stats()
+            self.show_latency_stats()
+            self.show_prefilter_stats()
             break
         except Exception as e:
             self.print_color(f"Main loop error: {e}", self.Fore.RED)
-            time.sleep(self.monitoring_interval)
+            self.clock.sleep(self.monitoring_interval)
 
 # Add all methods to the class including MTF indicators
 methods = [
     load_real_trade_history, save_real_trade_history, add_trade_to_history,
-    get_thailand_time, print_color, validate_config, setup_futures,
-    load_symbol_precision, get_market_news_sentiment, get_ai_trading_decision,
-    parse_ai_trading_decision, get_improved_fallback_decision, calculate_current_pnl,
-    execute_reverse_position, close_trade_immediately, get_price_history,
-    get_current_price, calculate_quantity, can_open_new_position,
-    get_ai_decision_with_learning, execute_ai_trade, get_ai_close_decision_v2,
-    monitor_positions, display_dashboard, show_trade_history, show_trading_stats,
-    run_trading_cycle, start_trading, show_advanced_learning_progress,
+    state_path, pause, get_thailand_time, print_color, validate_config, setup_futures, run_startup_calls, apply_symbol_meta,
+    load_symbol_precision, get_llm_router, get_breaker, scan_universe, refresh_universe, prefilter_decision, show_prefilter_stats, get_market_news_sentiment, get_ai_trading_decision,
+    get_ai_batch_trading_decision, parse_ai_batch_decision, parse_ai_trading_decision, get_improved_fallback_decision, calculate_current_pnl,
+    execute_reverse_position, close_trade_immediately, get_price_history, _fetch_price_history, _mtf_fallback,
+    get_current_price, _fetch_current_price, calculate_quantity, can_open_new_position,
+    get_ai_decision_with_learning, no_price_decision, apply_learning, get_ai_decisions_with_learning, execute_ai_trade, get_atr_14, get_ai_close_decision_v2,
+    monitor_positions, display_dashboard, show_trade_history, show_trading_stats, show_latency_stats,
+    run_trading_cycle, start_trading, show_advanced_learning_progress, recover_positions,
     # Add MTF indicator methods
-    calculate_ema, calculate_rsi, calculate_volume_spike, _get_mtf_data_via_api,
+    calculate_ema, calculate_rsi, calculate_volume_spike, calculate_atr_percent, _get_mtf_data_via_api,
     validate_api_keys
 ]
 
 for method in methods:
     setattr(FullyAutonomous1HourAITrader, method.__name__, method)
 
+# Budget lives in the position ledger - read-only view for prompts/dashboards
+FullyAutonomous1HourAITrader.available_budget = property(lambda self: self.ai_opened_trades.available_budget)
+
 # Paper trading class - Uses REAL Binance data only
 class FullyAutonomous1HourPaperTrader:
     def __init__(self, real_bot):
         self.real_bot = real_bot
+        self.clock = real_bot.clock
         # Copy colorama attributes from real_bot
         self.Fore = real_bot.Fore
         self.Back = real_bot.Back
@@ -1639,13 +2009,18 @@ class FullyAutonomous1HourPaperTrader:
         # NEW: Monitoring interval (3 minute)
         self.monitoring_interval = 180  # 3 minute in seconds
         
-        self.paper_balance = 500  # Virtual $500 budget
-        self.available_budget = 500
-        self.paper_positions = {}
-        self.paper_history_file = "fully_autonomous_1hour_paper_trading_history.json"
+        # Orchestrator profile rides on real_bot (same name / state_dir); empty → the defaults below
+        profile = real_bot.profile
+        self.paper_balance = profile.get("budget", 500)  # Virtual $500 budget
+        self.paper_history_file = real_bot.state_path("fully_autonomous_1hour_paper_trading_history.json")
         self.paper_history = self.load_paper_history()
-        self.available_pairs = ["SOLUSDT"]
-        self.max_concurrent_trades = 6
+        self.available_pairs = list(profile.get("pairs", ["SOLUSDT"]))
+        self.max_concurrent_trades = profile.get("max_concurrent_trades", 6)
+        self.paper_journal = PositionJournal(real_bot.state_path("fully_autonomous_1hour_paper_positions.wal"))
+        self.paper_positions = PositionLedger(self.paper_balance, self.max_concurrent_trades, journal=self.paper_journal)
+        for pair, position in self.paper_journal.replay().items():
+            self.paper_positions.restore(pair, position)
+        self.paper_journal.compact(dict(self.paper_positions.items()))
         
         self.real_bot.print_color("🤖 FULLY AUTONOMOUS PAPER TRADER INITIALIZED!", self.Fore.GREEN + self.Style.BRIGHT)
         self.real_bot.print_color(f"💰 Virtual Budget: ${self.paper_balance}", self.Fore.CYAN + self.Style.BRIGHT)
@@ -1654,12 +2029,16 @@ class FullyAutonomous1HourPaperTrader:
         self.real_bot.print_color(f"⏰ MONITORING: 3 MINUTE INTERVAL", self.Fore.RED + self.Style.BRIGHT)
         self.real_bot.print_color(f"📡 USING REAL BINANCE MARKET DATA", self.Fore.BLUE + self.Style.BRIGHT)
     
+    @property
+    def available_budget(self):
+        return self.paper_positions.available_budget
+    
     def load_paper_history(self):
         """Load PAPER trading history"""
         try:
             if os.path.exists(self.paper_history_file):
                 with open(self.paper_history_file, 'r') as f:
-                    return json.load(f)
+                    return load_trade_history(json.load(f))
             return []
         except Exception as e:
             self.real_bot.print_color(f"Error loading paper trade history: {e}", self.Fore.RED)
@@ -1669,40 +2048,19 @@ class FullyAutonomous1HourPaperTrader:
         """Save PAPER trading history"""
         try:
             with open(self.paper_history_file, 'w') as f:
-                json.dump(self.paper_history, f, indent=2)
+                json.dump(dump_trade_history(self.paper_history), f, indent=2)
         except Exception as e:
             self.real_bot.print_color(f"Error saving paper trade history: {e}", self.Fore.RED)
     
     def add_paper_trade_to_history(self, trade_data):
         """Add trade to PAPER trading history with partial close support"""
         try:
-            trade_data['close_time'] = self.real_bot.get_thailand_time()
-            trade_data['close_timestamp'] = time.time()
-            trade_data['trade_type'] = 'PAPER'
-            
-            # === FIX: Add missing fields for ML logging (PAPER VERSION) ===
-            if 'exit_price' not in trade_data:
-                # Get current price for exit price
-                current_price = self.real_bot.get_current_price(trade_data['pair'])
-                trade_data['exit_price'] = current_price
-            
-            # Calculate peak_pnl_pct if not present
-            if 'peak_pnl_pct' not in trade_data:
-                if 'peak_pnl' in trade_data:
-                    trade_data['peak_pnl_pct'] = trade_data['peak_pnl']
-                else:
-                    # Calculate from entry and exit
-                    if trade_data['direction'] == 'LONG':
-                        peak_pct = ((trade_data['exit_price'] - trade_data['entry_price']) / trade_data['entry_price']) * 100 * trade_data.get('leverage', 1)
-                    else:
-                        peak_pct = ((trade_data['entry_price'] - trade_data['exit_price']) / trade_data['entry_price']) * 100 * trade_data.get('leverage', 1)
-                    trade_data['peak_pnl_pct'] = max(0, peak_pct)  # At least 0
-            
-            # Add partial close indicator to display
-            if trade_data.get('partial_percent', 100) < 100:
-                trade_data['display_type'] = f"PARTIAL_{trade_data['partial_percent']}%"
-            else:
-                trade_data['display_type'] = "FULL_CLOSE"
+            # ClosedTrade always carries exit_price / peak_pnl_pct / display_type
+            if not isinstance(trade_data, ClosedTrade):
+                trade_data = ClosedTrade.from_dict(trade_data)
+            trade_data.close_time = self.real_bot.get_thailand_time()
+            trade_data.close_timestamp = self.clock.time()
+            trade_data.trade_type = 'PAPER'
             
             self.paper_history.append(trade_data)
             
@@ -1715,16 +2073,18 @@ class FullyAutonomous1HourPaperTrader:
                 from data_collector import log_trade_for_ml
                 
                 # Print what we're sending to debug
-                print(f"🔧 [PAPER ML DEBUG] Sending trade data: {trade_data['pair']} | PnL: ${trade_data.get('pnl', 0):.2f}")
+                self.real_bot.print_color(f"🔧 [PAPER ML DEBUG] Sending trade data: {trade_data['pair']} | PnL: ${trade_data.get('pnl', 0):.2f}", level=logging.DEBUG)
                 
                 # Call ML logging
-                log_trade_for_ml(trade_data)
-                print("✅ PAPER ML data logged → ml_training_data.csv updated!")
+                log_trade_for_ml(trade_data, trade_data.get('entry_context'), path=self.real_bot.state_path("ml_training_data.csv"))
+                self.real_bot.print_color("✅ PAPER ML data logged → ml_training_data.csv updated!", level=logging.DEBUG)
                 
             except ImportError as e:
-                print(f"❌ [PAPER ML ERROR] Cannot import data_collector: {e}")
+                self.real_bot.metrics.inc("ml_log_failures_total")
+                self.real_bot.print_color(f"❌ [PAPER ML ERROR] Cannot import data_collector: {e}")
             except Exception as e:
-                print(f"❌ [PAPER ML ERROR] Logging failed: {e}")
+                self.real_bot.metrics.inc("ml_log_failures_total")
+                self.real_bot.print_color(f"❌ [PAPER ML ERROR] Logging failed: {e}")
                 # Try to create a simple CSV as fallback
                 self._create_paper_fallback_ml_log(trade_data)
             
@@ -1743,7 +2103,7 @@ class FullyAutonomous1HourPaperTrader:
             import csv
             import os
             
-            csv_file = "ml_training_data_paper_fallback.csv"
+            csv_file = self.real_bot.state_path("ml_training_data_paper_fallback.csv")
             file_exists = os.path.isfile(csv_file)
             
             with open(csv_file, 'a', newline='', encoding='utf-8') as f:
@@ -1755,7 +2115,7 @@ class FullyAutonomous1HourPaperTrader:
                 
                 # Write data
                 writer.writerow([
-                    trade_data.get('close_time', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+                    trade_data.get('close_time', self.clock.now().strftime('%Y-%m-%d %H:%M:%S')),
                     trade_data.get('pair', ''),
                     trade_data.get('direction', ''),
                     trade_data.get('entry_price', 0),
@@ -1765,10 +2125,10 @@ class FullyAutonomous1HourPaperTrader:
                     'PAPER'  # Mark as paper trade
                 ])
             
-            print(f"✅ PAPER Fallback ML data saved to {csv_file}")
+            self.real_bot.print_color(f"✅ PAPER Fallback ML data saved to {csv_file}")
             
         except Exception as e:
-            print(f"❌ PAPER Fallback ML logging also failed: {e}")
+            self.real_bot.print_color(f"❌ PAPER Fallback ML logging also failed: {e}")
 
     def calculate_current_pnl(self, trade, current_price):
         """Calculate current PnL percentage for paper trading"""
@@ -1791,12 +2151,12 @@ class FullyAutonomous1HourPaperTrader:
             
             if close_success:
                 # 2. Wait a moment and verify position is actually closed
-                time.sleep(1)
+                self.real_bot.pause(1)
                 
                 # Verify position is actually removed
                 if pair in self.paper_positions:
                     self.real_bot.print_color(f"⚠️  PAPER: Position still exists after close, forcing removal...", self.Fore.RED)
-                    del self.paper_positions[pair]
+                    self.paper_positions.discard(pair)
                 
                 # 3. 🆕 ASK AI AGAIN BEFORE OPENING REVERSE POSITION
                 self.real_bot.print_color(f"🔍 PAPER: Asking AI to confirm reverse position for {pair}...", self.Fore.BLUE)
@@ -1838,6 +2198,9 @@ class FullyAutonomous1HourPaperTrader:
         """Close paper trade immediately with partial close support"""
         try:
             current_price = self.real_bot.get_current_price(pair)
+            if current_price is None:
+                self.real_bot.print_color(f"🚫 PAPER: Close of {pair} postponed: no live price", self.Fore.RED)
+                return False
             
             # Calculate PnL based on partial percentage
             if trade['direction'] == 'LONG':
@@ -1845,42 +2208,25 @@ class FullyAutonomous1HourPaperTrader:
             else:
                 pnl = (trade['entry_price'] - current_price) * trade['quantity'] * (partial_percent / 100)
             
-            # --- PEAK PnL CALCULATION (FIXED VERSION) ---
-            peak_pnl_pct = 0.0
-            if 'peak_pnl' in trade:
-                peak_pnl_pct = trade['peak_pnl']
-            else:
-                # Calculate peak from current close (for paper trading)
-                if trade['direction'] == 'LONG':
-                    peak_pnl_pct = ((current_price - trade['entry_price']) / trade['entry_price']) * 100 * trade['leverage']
-                else:
-                    peak_pnl_pct = ((trade['entry_price'] - current_price) / trade['entry_price']) * 100 * trade['leverage']
-                peak_pnl_pct = max(0, peak_pnl_pct)  # At least 0
-            
             # If partial close, calculate the remaining position
             if partial_percent < 100:
-                # This is a partial close - update the existing trade
-                remaining_quantity = trade['quantity'] * (1 - partial_percent / 100)
-                closed_quantity = trade['quantity'] * (partial_percent / 100)
-                closed_position_size = trade['position_size_usd'] * (partial_percent / 100)
-                
-                # Update the existing trade with remaining quantity
-                trade['quantity'] = remaining_quantity
-                trade['position_size_usd'] = trade['position_size_usd'] * (1 - partial_percent / 100)
+                # This is a partial close - shrink the open position + credit budget atomically
+                closed = self.paper_positions.partial_close(pair, partial_percent, pnl)
+                if closed is None:
+                    self.real_bot.print_color(f"❌ PAPER: Partial close failed - no open position for {pair}", self.Fore.RED)
+                    return False
+                closed_quantity, closed_position_size = closed
+                remaining_quantity = trade['quantity']
                 
-                # Add partial close to history
-                partial_trade = trade.copy()
-                partial_trade['status'] = 'PARTIAL_CLOSE'
-                partial_trade['exit_price'] = current_price
-                partial_trade['pnl'] = pnl
-                partial_trade['close_reason'] = close_reason
-                partial_trade['close_time'] = self.real_bot.get_thailand_time()
-                partial_trade['partial_percent'] = partial_percent
-                partial_trade['closed_quantity'] = closed_quantity
-                partial_trade['closed_position_size'] = closed_position_size
-                partial_trade['peak_pnl_pct'] = round(peak_pnl_pct, 3)  # ✅ FIXED: Add peak_pnl_pct
+                # Add partial close to history (peak_pnl_pct is filled from the position's peak)
+                partial_trade = ClosedTrade.from_position(
+                    trade, current_price, pnl, close_reason,
+                    close_time=self.real_bot.get_thailand_time(),
+                    partial_percent=partial_percent,
+                    closed_quantity=closed_quantity,
+                    closed_position_size=closed_position_size
+                )
                 
-                self.available_budget += closed_position_size + pnl
                 self.add_paper_trade_to_history(partial_trade)
                 
                 pnl_color = self.Fore.GREEN if pnl > 0 else self.Fore.RED
@@ -1890,25 +2236,20 @@ class FullyAutonomous1HourPaperTrader:
                 return True
                 
             else:
-                # Full close
+                # Full close - remove from active positions + credit margin and PnL atomically
+                self.paper_positions.close(pair, pnl)
+                
                 trade['status'] = 'CLOSED'
-                trade['exit_price'] = current_price
-                trade['pnl'] = pnl
-                trade['close_reason'] = close_reason
-                trade['close_time'] = self.real_bot.get_thailand_time()
-                trade['partial_percent'] = 100
-                trade['peak_pnl_pct'] = round(peak_pnl_pct, 3)  # ✅ FIXED: Add peak_pnl_pct
+                closed_trade = ClosedTrade.from_position(
+                    trade, current_price, pnl, close_reason,
+                    close_time=self.real_bot.get_thailand_time()
+                )
                 
-                self.available_budget += trade['position_size_usd'] + pnl
-                self.add_paper_trade_to_history(trade.copy())
+                self.add_paper_trade_to_history(closed_trade)
                 
                 pnl_color = self.Fore.GREEN if pnl > 0 else self.Fore.RED
                 self.real_bot.print_color(f"✅ PAPER: Full Close | {pair} | P&L: ${pnl:.2f} | Reason: {close_reason}", pnl_color)
                 
-                # Remove from active positions after full closing
-                if pair in self.paper_positions:
-                    del self.paper_positions[pair]
-                
                 return True
                 
         except Exception as e:
@@ -1919,84 +2260,12 @@ class FullyAutonomous1HourPaperTrader:
         """BOUNCE-PROOF 3-LAYER EXIT V2 – PAPER TRADING VERSION (NO WINNER-TURN-LOSER)"""
         try:
             current_price = self.real_bot.get_current_price(pair)
-            current_pnl = self.calculate_current_pnl(trade, current_price)
-            
-            # Peak PnL tracking
-            if 'peak_pnl' not in trade:
-                trade['peak_pnl'] = current_pnl
-            if current_pnl > trade['peak_pnl']:
-                trade['peak_pnl'] = current_pnl
-            
-            peak = trade['peak_pnl']
-
-            # 1. Hard stop -5% က ဘယ်လိုမှ မလွတ်
-            if current_pnl <= -5.0:
-                return {
-                    "should_close": True, 
-                    "close_type": "STOP_LOSS", 
-                    "close_reason": "Hard -5% rule", 
-                    "confidence": 100,
-                    "partial_percent": 100
-                }
-
-            # 2. 60% Partial @ +9%
-            if peak >= 9.0 and not trade.get('partial_done', False):
-                trade['partial_done'] = True
-                return {
-                    "should_close": True,
-                    "partial_percent": 60,
-                    "close_type": "PARTIAL_60",
-                    "reason": f"PAPER: Lock 60% profit @ +{peak:.1f}%",
-                    "confidence": 100
-                }
-
-            # 3. Instant Breakeven @ +12%
-            if peak >= 12.0 and not trade.get('breakeven_done', False):
-                trade['breakeven_done'] = True
-                return {
-                    "should_close": False,
-                    "move_sl_to": trade['entry_price'],
-                    "close_type": "BREAKEVEN_ACTIVATED",
-                    "reason": f"PAPER: Breakeven activated @ +{peak:.1f}%",
-                    "confidence": 100
-                }
-
-            # 4. Dynamic Profit Floor (75% of Peak)
-            if peak >= 15.0:
-                profit_floor = peak * 0.75
-                if current_pnl <= profit_floor and trade.get('partial_done', False):
-                    return {
-                        "should_close": True,
-                        "partial_percent": 100,
-                        "close_type": "PROFIT_FLOOR_HIT",
-                        "reason": f"PAPER: Profit floor hit {profit_floor:.1f}%",
-                        "confidence": 100
-                    }
-
-            # 5. 2×ATR Trailing
-            if trade.get('partial_done', False) and peak >= 9.0:
-                atr_14 = 0.001
-                trail_price = current_price + (2 * atr_14) if trade['direction'] == 'LONG' else current_price - (2 * atr_14)
-                if trade['direction'] == 'LONG' and current_price <= trail_price:
-                    return {
-                        "should_close": True, 
-                        "partial_percent": 100, 
-                        "close_type": "TRAILING_HIT", 
-                        "reason": "PAPER: 2×ATR Trailing",
-                        "confidence": 95
-                    }
-                if trade['direction'] == 'SHORT' and current_price >= trail_price:
-                    return {
-                        "should_close": True, 
-                        "partial_percent": 100, 
-                        "close_type": "TRAILING_HIT", 
-                        "reason": "PAPER: 2×ATR Trailing",
-                        "confidence": 95
-                    }
-
-            # ❌❌❌ NO WINNER-TURN-LOSER LOGIC - COMPLETELY REMOVED ❌❌❌
-
-            return {"should_close": False}
+            if current_price is None:
+                return {"should_close": False}
+            close_decision = should_close_trade(trade, current_price, 0.001)
+            if "reason" in close_decision:
+                close_decision["reason"] = f"PAPER: {close_decision['reason']}"
+            return close_decision
 
         except Exception as e:
             return {"should_close": False}
@@ -2024,17 +2293,8 @@ class FullyAutonomous1HourPaperTrader:
                 self.real_bot.print_color(f"🟡 PAPER: DeepSeek decides to HOLD {pair}", self.Fore.YELLOW)
                 return False
             
-            # Check if we can open position
-            if pair in self.paper_positions:
-                self.real_bot.print_color(f"🚫 PAPER: Cannot open {pair}: Position already exists", self.Fore.RED)
-                return False
-            
-            if len(self.paper_positions) >= self.max_concurrent_trades:
-                self.real_bot.print_color(f"🚫 PAPER: Cannot open {pair}: Max concurrent trades reached (6)", self.Fore.RED)
-                return False
-                
-            if position_size_usd > self.available_budget:
-                self.real_bot.print_color(f"🚫 PAPER: Cannot open {pair}: Insufficient budget", self.Fore.RED)
+            if not entry_price or entry_price <= 0:
+                self.real_bot.print_color(f"🚫 PAPER: Cannot open {pair}: no live price", self.Fore.RED)
                 return False
             
             # Calculate quantity
@@ -2042,6 +2302,12 @@ class FullyAutonomous1HourPaperTrader:
             quantity = notional_value / entry_price
             quantity = round(quantity, 3)
             
+            # Check + reserve budget in one step (position exists / max trades / budget)
+            reserved, reason = self.paper_positions.reserve(pair, position_size_usd)
+            if not reserved:
+                self.real_bot.print_color(f"🚫 PAPER: Cannot open {pair}: {reason}", self.Fore.RED)
+                return False
+            
             # Display AI trade decision (NO TP/SL)
             direction_color = self.Fore.GREEN + self.Style.BRIGHT if decision == 'LONG' else self.Fore.RED + self.Style.BRIGHT
             direction_icon = "🟢 LONG" if decision == 'LONG' else "🔴 SHORT"
@@ -2058,24 +2324,17 @@ class FullyAutonomous1HourPaperTrader:
             self.real_bot.print_color(f"REASONING: {reasoning}", self.Fore.WHITE)
             self.real_bot.print_color("=" * 80, self.Fore.CYAN)
             
-            # Update budget and track trade
-            self.available_budget -= position_size_usd
-            
-            self.paper_positions[pair] = {
-                "pair": pair,
-                "direction": decision,
-                "entry_price": entry_price,
-                "quantity": quantity,
-                "position_size_usd": position_size_usd,
-                "leverage": leverage,
-                "entry_time": time.time(),
-                "status": 'ACTIVE',
-                'ai_confidence': confidence,
-                'ai_reasoning': reasoning,
-                'entry_time_th': self.real_bot.get_thailand_time(),
-                'has_tp_sl': False,  # Mark as no TP/SL
-                'peak_pnl': 0  # NEW: For 3-layer system
-            }
+            # Budget already reserved → track trade
+            self.paper_positions.commit(pair, Position(
+                pair, decision, entry_price, quantity, position_size_usd, leverage,
+                entry_time=self.clock.time(),
+                entry_time_th=self.real_bot.get_thailand_time(),
+                ai_confidence=confidence,
+                ai_reasoning=reasoning,
+                entry_context=ai_decision.get("market_context"),
+                has_tp_sl=False,  # Mark as no TP/SL
+                peak_pnl=0  # For 3-layer system
+            ))
             
             self.real_bot.print_color(f"✅ PAPER TRADE EXECUTED (BOUNCE-PROOF V2): {pair} {decision} | Leverage: {leverage}x", self.Fore.GREEN + self.Style.BRIGHT)
             return True
@@ -2088,14 +2347,17 @@ class FullyAutonomous1HourPaperTrader:
         """Monitor paper positions and ask AI when to close (BOUNCE-PROOF V2)"""
         try:
             closed_positions = []
-            for pair, trade in list(self.paper_positions.items()):
+            for pair, trade in self.paper_positions.items():
                 if trade['status'] != 'ACTIVE':
                     continue
                 
                 # Ask AI whether to close this paper position using Bounce-Proof V2
                 if not trade.get('has_tp_sl', True):
-                    self.real_bot.print_color(f"🔍 PAPER Bounce-Proof V2 Checking {pair}...", self.Fore.BLUE)
+                    self.real_bot.print_color(f"🔍 PAPER Bounce-Proof V2 Checking {pair}...", self.Fore.BLUE, sample=10)
                     close_decision = self.get_ai_close_decision_v2(pair, trade)
+                    self.paper_positions.record_peak(pair)
+                    if close_decision.get("close_type"):
+                        self.real_bot.metrics.inc("exit_rule_hits_total", close_type=close_decision["close_type"], mode="paper")
                     
                     if close_decision.get("should_close", False):
                         close_type = close_decision.get("close_type", "AI_DECISION")
@@ -2115,6 +2377,9 @@ class FullyAutonomous1HourPaperTrader:
                         if success and partial_percent == 100:  # Only count as closed if full close
                             closed_positions.append(pair)
                     else:
+                        if close_decision.get('close_type') == 'BREAKEVEN_ACTIVATED':
+                            self.paper_positions.mark('BREAKEVEN', pair, breakeven_done=True, peak_pnl=trade['peak_pnl'])
+                        
                         # Show Bounce-Proof V2's decision to hold with reasoning
                         if close_decision.get('confidence', 0) > 0:
                             reasoning = close_decision.get('reasoning', 'No reason provided')
@@ -2144,6 +2409,9 @@ class FullyAutonomous1HourPaperTrader:
                 current_price = self.real_bot.get_current_price(pair)
                 
                 direction_icon = "🟢 LONG" if trade['direction'] == 'LONG' else "🔴 SHORT"
+                if current_price is None:
+                    self.real_bot.print_color(f"{direction_icon} {pair} | Entry: ${trade['entry_price']:.4f} | Current: unavailable", self.Fore.WHITE)
+                    continue
                 
                 if trade['direction'] == 'LONG':
                     unrealized_pnl = (current_price - trade['entry_price']) * trade['quantity']
@@ -2244,15 +2512,26 @@ class FullyAutonomous1HourPaperTrader:
                 else:
                     self.real_bot.print_color(f"\n🧠 Learning progress display not available", self.Fore.YELLOW)
             
+            pairs = self.real_bot.scan_universe(self.paper_positions.pairs(), self.available_pairs)
+            if pairs:
+                self.available_pairs = pairs
             self.real_bot.print_color(f"\nPAPER: DEEPSEEK SCANNING {len(self.available_pairs)} PAIRS...", self.Fore.BLUE + self.Style.BRIGHT)
             
+            batch = {}
+            if self.real_bot.llm_batch and self.available_budget > 100:
+                batch = self.real_bot.get_ai_decisions_with_learning(self.available_pairs, self.paper_positions, self.available_budget)
+            
             qualified_signals = 0
             for pair in self.available_pairs:
                 if self.available_budget > 100:
-                    market_data = self.real_bot.get_price_history(pair)
-                    
-                    # Use learning-enhanced AI decision for paper trading too
-                    ai_decision = self.real_bot.get_ai_decision_with_learning(pair, market_data)
+                    if pair in batch:
+                        market_data, ai_decision = batch[pair]
+                    else:
+                        market_data = self.real_bot.get_price_history(pair)
+                        
+                        # Use learning-enhanced AI decision for paper trading too
+                        position = self.paper_positions.get(pair)
+                        ai_decision = self.real_bot.get_ai_decision_with_learning(pair, market_data, position)
                     
                     if ai_decision["decision"] != "HOLD" and ai_decision["position_size_usd"] > 0:
                         qualified_signals += 1
@@ -2266,10 +2545,10 @@ class FullyAutonomous1HourPaperTrader:
                             
                         success = self.paper_execute_trade(pair, ai_decision)
                         if success:
-                            time.sleep(1)
+                            self.real_bot.pause(1)
                 
             if qualified_signals == 0:
-                self.real_bot.print_color("PAPER: No qualified DeepSeek signals this cycle", self.Fore.YELLOW)
+                self.real_bot.print_color("PAPER: No qualified DeepSeek signals this cycle", self.Fore.YELLOW, sample=10)
                     
         except Exception as e:
             self.real_bot.print_color(f"PAPER: Trading cycle error: {e}", self.Fore.RED)
@@ -2287,11 +2566,12 @@ class FullyAutonomous1HourPaperTrader:
         while True:
             try:
                 self.paper_cycle_count += 1
+                self.real_bot.metrics.inc("cycles_total", mode="paper")
                 self.real_bot.print_color(f"\n🔄 PAPER TRADING CYCLE {self.paper_cycle_count} (BOUNCE-PROOF V2)", self.Fore.CYAN + self.Style.BRIGHT)
                 self.real_bot.print_color("=" * 60, self.Fore.CYAN)
                 self.run_paper_trading_cycle()
                 self.real_bot.print_color(f"⏳ Next Bounce-Proof V2 analysis in 3 minute...", self.Fore.BLUE)
-                time.sleep(self.monitoring_interval)
+                self.clock.sleep(self.monitoring_interval)
                 
             except KeyboardInterrupt:
                 self.real_bot.print_color(f"\n🛑 PAPER TRADING STOPPED", self.Fore.RED + self.Style.BRIGHT)
@@ -2300,13 +2580,14 @@ class FullyAutonomous1HourPaperTrader:
                 break
             except Exception as e:
                 self.real_bot.print_color(f"PAPER: Main loop error: {e}", self.Fore.RED)
-                time.sleep(self.monitoring_interval)
+                self.clock.sleep(self.monitoring_interval)
 
 # Main execution
 if __name__ == "__main__":
     try:
         # Create the main bot
         bot = FullyAutonomous1HourAITrader()
+        structured_log.flush()  # queued startup lines first, then the menu
         
         # Ask user for mode selection
         print("\n" + "="*70)
@@ -0,0 +1,138 @@
+# circuit_breaker.py
+# External dependency (Binance futures / Binance public / OpenRouter) တစ်ခုချင်းစီအတွက် circuit breaker
+# နောက်ဆုံး call N ခုထဲမှာ error (သို့) slow call များလာရင် OPEN → cooldown ပြီးတဲ့အထိ call မလုပ်ဘဲ ချက်ချင်း fail
+# (caller က cached data / get_improved_fallback_decision ကို သုံး) → cooldown ပြီးရင် HALF_OPEN probe တစ်ခု → OK ဆို CLOSED
+#   BREAKER_WINDOW=20   BREAKER_MIN_CALLS=5   BREAKER_FAILURE_RATE=0.5 (error + slow)
+#   BREAKER_COOLDOWN=60 (sec, probe fail တိုင်း နှစ်ဆ → BREAKER_MAX_COOLDOWN=900 အထိ - outage ရှည်ရင် cycle တိုင်း probe မစောင့်ရ)
+#   BREAKER_SLOW_<NAME>=sec (e.g. BREAKER_SLOW_OPENROUTER=15) - default per dependency, 0 = latency ignored
+#   BREAKER_ENABLED=1 (default) / 0 = calls always go through (old behaviour, minus the blind retries)
+
+import os
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+def declare_metrics(metrics, breakers):
+    """breaker_state gauge over a {name: CircuitBreaker} dict (read at scrape time)"""
+    metrics.gauge("breaker_state", "Circuit breaker per dependency (0 closed, 1 half-open, 2 open)",
+                  lambda: {(("dependency", name),): STATE_VALUE[b.state] for name, b in list(breakers.items())})
+
+
+class CircuitOpenError(Exception):
+    """Call refused without touching the network - the dependency's breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} circuit open (retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Rolling window of the last `window` outcomes; a call slower than slow_seconds counts
+    as a failure even when it succeeds. time_fn drives the cooldown (bot clock → works
+    under SIM_CLOCK), call latency is always measured on the wall clock.
+    """
+
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5, slow_seconds=0.0, cooldown=60.0,
+                 max_cooldown=900.0, time_fn=time.time, enabled=True):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.cooldown = cooldown
+        self.time_fn = time_fn
+        self.enabled = enabled
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, slow_seconds=0.0, time_fn=time.time):
+        return cls(
+            name,
+            window=int(os.getenv("BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("BREAKER_MIN_CALLS", "5")),
+            failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+            slow_seconds=float(os.getenv(f"BREAKER_SLOW_{name.upper()}", str(slow_seconds))),
+            cooldown=float(os.getenv("BREAKER_COOLDOWN", "60")),
+            max_cooldown=float(os.getenv("BREAKER_MAX_COOLDOWN", "900")),
+            time_fn=time_fn,
+            enabled=os.getenv("BREAKER_ENABLED", "1").lower() not in ("0", "false", "no", "off"),
+        )
+
+    def allow(self):
+        """True → make the call (and record() its outcome); False → fail fast"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.time_fn() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True  # exactly one probe; everyone else keeps failing fast
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok, seconds=0.0):
+        if not self.enabled:
+            return
+        failed = not ok or (self.slow_seconds > 0 and seconds > self.slow_seconds)
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)  # still down → back off
+                    self._trip()
+                else:
+                    self.state = CLOSED
+                    self.cooldown = self.base_cooldown
+                    self.outcomes.clear()
+                return
+            self.outcomes.append(failed)
+            if (self.state == CLOSED and len(self.outcomes) >= self.min_calls
+                    and sum(self.outcomes) / len(self.outcomes) >= self.failure_rate):
+                self._trip()
+
+    def _trip(self):
+        self.state = OPEN
+        self.opened_at = self.time_fn()
+        self.trips += 1
+        self.outcomes.clear()
+
+    def retry_in(self):
+        return max(0.0, self.cooldown - (self.time_fn() - self.opened_at)) if self.state == OPEN else 0.0
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) through the breaker; CircuitOpenError when open, fn's own exceptions re-raised"""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False, time.perf_counter() - started)
+            raise
+        self.record(True, time.perf_counter() - started)
+        return result
+
+    def summary_line(self):
+        failures = sum(self.outcomes)
+        return (f"{self.name:<16} {self.state:<9} window {failures}/{len(self.outcomes)} failed  "
+                f"trips {self.trips}  rejected {self.rejected}"
+                + (f"  retry in {self.retry_in():.0f}s" if self.state == OPEN else ""))
@@ -0,0 +1,12 @@
+# conftest.py
+# Shared pytest fixtures
+
+import pytest
+
+from sim_clock import SimulatedClock
+
+
+@pytest.fixture
+def clock():
+    """Virtual clock at t=0 - pass clock.time as time_fn, move it with clock.advance(seconds)"""
+    return SimulatedClock(start=0.0)
@@ -4,10 +4,14 @@
 
 import csv
 import os
+import threading
 import time
 from datetime import datetime
 
-DATA_FILE = "ml_training_data.csv"
+import structured_log
+
+DATA_FILE = "ml_training_data.csv"   # single-bot layout; orchestrated traders pass their own state_path
+_write_lock = threading.Lock()       # trader thread တွေ တစ်ပြိုင်တည်း append / header race မဖြစ်အောင်
 
 def classify_trade_outcome(trade_data):
     """
@@ -39,82 +43,94 @@ def classify_trade_outcome(trade_data):
         else:
             return "PURE_LOSER"
     except Exception as e:
-        print(f"❌ [CLASSIFICATION ERROR] {e}")
+        structured_log.console(f"❌ [CLASSIFICATION ERROR] {e}", name="data_collector")
         return "UNKNOWN"
 
-def log_trade_for_ml(trade_data, market_data=None):
+def build_ml_row(trade_data, market_data=None, is_mistake=None):
     """
-    ဘယ် trade ပဲဖြစ်ဖြစ် (Winner, Loser, Partial, Winner-Turn-Loser) အကုန် auto log
-    တစ်ခါမှ run ပေးစရာ မလိုတော့ဘူး — သူ့ဘာသာသူ သိမ်းတယ်
+    Closed trade → ML dataset row (live logger + backtest တို့ အတူတူ သုံး)
+    Returns (row, outcome, peak_pnl_pct)
     """
-    try:
-        if market_data is None:
-            market_data = {}
-
-        # === FIX: Handle missing fields gracefully ===
-        # Peak PnL % 
-        peak_pnl_pct = trade_data.get("peak_pnl_pct", 0.0)
-        if peak_pnl_pct == 0 and "peak_pnl" in trade_data:
-            peak_pnl_pct = trade_data["peak_pnl"]
-
-        # PnL % တွက်ပေး (လိုအပ်ရင်)
-        if "pnl_percent" not in trade_data:
-            try:
-                entry_price = trade_data.get('entry_price', 0)
-                exit_price = trade_data.get('exit_price', 0)
-                leverage = trade_data.get('leverage', 1)
-                
-                if entry_price > 0 and exit_price > 0:
-                    if trade_data.get('direction') == 'LONG':
-                        trade_data['pnl_percent'] = ((exit_price - entry_price) / entry_price) * 100 * leverage
-                    else:
-                        trade_data['pnl_percent'] = ((entry_price - exit_price) / entry_price) * 100 * leverage
+    if market_data is None:
+        market_data = {}
+
+    # === FIX: Handle missing fields gracefully ===
+    # Peak PnL % 
+    peak_pnl_pct = trade_data.get("peak_pnl_pct", 0.0)
+    if peak_pnl_pct == 0 and "peak_pnl" in trade_data:
+        peak_pnl_pct = trade_data["peak_pnl"]
+
+    # PnL % တွက်ပေး (လိုအပ်ရင်)
+    if "pnl_percent" not in trade_data:
+        try:
+            entry_price = trade_data.get('entry_price', 0)
+            exit_price = trade_data.get('exit_price', 0)
+            leverage = trade_data.get('leverage', 1)
+            
+            if entry_price > 0 and exit_price > 0:
+                if trade_data.get('direction') == 'LONG':
+                    trade_data['pnl_percent'] = ((exit_price - entry_price) / entry_price) * 100 * leverage
                 else:
-                    trade_data['pnl_percent'] = 0
-            except Exception as e:
-                print(f"❌ [PNL CALC ERROR] {e}")
+                    trade_data['pnl_percent'] = ((entry_price - exit_price) / entry_price) * 100 * leverage
+            else:
                 trade_data['pnl_percent'] = 0
+        except Exception as e:
+            structured_log.console(f"❌ [PNL CALC ERROR] {e}", name="data_collector")
+            trade_data['pnl_percent'] = 0
+
+    # Intelligent classification
+    outcome = classify_trade_outcome(trade_data)
+    unix_time = trade_data.get("close_timestamp") or time.time()
+
+    # === FIX: Ensure all required fields exist with safe defaults ===
+    row = {
+        "timestamp": datetime.fromtimestamp(unix_time).strftime('%Y-%m-%d %H:%M:%S'),
+        "unix_time": unix_time,
+        "pair": trade_data.get("pair", "UNKNOWN"),
+        "direction": 1 if trade_data.get("direction") == "LONG" else 0,
+        "entry_price": float(trade_data.get("entry_price", 0)),
+        "exit_price": float(trade_data.get("exit_price", 0)),
+        "pnl_usd": float(trade_data.get("pnl", 0)),
+        "pnl_percent": round(trade_data.get('pnl_percent', 0), 3),
+        "peak_pnl_pct": round(peak_pnl_pct, 3),
+        "outcome_class": outcome,
+        "leverage": trade_data.get("leverage", 5),
+        "position_size_usd": float(trade_data.get("position_size_usd", 50.0)),
+        "loss_percent": round(abs(trade_data.get("pnl", 0)) / trade_data.get("position_size_usd", 50.0) * 100, 2) if trade_data.get("pnl", 0) < 0 else 0,
+        "atr_percent": market_data.get("atr_percent", 0.0),
+        "volatility_spike": 1 if market_data.get("atr_percent", 0) > 3.0 else 0,
+        "trend_strength": market_data.get("trend_strength", 0.0),
+        "rsi": market_data.get("rsi", 50),
+        "volume_change": market_data.get("volume_change", 0.0),
+        "news_impact": 1 if market_data.get("news_impact", False) else 0,
+        "sl_distance_pct": market_data.get("sl_distance_pct", 0.0),
+        "close_reason": trade_data.get("close_reason", "MANUAL"),
+        "is_partial_close": 1 if trade_data.get("partial_percent", 100) < 100 else 0,
+        "partial_percent": trade_data.get("partial_percent", 100),
+        "is_winner": 1 if trade_data.get("pnl", 0) > 0 else 0,
+        "is_mistake": (1 if is_mistake else 0) if is_mistake is not None else (1 if outcome in ["WINNER_TURN_LOSER", "STOP_LOSS_MISTAKE"] else 0)
+    }
+    return row, outcome, peak_pnl_pct
 
-        # Intelligent classification
-        outcome = classify_trade_outcome(trade_data)
-
-        # === FIX: Ensure all required fields exist with safe defaults ===
-        row = {
-            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            "unix_time": trade_data.get("close_timestamp", time.time()),
-            "pair": trade_data.get("pair", "UNKNOWN"),
-            "direction": 1 if trade_data.get("direction") == "LONG" else 0,
-            "entry_price": float(trade_data.get("entry_price", 0)),
-            "exit_price": float(trade_data.get("exit_price", 0)),
-            "pnl_usd": float(trade_data.get("pnl", 0)),
-            "pnl_percent": round(trade_data.get('pnl_percent', 0), 3),
-            "peak_pnl_pct": round(peak_pnl_pct, 3),
-            "outcome_class": outcome,
-            "leverage": trade_data.get("leverage", 5),
-            "position_size_usd": float(trade_data.get("position_size_usd", 50.0)),
-            "loss_percent": round(abs(trade_data.get("pnl", 0)) / trade_data.get("position_size_usd", 50.0) * 100, 2) if trade_data.get("pnl", 0) < 0 else 0,
-            "atr_percent": market_data.get("atr_percent", 0.0),
-            "volatility_spike": 1 if market_data.get("atr_percent", 0) > 3.0 else 0,
-            "trend_strength": market_data.get("trend_strength", 0.0),
-            "rsi": market_data.get("rsi", 50),
-            "volume_change": market_data.get("volume_change", 0.0),
-            "news_impact": 1 if market_data.get("news_impact", False) else 0,
-            "sl_distance_pct": market_data.get("sl_distance_pct", 0.0),
-            "close_reason": trade_data.get("close_reason", "MANUAL"),
-            "is_partial_close": 1 if trade_data.get("partial_percent", 100) < 100 else 0,
-            "partial_percent": trade_data.get("partial_percent", 100),
-            "is_winner": 1 if trade_data.get("pnl", 0) > 0 else 0,
-            "is_mistake": 1 if outcome in ["WINNER_TURN_LOSER", "STOP_LOSS_MISTAKE"] else 0
-        }
+def log_trade_for_ml(trade_data, market_data=None, is_mistake=None, path=None):
+    """
+    ဘယ် trade ပဲဖြစ်ဖြစ် (Winner, Loser, Partial, Winner-Turn-Loser) အကုန် auto log
+    တစ်ခါမှ run ပေးစရာ မလိုတော့ဘူး — သူ့ဘာသာသူ သိမ်းတယ်
+    is_mistake: SLPredictor / လူ ဆုံးဖြတ်ချက် ရှိရင် outcome class အစား အဲ့ဒါကို သုံး
+    path: trader တစ်ယောက်ချင်းရဲ့ CSV (None → DATA_FILE)
+    """
+    path = path or DATA_FILE
+    try:
+        row, outcome, peak_pnl_pct = build_ml_row(trade_data, market_data, is_mistake)
 
         # CSV ထဲ ရေးထည့်
-        file_exists = os.path.exists(DATA_FILE)
-        
-        with open(DATA_FILE, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=row.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
+        with _write_lock:
+            file_exists = os.path.exists(path)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=row.keys())
+                if not file_exists:
+                    writer.writeheader()
+                writer.writerow(row)
         
         # Success message with better formatting
         icon_map = {
@@ -142,18 +158,20 @@ def log_trade_for_ml(trade_data, market_data=None):
         pnl_value = trade_data.get('pnl', 0)
         close_reason_display = trade_data.get('close_reason', 'N/A')
         
-        print(f"{color}{icon} [AUTO ML LOG] {outcome:<20} | {pair:8} | "
-              f"Peak: +{peak_pnl_pct:>5.1f}% → Final: ${pnl_value:>7.2f} | "
-              f"{close_reason_display}\033[0m")
+        structured_log.console(
+            f"{icon} [AUTO ML LOG] {outcome:<20} | {pair:8} | "
+            f"Peak: +{peak_pnl_pct:>5.1f}% → Final: ${pnl_value:>7.2f} | {close_reason_display}",
+            color, name="data_collector",
+            outcome=outcome, pair=pair, pnl=pnl_value, peak_pnl_pct=peak_pnl_pct
+        )
               
         return True
 
     except KeyError as e:
-        print(f"❌ [ML KEY ERROR] Missing field: {e}")
-        print(f"🔧 Available fields: {list(trade_data.keys())}")
+        structured_log.console(f"❌ [ML KEY ERROR] Missing field: {e} | Available fields: {list(trade_data.keys())}", name="data_collector")
         return False
     except Exception as e:
-        print(f"❌ [ML CRITICAL ERROR] {e}")
+        structured_log.console(f"❌ [ML CRITICAL ERROR] {e}", name="data_collector")
         return False
 
 def get_dataset_stats():
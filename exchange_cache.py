@@ -0,0 +1,179 @@
+# exchange_cache.py
+# Symbol metadata cache - tick / step size, min notional, max leverage (traded pairs only)
+# futures_exchange_info (MB အများကြီး) ကို restart တိုင်း မဆွဲ၊ parse လုပ်ပြီးသား dict ကို disk ပေါ်မှာ သိမ်း
+#   EXCHANGE_INFO_CACHE=symbol_meta_cache.json (empty = memory only; FAKE_EXCHANGE_KLINES → always memory only)   EXCHANGE_INFO_TTL=3600 (sec)
+# Stale ဖြစ်ရင် cache ကို ဆက်သုံးပြီး background thread က ETag (If-None-Match) နဲ့ revalidate
+
+import json
+import os
+import threading
+import time
+
+import structured_log
+
+DEFAULT_FILE = "symbol_meta_cache.json"
+MIN_REFRESH_SECONDS = 60.0
+
+
+def _decimals(text):
+    return len(text.split('.')[1].rstrip('0')) if '.' in text else 0
+
+
+def parse_symbol(entry):
+    """exchangeInfo symbol entry → {"tick_size", "price_precision", "step_size", "qty_precision", "min_qty", "min_notional", "max_leverage"}"""
+    meta = {"tick_size": 0.0, "price_precision": 4, "step_size": 0.0, "qty_precision": 3,
+            "min_qty": 0.0, "min_notional": 0.0, "max_leverage": None}
+    for f in entry.get("filters", []):
+        kind = f.get("filterType")
+        if kind == "PRICE_FILTER":
+            meta["tick_size"] = float(f["tickSize"])
+            meta["price_precision"] = _decimals(f["tickSize"])
+        elif kind == "LOT_SIZE":
+            meta["step_size"] = float(f["stepSize"])
+            meta["qty_precision"] = _decimals(f["stepSize"])
+            meta["min_qty"] = float(f.get("minQty", 0))
+        elif kind == "MIN_NOTIONAL":
+            meta["min_notional"] = float(f.get("notional", f.get("minNotional", 0)))
+    return meta
+
+
+def binance_fetcher(client):
+    """
+    fetch(etag) → (exchange_info or None when unchanged, etag, {symbol: max_leverage}).
+    python-binance Client → conditional GET on its own session; other clients (FakeBinanceClient) → plain call.
+    """
+    session = getattr(client, "session", None)
+    brackets = getattr(client, "futures_leverage_bracket", None)  # client အချို့မှာ မရှိ (skip)
+    url = f"{client.FUTURES_URL}/{client.FUTURES_API_VERSION}/exchangeInfo" if session is not None else None
+
+    def fetch(etag):
+        if url is None:
+            info, etag = client.futures_exchange_info(), None
+        else:
+            response = session.get(url, headers={"If-None-Match": etag} if etag else {}, timeout=10)
+            if response.status_code == 304:
+                info = None
+            else:
+                response.raise_for_status()
+                info, etag = response.json(), response.headers.get("ETag")
+        leverage = {}
+        if brackets is not None:
+            try:
+                # Max leverage = first bracket's initialLeverage (signed endpoint, weight 1)
+                leverage = {b["symbol"]: int(b["brackets"][0]["initialLeverage"]) for b in brackets()}
+            except Exception as e:
+                structured_log.console(f"⚠️ [SYMBOL META] leverage brackets unavailable: {e}", name="exchange_cache")
+        return info, etag, leverage
+    return fetch
+
+
+class SymbolMetadataCache:
+    """
+    {pair: meta} for the traded pairs. Lookups are plain dict hits (the dict is swapped
+    whole on refresh, so readers never need the lock); fetches are serialised.
+    """
+
+    def __init__(self, path=DEFAULT_FILE, ttl=3600.0):
+        self.path = path
+        self.ttl = ttl
+        self.symbols = {}
+        self.etag = None
+        self.fetched_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls):
+        # FAKE_EXCHANGE_KLINES → memory only: simulator filters must not overwrite the real cache
+        path = "" if os.getenv("FAKE_EXCHANGE_KLINES") else os.getenv("EXCHANGE_INFO_CACHE", DEFAULT_FILE)
+        return cls(path, float(os.getenv("EXCHANGE_INFO_TTL", "3600")))
+
+    def get(self, pair):
+        return self.symbols.get(pair)
+
+    def covers(self, pairs):
+        return all(pair in self.symbols for pair in pairs)
+
+    def load(self):
+        self._loaded = True
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            symbols = data["symbols"]
+            if not isinstance(symbols, dict):
+                return  # old exchange-info format → refetch
+            self.symbols = symbols
+            self.etag = data.get("etag")
+            self.fetched_at = float(data["fetched_at"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "etag": self.etag, "symbols": self.symbols}, f)
+        os.replace(tmp, self.path)
+
+    def refresh(self, fetch, pairs):
+        """Revalidate now; returns True when the metadata changed"""
+        with self._lock:
+            info, etag, leverage = fetch(self.etag if self.covers(pairs) else None)
+            if info is not None:
+                wanted = set(pairs) | set(self.symbols)  # pairs rotated out by the universe scan stay cached
+                symbols = {s["symbol"]: parse_symbol(s) for s in info["symbols"] if s["symbol"] in wanted}
+            else:
+                symbols = {pair: dict(meta) for pair, meta in self.symbols.items()}
+            for pair, meta in symbols.items():
+                meta["max_leverage"] = leverage.get(pair, (self.symbols.get(pair) or {}).get("max_leverage"))
+            changed = symbols != self.symbols
+            self.symbols = symbols
+            self.etag = etag
+            self.fetched_at = time.time()
+            if self.path:
+                try:
+                    self.save()
+                except OSError as e:
+                    structured_log.console(f"❌ [SYMBOL META] save failed: {e}", name="exchange_cache")
+            return changed
+
+    def ensure(self, fetch, pairs):
+        """
+        Startup: disk cache covering every pair → use it as is (stale entries are revalidated
+        by the background refresher); otherwise fetch now. Returns "cache" / "network".
+        """
+        if not self._loaded:
+            self.load()
+        if self.covers(pairs):
+            return "cache"
+        self.refresh(fetch, pairs)
+        return "network"
+
+    def start_refresh(self, fetch, pairs, on_update=None):
+        """Daemon thread: revalidate whenever the TTL runs out; on_update(symbols) after a change"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                wait = max(0.0, self.ttl - (time.time() - self.fetched_at))
+                if self._stop.wait(wait):
+                    return
+                try:
+                    if self.refresh(fetch, pairs) and on_update is not None:
+                        on_update(self.symbols)
+                except Exception as e:
+                    structured_log.console(f"❌ [SYMBOL META] refresh failed: {e}", name="exchange_cache")
+                if self._stop.wait(MIN_REFRESH_SECONDS):
+                    return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="symbol-meta-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
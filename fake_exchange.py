@@ -0,0 +1,417 @@
+# fake_exchange.py
+# In-process Binance USDT-M futures simulator - bot.py ကို account မလိုဘဲ real code path အတိုင်း run လို့ရအောင်
+# Recorded/synthetic 5m klines ပေါ်မှာ market fill, fee, funding, leverage, isolated liquidation
+
+import itertools
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+import structured_log
+from klines import load_klines, resample
+
+BASE_INTERVAL_MS = 5 * 60 * 1000
+FUNDING_INTERVAL_MS = 8 * 60 * 60 * 1000   # 00:00 / 08:00 / 16:00 UTC
+
+INTERVAL_MS = {
+    "1m": 60 * 1000, "3m": 3 * 60 * 1000, "5m": 5 * 60 * 1000, "15m": 15 * 60 * 1000,
+    "30m": 30 * 60 * 1000, "1h": 60 * 60 * 1000, "2h": 2 * 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000, "6h": 6 * 60 * 60 * 1000, "8h": 8 * 60 * 60 * 1000,
+    "12h": 12 * 60 * 60 * 1000, "1d": 24 * 60 * 60 * 1000,
+}
+
+
+class FakeExchangeError(Exception):
+    """Binance-style API error (code + message) - bot.py catches it like BinanceAPIException"""
+
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+def _fmt(value, decimals=8):
+    return f"{value:.{decimals}f}"
+
+
+class _Position:
+    __slots__ = ("amount", "entry_price", "isolated_margin", "realized_pnl")
+
+    def __init__(self):
+        self.amount = 0.0          # signed (one-way mode)
+        self.entry_price = 0.0
+        self.isolated_margin = 0.0
+        self.realized_pnl = 0.0
+
+
+class FakeBinanceClient:
+    """
+    Subset of python-binance Client used by bot.py (futures only):
+      futures_klines, futures_symbol_ticker, futures_ticker, futures_exchange_info, futures_ping,
+      futures_leverage_bracket, futures_change_leverage,
+      futures_change_margin_type, futures_create_order, futures_position_information,
+      futures_account_balance, futures_income_history
+    Market time comes from time_fn (epoch seconds). By default it is wall time replayed
+    from the first kline at `speed`x; set_time()/advance() switch to manual stepping.
+    Funding and liquidation are settled lazily, bar by bar, on every API call.
+    Margin is always accounted per position (isolated), which is how bot.py sets up futures.
+    """
+
+    def __init__(self, klines_by_pair, balance=500.0, taker_fee=0.0004, funding_rate=0.0001,
+                 maintenance_margin_rate=0.005, slippage_bps=1.0, max_leverage=20,
+                 symbol_filters=None, speed=1.0, start_ms=None, time_fn=None):
+        self.klines = klines_by_pair
+        self.balance = float(balance)
+        self.taker_fee = taker_fee
+        self.funding_rate = funding_rate
+        self.maintenance_margin_rate = maintenance_margin_rate
+        self.slippage = slippage_bps / 10000
+        self.max_leverage = max_leverage
+        self.symbol_filters = symbol_filters or {}
+        self.leverage = {pair: 20 for pair in klines_by_pair}
+        self.margin_type = {pair: "CROSSED" for pair in klines_by_pair}
+        self.positions = {pair: _Position() for pair in klines_by_pair}
+        self.income = []
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+        first = min(int(k["open_time"][0]) for k in klines_by_pair.values())
+        self.start_ms = start_ms if start_ms is not None else first + BASE_INTERVAL_MS
+        self._manual_ms = None
+        self.speed = speed
+        self._wall_start = time.time()
+        self._time_fn = time_fn
+        self._settled_ms = self.start_ms
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        """'SOLUSDT=data/sol_5m.csv,BTCUSDT=data/btc_5m.csv' → client"""
+        data = {}
+        for item in spec.split(","):
+            pair, _, path = item.strip().partition("=")
+            data[pair.upper()] = load_klines(path)
+        return cls(data, **kwargs)
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        FAKE_EXCHANGE_KLINES / _BALANCE / _SPEED / _START (epoch ms). bot.py's 1d EMA21 needs
+        21+ daily bars before _START (default start = first bar → pairs HOLD for the first 21 simulated days).
+        """
+        start = os.getenv("FAKE_EXCHANGE_START")
+        return cls.from_spec(
+            os.environ["FAKE_EXCHANGE_KLINES"],
+            balance=float(os.getenv("FAKE_EXCHANGE_BALANCE", "500")),
+            speed=float(os.getenv("FAKE_EXCHANGE_SPEED", "1")),
+            start_ms=int(start) if start else None,
+            **kwargs
+        )
+
+    @classmethod
+    def for_clock(cls, clock):
+        """
+        from_env for a bot / orchestrator clock: simulated → exchange time = clock time, and the
+        clock is moved to the first bar (run ends after the last one); wall clock → FAKE_EXCHANGE_SPEED.
+        """
+        if not clock.simulated:
+            return cls.from_env()
+        client = cls.from_env(time_fn=clock.time)
+        clock.set_time(client.start_ms / 1000, end=client.end_ms / 1000)
+        return client
+
+    # === CLOCK ===
+    def now_ms(self):
+        if self._time_fn is not None:
+            return int(self._time_fn() * 1000)
+        if self._manual_ms is not None:
+            return self._manual_ms
+        return int(self.start_ms + (time.time() - self._wall_start) * 1000 * self.speed)
+
+    @property
+    def end_ms(self):
+        """Close time of the last recorded bar (across all pairs)"""
+        return max(int(k["open_time"][-1]) for k in self.klines.values()) + BASE_INTERVAL_MS
+
+    def set_time(self, ms):
+        with self._lock:
+            self._manual_ms = int(ms)
+            self._settle()
+
+    def advance(self, seconds):
+        self.set_time(self.now_ms() + seconds * 1000)
+
+    def _bar_index(self, pair, ms=None):
+        """Latest base bar completed at ms (-1 = none)"""
+        k = self._series(pair)
+        ms = self.now_ms() if ms is None else ms
+        return int(np.searchsorted(k["open_time"] + BASE_INTERVAL_MS, ms, side="right")) - 1
+
+    def _series(self, pair):
+        k = self.klines.get(pair)
+        if k is None:
+            raise FakeExchangeError(-1121, "Invalid symbol.")
+        return k
+
+    def mark_price(self, pair):
+        i = self._bar_index(pair)
+        if i < 0:
+            raise FakeExchangeError(-1003, f"No market data for {pair} yet")
+        return float(self._series(pair)["close"][i])
+
+    # === SETTLEMENT (funding + liquidation) ===
+    def _settle(self):
+        now = self.now_ms()
+        if now <= self._settled_ms:
+            return
+        since = self._settled_ms
+        for pair, pos in self.positions.items():
+            if pos.amount == 0:
+                continue
+            k = self._series(pair)
+            close_times = k["open_time"] + BASE_INTERVAL_MS
+            lo = int(np.searchsorted(close_times, since, side="right"))
+            hi = int(np.searchsorted(close_times, now, side="right"))
+            if hi <= lo:
+                continue
+            liq = self._liquidation_price(pair, pos)
+            lows, highs = k["low"][lo:hi], k["high"][lo:hi]
+            hit = np.flatnonzero(lows <= liq) if pos.amount > 0 else np.flatnonzero(highs >= liq)
+            liq_time = int(close_times[lo + hit[0]]) if len(hit) else None
+            # Funding at each 8h boundary while the position is still open
+            first_funding = (since // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS
+            for ts in range(first_funding, now + 1, FUNDING_INTERVAL_MS):
+                if liq_time is not None and ts >= liq_time:
+                    break
+                j = int(np.searchsorted(close_times, ts, side="right")) - 1
+                price = float(k["close"][max(j, 0)])
+                payment = -pos.amount * price * self.funding_rate   # longs pay when the rate is positive
+                self.balance += payment
+                self.income.append({"symbol": pair, "incomeType": "FUNDING_FEE", "income": _fmt(payment), "asset": "USDT", "time": ts})
+            if liq_time is not None:
+                self._liquidate(pair, pos, liq, liq_time)
+        self._settled_ms = now
+
+    def _liquidation_price(self, pair, pos):
+        """Isolated margin: position ends when margin + unrealized PnL falls to maintenance margin"""
+        qty = abs(pos.amount)
+        if qty == 0:
+            return 0.0
+        mmr = self.maintenance_margin_rate
+        if pos.amount > 0:
+            return (pos.entry_price * qty - pos.isolated_margin) / (qty * (1 - mmr))
+        return (pos.entry_price * qty + pos.isolated_margin) / (qty * (1 + mmr))
+
+    def _liquidate(self, pair, pos, price, ts):
+        loss = -pos.isolated_margin
+        self.income.append({"symbol": pair, "incomeType": "REALIZED_PNL", "income": _fmt(loss), "asset": "USDT", "time": ts, "info": "LIQUIDATION"})
+        pos.realized_pnl += loss
+        self.balance += loss
+        pos.amount = 0.0
+        pos.entry_price = 0.0
+        pos.isolated_margin = 0.0
+        structured_log.console(f"💥 [FAKE EXCHANGE] {pair} liquidated @ {price:.4f}", level=logging.WARNING, name="fake_exchange")
+
+    # === ACCOUNT ===
+    def _available_balance(self):
+        used = sum(p.isolated_margin for p in self.positions.values())
+        return self.balance - used
+
+    def futures_account_balance(self, **params):
+        with self._lock:
+            self._settle()
+            unrealized = sum(self._unrealized(pair, pos) for pair, pos in self.positions.items())
+            return [{
+                "accountAlias": "FAKE", "asset": "USDT",
+                "balance": _fmt(self.balance), "crossWalletBalance": _fmt(self.balance),
+                "crossUnPnl": _fmt(unrealized), "availableBalance": _fmt(self._available_balance()),
+                "maxWithdrawAmount": _fmt(self._available_balance()), "updateTime": self.now_ms(),
+            }]
+
+    def futures_income_history(self, symbol=None, incomeType=None, **params):
+        with self._lock:
+            self._settle()
+            return [r for r in self.income
+                    if (symbol is None or r["symbol"] == symbol) and (incomeType is None or r["incomeType"] == incomeType)]
+
+    # === MARKET DATA ===
+    def futures_symbol_ticker(self, symbol, **params):
+        return {"symbol": symbol, "price": _fmt(self.mark_price(symbol)), "time": self.now_ms()}
+
+    def futures_ticker(self, symbol=None, **params):
+        """24hr rolling stats (symbol=None → every pair, like the bulk Binance call)"""
+        day = 24 * 60 * 60 * 1000 // BASE_INTERVAL_MS
+        tickers = []
+        for pair in ([symbol] if symbol else self.klines):
+            k = self._series(pair)
+            hi = self._bar_index(pair) + 1
+            if hi <= 0:
+                continue
+            lo = max(0, hi - day)
+            open_price, last = float(k["open"][lo]), float(k["close"][hi - 1])
+            volume = k["volume"][lo:hi]
+            tickers.append({
+                "symbol": pair, "lastPrice": _fmt(last), "openPrice": _fmt(open_price),
+                "highPrice": _fmt(k["high"][lo:hi].max()), "lowPrice": _fmt(k["low"][lo:hi].min()),
+                "priceChangePercent": _fmt((last / open_price - 1) * 100, 3),
+                "volume": _fmt(volume.sum()), "quoteVolume": _fmt((volume * k["close"][lo:hi]).sum()),
+                "closeTime": self.now_ms(),
+            })
+        return tickers[0] if symbol and tickers else tickers
+
+    def futures_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **params):
+        """Completed 5m bars up to now, resampled; the last bar may still be forming like on Binance"""
+        k = self._series(symbol)
+        step = INTERVAL_MS.get(interval)
+        if step is None or step < BASE_INTERVAL_MS:
+            raise FakeExchangeError(-1120, f"Invalid interval {interval} (fake exchange base is 5m)")
+        now = self.now_ms() if endTime is None else min(int(endTime), self.now_ms())
+        hi = self._bar_index(symbol, now) + 1
+        if startTime is not None:
+            lo = int(np.searchsorted(k["open_time"], int(startTime) // step * step))
+        else:
+            first_open = (int(k["open_time"][max(hi - 1, 0)]) // step - (limit - 1)) * step
+            lo = int(np.searchsorted(k["open_time"], first_open))
+        if hi <= lo:
+            return []
+        window = {name: arr[lo:hi] for name, arr in k.items()}
+        bars = window if step == BASE_INTERVAL_MS else resample(window, step)
+        rows = []
+        for i in range(len(bars["open_time"])):
+            open_time = int(bars["open_time"][i])
+            volume = float(bars["volume"][i])
+            close = float(bars["close"][i])
+            rows.append([
+                open_time, _fmt(bars["open"][i]), _fmt(bars["high"][i]), _fmt(bars["low"][i]),
+                _fmt(close), _fmt(volume), open_time + step - 1, _fmt(volume * close), 0,
+                _fmt(volume / 2), _fmt(volume * close / 2), "0",
+            ])
+        return rows[-limit:]
+
+    def futures_exchange_info(self, **params):
+        symbols = []
+        for pair in self.klines:
+            f = self.symbol_filters.get(pair, {})
+            symbols.append({
+                "symbol": pair, "pair": pair, "status": "TRADING", "contractType": "PERPETUAL",
+                "quoteAsset": "USDT", "marginAsset": "USDT",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": f.get("tickSize", "0.0100"), "minPrice": "0.0100", "maxPrice": "1000000"},
+                    {"filterType": "LOT_SIZE", "stepSize": f.get("stepSize", "0.001"), "minQty": f.get("minQty", "0.001"), "maxQty": "1000000"},
+                    {"filterType": "MIN_NOTIONAL", "notional": f.get("notional", "5")},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": self.now_ms(), "symbols": symbols}
+
+    def futures_ping(self, **params):
+        return {}
+
+    def futures_leverage_bracket(self, symbol=None, **params):
+        pairs = [symbol] if symbol else list(self.klines)
+        return [{"symbol": pair, "brackets": [{"bracket": 1, "initialLeverage": self.max_leverage,
+                                               "notionalCap": 1000000, "notionalFloor": 0}]} for pair in pairs]
+
+    # === TRADING ===
+    def futures_change_leverage(self, symbol, leverage, **params):
+        self._series(symbol)
+        leverage = int(leverage)
+        if not 1 <= leverage <= self.max_leverage:
+            raise FakeExchangeError(-4028, f"Leverage {leverage} is not valid")
+        with self._lock:
+            self.leverage[symbol] = leverage
+        return {"symbol": symbol, "leverage": leverage, "maxNotionalValue": "1000000"}
+
+    def futures_change_margin_type(self, symbol, marginType, **params):
+        self._series(symbol)
+        with self._lock:
+            if self.margin_type[symbol] == marginType:
+                raise FakeExchangeError(-4046, "No need to change margin type.")
+            if self.positions[symbol].amount != 0:
+                raise FakeExchangeError(-4048, "Margin type cannot be changed if there exists position.")
+            self.margin_type[symbol] = marginType
+        return {"code": 200, "msg": "success"}
+
+    def futures_create_order(self, symbol, side, type, quantity=None, reduceOnly=False, **params):
+        """MARKET orders only (bot.py never places resting orders)"""
+        if type != "MARKET":
+            raise FakeExchangeError(-1116, f"Order type {type} not supported by the fake exchange")
+        reduce_only = reduceOnly in (True, "true", "TRUE")
+        with self._lock:
+            self._settle()
+            pos = self.positions.get(symbol)
+            if pos is None:
+                raise FakeExchangeError(-1121, "Invalid symbol.")
+            qty = float(quantity)
+            if qty <= 0:
+                raise FakeExchangeError(-4003, "Quantity less than or equal to zero.")
+            sign = 1.0 if side == "BUY" else -1.0
+            if reduce_only:
+                if pos.amount == 0 or pos.amount * sign > 0:
+                    raise FakeExchangeError(-2022, "ReduceOnly Order is rejected.")
+                qty = min(qty, abs(pos.amount))
+
+            mark = self.mark_price(symbol)
+            price = mark * (1 + self.slippage * sign)
+            notional = qty * price
+            fee = notional * self.taker_fee
+            leverage = self.leverage[symbol]
+
+            closing = min(qty, abs(pos.amount)) if pos.amount * sign < 0 else 0.0
+            opening = qty - closing
+            realized = released = 0.0
+            if closing:
+                direction = 1.0 if pos.amount > 0 else -1.0
+                realized = (price - pos.entry_price) * closing * direction
+                released = pos.isolated_margin * closing / abs(pos.amount)
+            # Whole order is rejected if the opening part can't be margined (nothing is filled)
+            if opening > 0 and opening * price / leverage + fee > self._available_balance() + released + realized:
+                raise FakeExchangeError(-2019, "Margin is insufficient.")
+
+            if closing:
+                pos.isolated_margin -= released
+                pos.amount += sign * closing
+                pos.realized_pnl += realized
+                self.balance += realized
+                if pos.amount == 0:
+                    pos.entry_price = 0.0
+                    pos.isolated_margin = 0.0
+                self.income.append({"symbol": symbol, "incomeType": "REALIZED_PNL", "income": _fmt(realized), "asset": "USDT", "time": self.now_ms()})
+            if opening:
+                new_amount = pos.amount + sign * opening
+                pos.entry_price = (pos.entry_price * abs(pos.amount) + price * opening) / abs(new_amount)
+                pos.amount = new_amount
+                pos.isolated_margin += opening * price / leverage
+            self.balance -= fee
+            self.income.append({"symbol": symbol, "incomeType": "COMMISSION", "income": _fmt(-fee), "asset": "USDT", "time": self.now_ms()})
+
+            return {
+                "orderId": next(self._order_ids), "symbol": symbol, "status": "FILLED",
+                "side": side, "type": "MARKET", "positionSide": "BOTH", "reduceOnly": reduce_only,
+                "origQty": _fmt(qty, 3), "executedQty": _fmt(qty, 3), "avgPrice": _fmt(price),
+                "cumQuote": _fmt(notional), "updateTime": self.now_ms(),
+            }
+
+    def _unrealized(self, pair, pos):
+        if pos.amount == 0:
+            return 0.0
+        return (self.mark_price(pair) - pos.entry_price) * pos.amount
+
+    def futures_position_information(self, symbol=None, **params):
+        with self._lock:
+            self._settle()
+            out = []
+            for pair, pos in self.positions.items():
+                if symbol is not None and pair != symbol:
+                    continue
+                mark = self.mark_price(pair) if self._bar_index(pair) >= 0 else 0.0
+                out.append({
+                    "symbol": pair, "positionAmt": _fmt(pos.amount, 3), "entryPrice": _fmt(pos.entry_price),
+                    "markPrice": _fmt(mark), "unRealizedProfit": _fmt(self._unrealized(pair, pos) if mark else 0.0),
+                    "liquidationPrice": _fmt(self._liquidation_price(pair, pos)),
+                    "leverage": str(self.leverage[pair]), "marginType": self.margin_type[pair].lower(),
+                    "isolatedMargin": _fmt(pos.isolated_margin), "positionSide": "BOTH",
+                    "notional": _fmt(pos.amount * mark), "updateTime": self.now_ms(),
+                })
+            return out
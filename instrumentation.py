@@ -0,0 +1,124 @@
+# instrumentation.py
+# Trading cycle latency - stage တစ်ခုချင်း (REST fetch / LLM / order / history save) ဘယ်လောက်ကြာလဲ
+#   with self.latency.timer("stage", pair): ...      context manager
+#   @timed("stage")                                  bot method decorator (self.latency ကို သုံး)
+# Stage + pair တစ်ခုချင်း bounded sample window → p50/p95/p99, periodic + shutdown မှာ JSON dump
+# Wall latency ကို perf_counter နဲ့ တိုင်း (simulated clock မဟုတ်)
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+import structured_log
+
+ALL_PAIRS = "*"
+DEFAULT_FILE = "cycle_latency.json"
+
+
+class LatencyRecorder:
+    """Per (stage, pair) ring buffers of durations in ms; all pairs also go to (stage, "*")"""
+
+    def __init__(self, path=DEFAULT_FILE, dump_every=300.0, window=2048):
+        self.path = path
+        self.dump_every = dump_every
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+        if path:
+            atexit.register(self.dump)
+
+    @classmethod
+    def from_env(cls):
+        """LATENCY_FILE (empty = no dump) / LATENCY_DUMP_EVERY (seconds)"""
+        return cls(os.getenv("LATENCY_FILE", DEFAULT_FILE), float(os.getenv("LATENCY_DUMP_EVERY", "300")))
+
+    def observe(self, stage, ms, pair=None):
+        keys = [(stage, ALL_PAIRS)] if pair is None else [(stage, ALL_PAIRS), (stage, pair)]
+        with self._lock:
+            for key in keys:
+                bucket = self.samples.get(key)
+                if bucket is None:
+                    bucket = self.samples[key] = deque(maxlen=self.window)
+                bucket.append(ms)
+                self.counts[key] = self.counts.get(key, 0) + 1
+            due = self.path and time.monotonic() - self._last_dump >= self.dump_every
+        if due:
+            self.dump()
+
+    @contextmanager
+    def timer(self, stage, pair=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - started) * 1000, pair)
+
+    def snapshot(self):
+        """{stage: {pair: {"count", "p50", "p95", "p99", "max", "mean"}}} (ms, current window)"""
+        with self._lock:
+            items = [(key, np.fromiter(bucket, dtype=float), self.counts[key]) for key, bucket in self.samples.items()]
+        report = {}
+        for (stage, pair), values, count in sorted(items):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            report.setdefault(stage, {})[pair] = {
+                "count": count,
+                "p50": round(float(p50), 2),
+                "p95": round(float(p95), 2),
+                "p99": round(float(p99), 2),
+                "max": round(float(values.max()), 2),
+                "mean": round(float(values.mean()), 2),
+            }
+        return report
+
+    def dump(self):
+        if not self.path or not self.samples:
+            return
+        self._last_dump = time.monotonic()
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"ts": time.time(), "stages": self.snapshot()}, f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            structured_log.console(f"❌ [LATENCY] dump failed: {e}", name="instrumentation")
+
+    def summary_lines(self):
+        """Dashboard အတွက် stage တစ်ကြောင်းစီ (all pairs)"""
+        return [
+            f"{stage:<24} n={stats[ALL_PAIRS]['count']:<6} p50 {stats[ALL_PAIRS]['p50']:>8.1f}ms  "
+            f"p95 {stats[ALL_PAIRS]['p95']:>8.1f}ms  p99 {stats[ALL_PAIRS]['p99']:>8.1f}ms"
+            for stage, stats in self.snapshot().items()
+        ]
+
+
+def timed(stage):
+    """
+    Decorator for bot.py methods: times the call into self.latency under `stage`,
+    keyed by the `pair` argument when the function has one. No recorder → plain call.
+    """
+    def decorator(fn):
+        params = list(inspect.signature(fn).parameters)
+        pair_pos = params.index("pair") if "pair" in params else None
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            recorder = getattr(self, "latency", None)
+            if recorder is None:
+                return fn(self, *args, **kwargs)
+            pair = kwargs.get("pair")
+            if pair is None and pair_pos is not None and len(args) >= pair_pos:
+                pair = args[pair_pos - 1]
+            with recorder.timer(stage, pair):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,55 @@
+# klines.py
+# Local kline file loader + resampler (backtest / fake exchange တို့ အတူတူ သုံး)
+
+import csv
+import json
+
+import numpy as np
+
+
+# === DATA LOADING ===
+def load_klines(path):
+    """
+    Local klines → {"open_time", "open", "high", "low", "close", "volume"} numpy arrays
+    CSV: Binance kline dump (header optional) | JSON: futures_klines() list
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [r for r in csv.reader(f) if r and r[0].strip().lstrip("-").isdigit()]
+    if not rows:
+        raise ValueError(f"No klines in {path}")
+
+    raw = np.array([[float(v) for v in r[:6]] for r in rows])
+    open_time = raw[:, 0].astype(np.int64)
+    if open_time[0] > 10 ** 14:  # newer Binance dumps are in microseconds
+        open_time //= 1000
+    order = np.argsort(open_time, kind="stable")
+    open_time = open_time[order]
+    keep = np.r_[True, open_time[1:] != open_time[:-1]]
+    raw = raw[order][keep]
+    return {
+        "open_time": open_time[keep],
+        "open": raw[:, 1],
+        "high": raw[:, 2],
+        "low": raw[:, 3],
+        "close": raw[:, 4],
+        "volume": raw[:, 5],
+    }
+
+
+def resample(klines, interval_ms):
+    """Base klines → higher timeframe OHLCV (bucket by open_time)"""
+    bucket = klines["open_time"] // interval_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    return {
+        "open_time": bucket[starts] * interval_ms,
+        "open": klines["open"][starts],
+        "high": np.maximum.reduceat(klines["high"], starts),
+        "low": np.minimum.reduceat(klines["low"], starts),
+        "close": klines["close"][ends],
+        "volume": np.add.reduceat(klines["volume"], starts),
+    }
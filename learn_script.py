@@ -1,19 +1,26 @@
 # learn_script.py
+import logging
 import os
-import json
-import time
-from data_collector import log_trade_for_ml
+import structured_log
 from ml_predictor import SLPredictor
+from pattern_index import MistakePatternIndex, market_context
+from learning_memory import LearningMemory
+from sim_clock import SystemClock
 
 class SelfLearningAITrader:
-    def __init__(self):
-        # === FILES ===
-        self.mistakes_history_file = "ai_trading_mistakes.json"
-        self.learned_patterns_file = "ai_learned_patterns.json"
+    def __init__(self, clock=None, state_dir=""):
+        # === CLOCK (simulation မှာ SimulatedClock inject) ===
+        self.clock = clock or SystemClock()
         
-        # === LOAD HISTORY ===
-        self.mistakes_history = self.load_mistakes_history()
-        self.learned_patterns = self.load_learned_patterns()
+        # === FILES (state_dir = orchestrator trader တစ်ခုချင်းရဲ့ folder, "" = working dir) ===
+        self.mistakes_history_file = os.path.join(state_dir, "ai_trading_mistakes.json")   # legacy (migrated once)
+        self.learning_memory_file = os.path.join(state_dir, "ai_learning_memory.jsonl")
+        self.pattern_index_file = os.path.join(state_dir, "ai_pattern_index.json")
+        
+        # === LOAD HISTORY (bounded ring buffer + decayed aggregates) ===
+        self.learning_memory = LearningMemory(self.learning_memory_file, legacy_path=self.mistakes_history_file)
+        self.mistakes_history = self.learning_memory.recent
+        self.learned_patterns = self.learning_memory.aggregates
         
         # === STATS ===
         self.performance_stats = {
@@ -27,40 +34,22 @@ class SelfLearningAITrader:
         # === CONFIG ===
         self.learning_config = {
             'confidence_threshold': 0.7,
-            'min_trades_to_learn': 3
+            'min_trades_to_learn': 3,
+            'avoid_loss_rate': 0.6,         # setup ရဲ့ decayed loss rate ဒီထက်များရင် block
+            'pattern_half_life_days': 14
         }
         
+        # === SETUP → OUTCOME INDEX ===
+        self.pattern_index = MistakePatternIndex(self.pattern_index_file, self.learning_config['pattern_half_life_days'])
+        
         # === ML PREDICTOR ===
         self.ml_predictor = SLPredictor()
-        print(f"[AI] Self-Learning System Ready | Mistakes: {len(self.mistakes_history)} | Patterns: {len(self.learned_patterns)}")
-    
-    def load_mistakes_history(self):
-        try:
-            if os.path.exists(self.mistakes_history_file):
-                with open(self.mistakes_history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except: pass
-        return []
+        structured_log.console(f"🧠 [AI] Self-Learning System Ready | Mistakes: {self.total_mistakes} | Patterns: {len(self.learned_patterns)} | Setups: {len(self.pattern_index)}", name="learn_script")
     
-    def save_mistakes_history(self):
-        try:
-            with open(self.mistakes_history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.mistakes_history, f, indent=2, ensure_ascii=False)
-        except: pass
-
-    def load_learned_patterns(self):
-        try:
-            if os.path.exists(self.learned_patterns_file):
-                with open(self.learned_patterns_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except: pass
-        return {}
-
-    def save_learned_patterns(self):
-        try:
-            with open(self.learned_patterns_file, 'w', encoding='utf-8') as f:
-                json.dump(self.learned_patterns, f, indent=2, ensure_ascii=False)
-        except: pass
+    @property
+    def total_mistakes(self):
+        """Lifetime count (ring buffer က နောက်ဆုံး N ခုပဲ ကိုင်ထား)"""
+        return self.learning_memory.total
 
     def analyze_trade_mistake(self, trade_data):
         """အမှား အမျိုးအစား ခွဲခြားမယ်"""
@@ -95,14 +84,15 @@ class SelfLearningAITrader:
             "mistake_type": mistake_type,
             "lesson_learned": lesson,
             "avoidance_strategy": avoidance,
-            "trade_data": trade_data,
+            "trade_data": dict(trade_data),
             "pnl": trade_data["pnl"],
             "loss_percent": round(loss_pct, 2),
-            "timestamp": time.time()
+            "timestamp": self.clock.time()
         }
 
     def learn_from_mistake(self, trade_data, market_data=None, force_mistake=None):
         """
+        Returns is_mistake (caller က ml_training_data.csv row တစ်ခုတည်း ထဲ ထည့်ရေး)
         force_mistake: True/False/None
             - True  → လူက အတင်း အမှား လို့ သတ်မှတ်
             - False → လူက မဟုတ်ဘူး လို့ သတ်မှတ်
@@ -111,6 +101,9 @@ class SelfLearningAITrader:
         if market_data is None:
             market_data = {}
         
+        # === WIN/LOSS ကို setup index ထဲ အမြဲ မှတ် ===
+        self.record_trade_pattern(trade_data)
+        
         close_reason = trade_data.get("close_reason", "")
         is_sl_hit = "STOP_LOSS" in close_reason.upper() if close_reason else False
         
@@ -120,67 +113,81 @@ class SelfLearningAITrader:
         else:
             is_mistake = force_mistake if force_mistake is not None else (trade_data.get("pnl", 0) < 0)
         
-        # === DATA LOG FOR ML TRAINING ===
-        log_trade_for_ml(trade_data, market_data, is_mistake=is_mistake)
-        
         # === အမှား မဟုတ်ရင် skip ===
         if not is_mistake:
-            print(f"[LEARN] SL hit but NOT a mistake → Skipping learning")
-            return
+            structured_log.console("🧠 [LEARN] SL hit but NOT a mistake → Skipping learning", level=logging.DEBUG, name="learn_script")
+            return is_mistake
         
-        print(f"[LEARN] Confirmed mistake → Analyzing...")
+        structured_log.console("🧠 [LEARN] Confirmed mistake → Analyzing...", level=logging.DEBUG, name="learn_script")
         
         # === အမှား ခွဲခြားပြီး သင်ယူမယ် ===
         analysis = self.analyze_trade_mistake(trade_data)
         if analysis:
-            self.mistakes_history.append(analysis)
-            self.update_learned_patterns(analysis)
-            self.save_mistakes_history()
-            self.save_learned_patterns()
-            print(f"[LEARN] Lesson saved: {analysis['lesson_learned']}")
+            self.learning_memory.add(analysis)   # ring buffer + aggregates + 1 appended line
+            structured_log.console(f"📚 [LEARN] Lesson saved: {analysis['lesson_learned']}", name="learn_script")
+        return is_mistake
+
+    def record_trade_pattern(self, trade_data):
+        """Full close တိုင်း entry setup + ရလဒ် ကို index ထဲ ထည့်"""
+        context = trade_data.get("entry_context")
+        if not context or trade_data.get("partial_percent", 100) < 100:
+            return
+        self.pattern_index.record(
+            trade_data.get("pair", "UNKNOWN"),
+            trade_data["direction"],
+            context,
+            trade_data.get("pnl_percent", 0.0),
+            ts=trade_data.get("close_timestamp") or self.clock.time()
+        )
+        self.pattern_index.save()
 
-    def update_learned_patterns(self, analysis):
-        """Pattern တွေ မှတ်မိအောင် လုပ်မယ်"""
-        mistake_type = analysis["mistake_type"]
-        if mistake_type not in self.learned_patterns:
-            self.learned_patterns[mistake_type] = {
-                "count": 0,
-                "total_loss": 0,
-                "avoidance": analysis["avoidance_strategy"]
-            }
-        self.learned_patterns[mistake_type]["count"] += 1
-        self.learned_patterns[mistake_type]["total_loss"] += abs(analysis["pnl"])
+    def rebuild_pattern_index(self, trade_history):
+        """Index ဖိုင် မရှိသေးရင် trade history ကနေ တစ်ခါတည်း ပြန်တည်ဆောက်"""
+        now = self.clock.time()
+        records = [
+            (t.get("pair", "UNKNOWN"), t["direction"], t["entry_context"], t.get("pnl_percent", 0.0), t.get("close_timestamp", now))
+            for t in trade_history
+            if t.get("entry_context") and t.get("partial_percent", 100) >= 100
+        ]
+        if records:
+            self.pattern_index.rebuild(records, now=now)
+            self.pattern_index.save()
+            structured_log.console(f"🧠 [AI] Pattern index rebuilt from {len(records)} trades | Setups: {len(self.pattern_index)}", name="learn_script")
 
     def should_avoid_trade(self, ai_decision, market_data):
-        """AI ရဲ့ decision ကို သင်ယူထားတဲ့ pattern နဲ့ စစ်မယ်"""
+        """AI ရဲ့ decision ကို လက်ရှိ market setup ရဲ့ သမိုင်း loss rate / expectancy နဲ့ စစ်မယ်"""
         if ai_decision["decision"] in ["HOLD", "REVERSE_LONG", "REVERSE_SHORT"]:
             return False
         
         direction = ai_decision["decision"]
         pair = ai_decision.get("pair", "UNKNOWN")
-        
-        # ဥပမာ: LONG လုပ်မယ်ဆို → အရင် LONG မှာ အမှားများလား?
-        pattern_key = f"{direction} stopped out"
-        if pattern_key in self.learned_patterns:
-            pattern = self.learned_patterns[pattern_key]
-            if pattern["count"] >= 3:
-                print(f"[BLOCK] Avoiding {direction} on {pair} - Known mistake pattern ({pattern['count']} times)")
-                return True
+        context = ai_decision.get("market_context") or market_context(market_data)
+        
+        stats = self.pattern_index.lookup(pair, direction, context, min_evidence=self.learning_config['min_trades_to_learn'], now=self.clock.time())
+        if stats and stats["loss_rate"] >= self.learning_config['avoid_loss_rate'] and stats["expectancy"] < 0:
+            structured_log.console(f"🚫 [BLOCK] Avoiding {direction} on {pair} - {stats['key']} | "
+                                   f"Loss rate {stats['loss_rate']:.0%} | Expectancy {stats['expectancy']:+.2f}% | n={stats['evidence']:.1f}",
+                                   name="learn_script")
+            return True
         return False
 
     def get_learning_enhanced_prompt(self, pair, market_data):
         """AI Prompt ထဲ သင်ယူထားတာ ထည့်ပေးမယ်"""
-        if not self.mistakes_history:
+        if self.total_mistakes == 0:
             return ""
         
-        recent = self.mistakes_history[-3:]
+        # အကုန်လုံးကို pattern အလိုက် အကျဉ်းချုပ် (recent ပိုအလေးထား)
         lessons = []
-        for m in recent:
-            lessons.append(f"- {m['lesson_learned']} (Loss: ${abs(m['pnl']):.2f})")
+        for row in self.learning_memory.summary(limit=5, now=self.clock.time()):
+            lessons.append(f"- {row['mistake_type']}: {row['count']}x (recent weight {row['weight']:.1f}, avg loss ${row['avg_loss']:.2f}) → {row['avoidance'] or row['lesson']}")
+        
+        latest = self.mistakes_history[-1] if self.mistakes_history else None
+        latest_text = f"Latest: {latest['lesson_learned']} (Loss: ${abs(latest['pnl']):.2f})" if latest else ""
         
         return f"""
-LEARNING CONTEXT (from {len(self.mistakes_history)} past mistakes):
+LEARNING CONTEXT (from {self.total_mistakes} past mistakes):
 {chr(10).join(lessons)}
+{latest_text}
 Apply these lessons to avoid repeating errors.
 """
 
@@ -191,7 +198,7 @@ Apply these lessons to avoid repeating errors.
         
         win_rate = self.performance_stats['winning_trades'] / self.performance_stats['total_trades']
         if win_rate < 0.4:
-            print(f"[ADAPT] Win rate low ({win_rate:.1%}) → Increasing caution")
+            structured_log.console(f"⚠️ [ADAPT] Win rate low ({win_rate:.1%}) → Increasing caution", name="learn_script")
             # ဥပမာ: position size လျှော့မယ်
         elif win_rate > 0.7:
-            print(f"[ADAPT] Win rate high ({win_rate:.1%}) → Increasing confidence")
+            structured_log.console(f"📈 [ADAPT] Win rate high ({win_rate:.1%}) → Increasing confidence", name="learn_script")
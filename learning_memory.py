@@ -0,0 +1,153 @@
+# learning_memory.py
+# Bounded learning memory - နောက်ဆုံး mistake တွေကို ring buffer, သမိုင်းအကုန်ကို decayed aggregate
+
+import json
+import os
+import time
+from collections import deque
+
+import structured_log
+
+DEFAULT_CAPACITY = 200
+DEFAULT_HALF_LIFE_DAYS = 14.0
+
+# Disk ပေါ်/ring buffer ထဲ သိမ်းမယ့် field တွေ (trade_data အပြည့်အစုံ မသိမ်း)
+_ENTRY_FIELDS = ("mistake_type", "lesson_learned", "avoidance_strategy", "pnl", "loss_percent", "timestamp", "pair", "direction")
+
+
+class LearningMemory:
+    """
+    Append-only JSON-lines log:
+      {"snapshot": {...}}  ← compaction point (aggregates, total count, ring buffer)
+      {"mistake_type": ...} ← one line per confirmed mistake since the snapshot
+    The log is compacted once 2×capacity entries follow the snapshot, so file size, RAM
+    and save cost stay constant however long the bot runs.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, half_life_days=DEFAULT_HALF_LIFE_DAYS, legacy_path=None):
+        self.path = path
+        self.capacity = capacity
+        self.half_life = half_life_days * 86400
+        self.recent = deque(maxlen=capacity)
+        self.aggregates = {}   # mistake_type → decayed + lifetime stats
+        self.total = 0
+        self._entries_since_snapshot = 0
+        self.load()
+        if self.total == 0 and legacy_path:
+            self._migrate_legacy(legacy_path)
+
+    # === AGGREGATES ===
+    def _decay_factor(self, age):
+        return 0.5 ** (age / self.half_life) if age > 0 else 1.0
+
+    def _fold(self, entry):
+        mistake_type = entry.get("mistake_type", "UNKNOWN")
+        ts = entry.get("timestamp") or time.time()
+        loss = abs(entry.get("pnl", 0))
+        agg = self.aggregates.get(mistake_type)
+        if agg is None:
+            agg = self.aggregates[mistake_type] = {
+                "count": 0, "total_loss": 0.0, "weight": 0.0, "decayed_loss": 0.0,
+                "last_ts": ts, "lesson": "", "avoidance": ""
+            }
+        factor = self._decay_factor(ts - agg["last_ts"])
+        agg["weight"] = agg["weight"] * factor + 1.0
+        agg["decayed_loss"] = agg["decayed_loss"] * factor + loss
+        agg["last_ts"] = max(agg["last_ts"], ts)
+        agg["count"] += 1
+        agg["total_loss"] += loss
+        agg["lesson"] = entry.get("lesson_learned") or agg["lesson"]
+        agg["avoidance"] = entry.get("avoidance_strategy") or agg["avoidance"]
+        self.total += 1
+        self.recent.append(entry)
+
+    # === WRITE ===
+    def add(self, analysis):
+        """Confirmed mistake တစ်ခု - memory update + log ထဲ line တစ်ကြောင်းပဲ ထပ်ရေး"""
+        trade = analysis.get("trade_data", {})
+        entry = {k: analysis.get(k) for k in _ENTRY_FIELDS if analysis.get(k) is not None}
+        entry.setdefault("pair", trade.get("pair"))
+        entry.setdefault("direction", trade.get("direction"))
+        entry.setdefault("timestamp", time.time())
+        self._fold(entry)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+            self._entries_since_snapshot += 1
+            if self._entries_since_snapshot >= 2 * self.capacity:
+                self.compact()
+        except Exception as e:
+            structured_log.console(f"❌ [LEARN] Memory append failed: {e}", name="learning_memory")
+        return entry
+
+    def compact(self):
+        """Snapshot + ring buffer ထဲ ရှိတာပဲ ပြန်ရေး (atomic replace)"""
+        tmp_path = self.path + ".tmp"
+        snapshot = {"total": self.total, "aggregates": self.aggregates, "recent": list(self.recent)}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"snapshot": snapshot}, separators=(",", ":"), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._entries_since_snapshot = 0
+
+    # === READ ===
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "snapshot" in record:
+                        snap = record["snapshot"]
+                        self.aggregates = snap.get("aggregates", {})
+                        self.total = snap.get("total", 0)
+                        self.recent.clear()
+                        self.recent.extend(snap.get("recent", []))
+                        self._entries_since_snapshot = 0
+                    else:
+                        self._fold(record)
+                        self._entries_since_snapshot += 1
+        except Exception as e:
+            structured_log.console(f"❌ [LEARN] Memory load failed: {e}", name="learning_memory")
+
+    def _migrate_legacy(self, legacy_path):
+        """အဟောင်း ai_trading_mistakes.json (list အပြည့်) → log format"""
+        try:
+            if not os.path.exists(legacy_path):
+                return
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            for analysis in legacy:
+                trade = analysis.get("trade_data", {})
+                entry = {k: analysis.get(k) for k in _ENTRY_FIELDS if analysis.get(k) is not None}
+                entry.setdefault("pair", trade.get("pair"))
+                entry.setdefault("direction", trade.get("direction"))
+                self._fold(entry)
+            if legacy:
+                self.compact()
+                structured_log.console(f"📦 [LEARN] Migrated {len(legacy)} mistakes from {legacy_path}", name="learning_memory")
+        except Exception as e:
+            structured_log.console(f"❌ [LEARN] Legacy migration failed: {e}", name="learning_memory")
+
+    def summary(self, limit=5, now=None):
+        """Decayed weight အများဆုံး pattern တွေ (recent mistakes ပိုအလေးထား)"""
+        now = now if now is not None else time.time()
+        rows = []
+        for mistake_type, agg in self.aggregates.items():
+            factor = self._decay_factor(now - agg["last_ts"])
+            rows.append({
+                "mistake_type": mistake_type,
+                "count": agg["count"],
+                "weight": agg["weight"] * factor,
+                "avg_loss": agg["total_loss"] / agg["count"] if agg["count"] else 0.0,
+                "lesson": agg["lesson"],
+                "avoidance": agg["avoidance"],
+            })
+        rows.sort(key=lambda r: r["weight"], reverse=True)
+        return rows[:limit]
+
+    def __len__(self):
+        return self.total
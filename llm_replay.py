@@ -0,0 +1,95 @@
+# llm_replay.py
+# LLM record/replay - live run မှာ prompt → response ကို မှတ်ထား၊ backtest/test မှာ network မသုံးဘဲ ပြန်ထုတ်
+#   LLM_REPLAY_MODE=off     (default) ဘာမှ မလုပ်
+#   LLM_REPLAY_MODE=record  live response တိုင်းကို store ထဲ ထည့်
+#   LLM_REPLAY_MODE=replay  store ထဲကပဲ ပြန်ထုတ် (miss → caller က fallback decision သုံး)
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (OFF, RECORD, REPLAY)
+
+DEFAULT_STORE = "llm_replay.jsonl"
+
+
+def prompt_key(payload):
+    """
+    Request payload (model + messages + sampling params) → stable SHA-256 key.
+    Any change in the prompt text (price, budget, learning context) is a different key.
+    """
+    canonical = json.dumps(
+        {k: payload.get(k) for k in ("model", "messages", "temperature", "max_tokens")},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMReplayStore:
+    """Append-only JSON-lines store: {"key", "model", "response", "ts"} per recorded call"""
+
+    def __init__(self, path=DEFAULT_STORE, mode=OFF):
+        if mode not in MODES:
+            raise ValueError(f"LLM replay mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.responses = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if mode != OFF:
+            self.load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv("LLM_REPLAY_FILE", DEFAULT_STORE), os.getenv("LLM_REPLAY_MODE", OFF).strip().lower() or OFF)
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    @property
+    def recording(self):
+        return self.mode == RECORD
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.responses[entry["key"]] = entry["response"]
+
+    def lookup(self, payload):
+        """Recorded response text for this request, or None (counted as a miss)"""
+        response = self.responses.get(prompt_key(payload))
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response
+
+    def record(self, payload, response):
+        if not self.recording:
+            return
+        key = prompt_key(payload)
+        entry = {"key": key, "model": payload.get("model"), "response": response, "ts": time.time()}
+        with self._lock:
+            self.responses[key] = response
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def stats(self):
+        return {"mode": self.mode, "stored": len(self.responses), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self.responses)
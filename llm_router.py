@@ -0,0 +1,292 @@
+# llm_router.py
+# Multi-model LLM router - model တစ်ခုချင်း latency / error profile ထား၊ အမြန်ဆုံး model ကို အရင်ပို့
+# ပထမ request က p90 latency အတွင်း မဖြေရင် alternate model ဆီ hedged request ထပ်ပို့၊ valid JSON အရင်ရတာ ယူ
+#   LLM_MODELS=deepseek/deepseek-chat-v3.1[,alt/model,...]   (model တစ်ခုတည်းဆို hedge ကို အဲဒီ model ဆီပဲ ပို့)
+#   LLM_URL=https://openrouter.ai/api/v1/chat/completions   LLM_TIMEOUT=20 (decision တစ်ခုလုံးရဲ့ deadline, sec)
+#   LLM_HEDGE_AFTER=  (sec, empty = primary model ရဲ့ p90)
+#   LLM_STREAM=1 (default) - SSE stream ဖတ်ပြီး decision JSON object ပိတ်တာနဲ့ connection ပိတ်၊ ပုံမမှန်ရင် ချက်ချင်း reject
+# Tests (local stub server): python -m pytest test_llm_router.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+DEFAULT_URL = "https://openrouter.ai/api/v1/chat/completions"
+DEFAULT_MODELS = "deepseek/deepseek-chat-v3.1"
+MAX_PREAMBLE = 400      # chars of prose allowed before the JSON object opens
+MAX_OBJECT = 4000       # chars allowed inside it
+
+
+class LLMRouterError(Exception):
+    """Every model failed or nothing valid arrived before the deadline"""
+
+    def __init__(self, message, kind="failed"):
+        super().__init__(message)
+        self.kind = kind
+
+
+class JSONObjectStream:
+    """
+    Incremental scanner for the first top-level JSON object in streamed text (brace depth,
+    string / escape aware). feed(text) → the object's text once its closing brace arrives,
+    None until then; ValueError as soon as the reply can't hold a decision.
+    """
+
+    def __init__(self, max_preamble=MAX_PREAMBLE, max_object=MAX_OBJECT):
+        self.max_preamble = max_preamble
+        self.max_object = max_object
+        self.preamble = 0
+        self.chars = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def feed(self, text):
+        for ch in text:
+            if self.depth == 0:
+                if ch != '{':
+                    self.preamble += 1
+                    if self.preamble > self.max_preamble:
+                        raise ValueError(f"no JSON object within {self.max_preamble} chars")
+                    continue
+            self.chars.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                self.depth += 1
+            elif ch == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    obj = "".join(self.chars)
+                    json.loads(obj)  # malformed → ValueError now, not after the rest of the reply
+                    return obj
+            if len(self.chars) > self.max_object:
+                raise ValueError(f"JSON object longer than {self.max_object} chars")
+        return None
+
+
+def first_json_object(text):
+    """First complete top-level JSON object in text, or None (malformed / missing)"""
+    try:
+        return JSONObjectStream(max_preamble=len(text or ""), max_object=len(text or "")).feed(text or "")
+    except ValueError:
+        return None
+
+
+def valid_json(content):
+    """Default validator: the reply contains a parseable JSON object"""
+    return first_json_object(content) is not None
+
+
+class ModelProfile:
+    """Recent successful latencies + decayed error rate for one model"""
+
+    def __init__(self, name, window=50, default_p90=8.0):
+        self.name = name
+        self.latencies = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.default_p90 = default_p90
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            self.error_rate = self.error_rate * 0.8 + (0.0 if ok else 0.2)
+            if ok:
+                self.latencies.append(seconds)
+            else:
+                self.errors += 1
+
+    def percentile(self, q):
+        with self._lock:
+            values = sorted(self.latencies)
+        if not values:
+            return self.default_p90 if q >= 0.9 else self.default_p90 / 2
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def score(self):
+        """Lower is better: median latency inflated by recent errors; never-called models go first (explore once)"""
+        if self.calls == 0:
+            return 0.0
+        return self.percentile(0.5) * (1 + 4 * self.error_rate)
+
+
+class LLMRouter:
+    def __init__(self, models, api_key="", url=DEFAULT_URL, timeout=20.0, hedge_after=None,
+                 min_hedge=0.5, headers=None, metrics=None, stream=True, max_workers=None):
+        self.models = list(models)
+        self.api_key = api_key
+        self.url = url
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.min_hedge = min_hedge
+        self.headers = headers or {}
+        self.metrics = metrics
+        self.stream = stream
+        self.profiles = {model: ModelProfile(model) for model in self.models}
+        self.session = requests.Session()
+        if max_workers:
+            # Shared by several traders (orchestrator) - keep-alive pool as wide as the request pool
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        # Losing requests can't be cancelled mid-flight - they finish in the background and still update the profile
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or max(4, 2 * len(self.models)), thread_name_prefix="llm")
+
+    @staticmethod
+    def declare_metrics(metrics):
+        """The counters _count increments (bot registry and the orchestrator's shared one)"""
+        metrics.counter("llm_calls_total", "LLM requests sent")
+        metrics.counter("llm_errors_total", "Failed LLM requests by kind")
+        metrics.counter("llm_hedges_total", "Hedged LLM requests sent after the primary passed its p90")
+        metrics.counter("llm_stream_cut_total", "Streamed LLM replies closed as soon as the decision object was complete")
+
+    @classmethod
+    def from_env(cls, api_key="", **kwargs):
+        hedge = os.getenv("LLM_HEDGE_AFTER")
+        return cls(
+            [m.strip() for m in os.getenv("LLM_MODELS", DEFAULT_MODELS).split(",") if m.strip()],
+            api_key=api_key,
+            url=os.getenv("LLM_URL", DEFAULT_URL),
+            timeout=float(os.getenv("LLM_TIMEOUT", "20")),
+            hedge_after=float(hedge) if hedge else None,
+            stream=os.getenv("LLM_STREAM", "1").lower() not in ("0", "false", "no", "off"),
+            **kwargs
+        )
+
+    def ranked(self):
+        """Models fastest-first by profile score (config order breaks ties)"""
+        return sorted(self.models, key=lambda m: self.profiles[m].score())
+
+    def _count(self, name, **labels):
+        if self.metrics is not None:
+            self.metrics.inc(name, **labels)
+
+    def _read_stream(self, model, response, deadline):
+        """
+        SSE chunks → the decision object. Returns as soon as it closes; the caller closes the
+        response, so the rest of the completion is never read (that connection isn't reused).
+        """
+        parser = JSONObjectStream()
+        text = []
+        for line in response.iter_lines(chunk_size=None):
+            if time.monotonic() > deadline:
+                raise requests.exceptions.Timeout()
+            line = line.decode("utf-8")
+            if not line.startswith("data:"):
+                continue  # keep-alive / ": OPENROUTER PROCESSING" comments
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise LLMRouterError(f"{model}: {chunk['error'].get('message', chunk['error'])}", kind="stream_error")
+            delta = ((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content") or ""
+            text.append(delta)
+            try:
+                obj = parser.feed(delta)
+            except ValueError as e:
+                raise LLMRouterError(f"{model}: {e}", kind="invalid_json")
+            if obj is not None:
+                self._count("llm_stream_cut_total")
+                return obj
+        return "".join(text).strip()  # ended without a complete object → validate rejects it
+
+    def _call(self, model, payload, deadline, validate):
+        body = dict(payload, model=model)
+        if self.stream:
+            body["stream"] = True
+        headers = dict(self.headers)
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, headers=headers, json=body, stream=self.stream,
+                                         timeout=max(0.1, deadline - time.monotonic()))
+            try:
+                if response.status_code != 200:
+                    raise LLMRouterError(f"{model}: HTTP {response.status_code}", kind=f"http_{response.status_code}")
+                # Servers that ignore "stream" answer with a plain JSON body
+                if "text/event-stream" in response.headers.get("Content-Type", ""):
+                    content = self._read_stream(model, response, deadline)
+                else:
+                    content = response.json()['choices'][0]['message']['content'].strip()
+            finally:
+                response.close()
+            if not validate(content):
+                raise LLMRouterError(f"{model}: reply without valid JSON", kind="invalid_json")
+        except LLMRouterError as e:
+            self.profiles[model].record(time.perf_counter() - started, False)
+            self._count("llm_errors_total", kind=e.kind)
+            raise
+        except requests.exceptions.Timeout:
+            self.profiles[model].record(time.perf_counter() - started, False)
+            self._count("llm_errors_total", kind="timeout")
+            raise LLMRouterError(f"{model}: timeout", kind="timeout")
+        except Exception as e:
+            self.profiles[model].record(time.perf_counter() - started, False)
+            self._count("llm_errors_total", kind=type(e).__name__)
+            raise LLMRouterError(f"{model}: {e}", kind=type(e).__name__)
+        seconds = time.perf_counter() - started
+        self.profiles[model].record(seconds, True)
+        return content, model, seconds
+
+    def complete(self, payload, validate=valid_json):
+        """
+        payload = chat/completions body (model is filled per request).
+        Returns (content, model, seconds) of the first valid reply; raises LLMRouterError.
+        """
+        deadline = time.monotonic() + self.timeout
+        order = self.ranked()
+        queue = order[1:] or order[:1]   # hedge / replacement targets (single model → itself)
+        hedge_delay = self.hedge_after if self.hedge_after is not None else self.profiles[order[0]].percentile(0.9)
+        hedge_at = time.monotonic() + min(max(hedge_delay, self.min_hedge), self.timeout)
+        self._count("llm_calls_total")
+
+        pending = {self._pool.submit(self._call, order[0], payload, deadline, validate)}
+        launched = 1
+        errors = []
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            hedging = launched == 1 and queue
+            timeout = (hedge_at if hedging else deadline) - now
+            done, pending = wait(pending, timeout=max(0.0, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except LLMRouterError as e:
+                    errors.append(str(e))
+            # Hedge after p90 with no answer, or replace a failed request right away
+            if (not done and hedging) or (done and not pending):
+                if launched > len(self.models) + 1:
+                    break
+                model = queue[(launched - 1) % len(queue)]
+                if not done:
+                    self._count("llm_hedges_total")
+                pending.add(self._pool.submit(self._call, model, payload, deadline, validate))
+                launched += 1
+        if pending:
+            raise LLMRouterError(f"no valid reply within {self.timeout:.0f}s ({'; '.join(errors) or 'all pending'})", kind="deadline")
+        raise LLMRouterError("; ".join(errors) or "no models configured")
+
+    def summary_lines(self):
+        return [
+            f"{m:<36} calls {p.calls:<5} err {p.errors:<4} p50 {p.percentile(0.5):5.1f}s  p90 {p.percentile(0.9):5.1f}s"
+            for m, p in ((m, self.profiles[m]) for m in self.ranked())
+        ]
@@ -0,0 +1,85 @@
+# market_cache.py
+# Orchestrator (trader အများ, process တစ်ခု) အတွက် shared market data cache
+# Pair တစ်ခုရဲ့ MTF klines / live price ကို trader တိုင်း သီးသီး မဆွဲဘဲ TTL အတွင်း တစ်ခါပဲ ဆွဲ
+# Single-flight: cache miss တစ်ပြိုင်တည်း ဖြစ်ရင် fetch တစ်ခုပဲ သွား၊ ကျန်တဲ့ thread တွေက အဖြေကို စောင့်
+#   MARKET_CACHE_TTL=60 (sec, MTF / klines)   MARKET_PRICE_TTL=5 (sec, ticker price)
+# Time = bot clock (SIM_CLOCK မှာ virtual time) - cycle တစ်ခုထဲက trader တွေ အတူတူ data ကို မြင်
+
+import os
+import threading
+import time
+
+
+class MarketDataCache:
+    """
+    get(key, fetch, ttl) → cached value younger than ttl, else fetch() once for everyone
+    waiting on that key. None results (failed fetch) are handed to the waiters but never
+    stored, so the next cycle tries again instead of serving a missing price for a whole TTL.
+    """
+
+    def __init__(self, ttl=60.0, price_ttl=5.0, time_fn=time.time, metrics=None):
+        self.ttl = ttl
+        self.price_ttl = price_ttl
+        self.time_fn = time_fn
+        self.metrics = metrics
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, time_fn=time.time, metrics=None):
+        return cls(
+            ttl=float(os.getenv("MARKET_CACHE_TTL", "60")),
+            price_ttl=float(os.getenv("MARKET_PRICE_TTL", "5")),
+            time_fn=time_fn,
+            metrics=metrics,
+        )
+
+    def _count(self, result):
+        if self.metrics is not None:
+            self.metrics.inc("market_cache_total", result=result)
+
+    def get(self, key, fetch, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.time_fn() - entry[1] <= ttl:
+                self.hits += 1
+                hit = True
+            else:
+                hit = False
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = {"done": threading.Event(), "value": None}
+                    self.misses += 1
+                else:
+                    self.waits += 1
+        if hit:
+            self._count("hit")
+            return entry[0]
+        if not leader:
+            self._count("wait")
+            flight["done"].wait()
+            return flight["value"]
+
+        self._count("miss")
+        value = None
+        try:
+            value = fetch()
+        finally:
+            with self._lock:
+                if value is not None:
+                    self.entries[key] = (value, self.time_fn())
+                flight["value"] = value
+                del self._inflight[key]
+            flight["done"].set()
+        return value
+
+    def summary_line(self):
+        total = self.hits + self.misses + self.waits
+        shared = (self.hits + self.waits) / total * 100 if total else 0.0
+        return f"market cache     {self.misses} fetches  {self.hits} hits  {self.waits} waits  ({shared:.0f}% served without a fetch)"
@@ -0,0 +1,205 @@
+# metrics_server.py
+# Prometheus text-format metrics - bot ရဲ့ state ကို log scrape မလုပ်ဘဲ graph/alert လုပ်လို့ရအောင်
+#   METRICS_PORT=9108 (default) / 0 = disabled, METRICS_HOST=127.0.0.1
+# Trading thread က inc/set/observe ပဲ ခေါ်တယ် (lock အတို)၊ render + HTTP က background thread မှာ
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import structured_log
+
+PREFIX = "trader_"
+COUNTER = "counter"
+GAUGE = "gauge"
+SUMMARY = "summary"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in key)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + "}"
+
+
+class Metrics:
+    """Counters / gauges / summaries (sum + count) with optional labels"""
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self.meta = {}
+        self.values = {}
+        self.callbacks = {}
+        self._lock = threading.Lock()
+
+    def _declare(self, kind, name, help_text):
+        with self._lock:
+            self.meta[name] = (kind, help_text)
+            self.values.setdefault(name, {})
+
+    def counter(self, name, help_text):
+        self._declare(COUNTER, name, help_text)
+
+    def gauge(self, name, help_text, fn=None):
+        """fn → scrape time မှာ ခေါ်ပြီး value ယူ (number သို့မဟုတ် {labels-dict-tuple: value})"""
+        self._declare(GAUGE, name, help_text)
+        if fn is not None:
+            self.callbacks[name] = fn
+
+    def summary(self, name, help_text):
+        self._declare(SUMMARY, name, help_text)
+
+    def inc(self, name, value=1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.values.setdefault(name, {})[_label_key(labels)] = float(value)
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.values.setdefault(name, {})
+            total, count = series.get(key, (0.0, 0))
+            series[key] = (total + value, count + 1)
+
+    def get(self, name, **labels):
+        with self._lock:
+            return self.values.get(name, {}).get(_label_key(labels))
+
+    def collect(self):
+        """{name: (kind, help, prefixed name, {label-key: value})} with scrape-time gauges evaluated"""
+        with self._lock:
+            meta = dict(self.meta)
+            values = {name: dict(series) for name, series in self.values.items()}
+        for name, fn in list(self.callbacks.items()):
+            try:
+                result = fn()
+                values[name] = result if isinstance(result, dict) else {(): float(result)}
+            except Exception as e:
+                structured_log.console(f"❌ [METRICS] gauge {name} failed: {e}", name="metrics_server")
+        return {name: (kind, help_text, self.prefix + name, values.get(name) or {}) for name, (kind, help_text) in meta.items()}
+
+    def render(self):
+        return render_registries([((), self)])
+
+    def declare_rest_metrics(self, calls="rest_calls_total", weight="rest_used_weight_1m"):
+        """The series track_requests_session fills"""
+        self.counter(calls, "Binance REST calls by endpoint and status")
+        self.gauge(weight, "Binance X-MBX-USED-WEIGHT-1M from the last response")
+
+    def track_requests_session(self, session, calls="rest_calls_total", weight="rest_used_weight_1m"):
+        """
+        requests.Session response hook (python-binance Client.session): every REST call
+        is counted by endpoint + status, and Binance's used-weight header becomes a gauge.
+        """
+        def hook(response, *args, **kwargs):
+            path = response.request.path_url.split("?", 1)[0] if response.request is not None else "unknown"
+            self.inc(calls, endpoint=path, status=response.status_code)
+            used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+            if used is not None:
+                self.set(weight, float(used))
+            return response
+        session.hooks.setdefault("response", []).append(hook)
+
+
+def render_registries(registries):
+    """
+    [(extra label-key, Metrics)] → one exposition: HELP/TYPE once per metric, the extra
+    labels (e.g. trader="main") prepended to every series of that registry.
+    """
+    merged = {}
+    for extra, metrics in registries:
+        for name, (kind, help_text, full, series) in metrics.collect().items():
+            entry = merged.setdefault(full, (kind, help_text, {}))
+            for key, value in series.items():
+                entry[2][tuple(extra) + key] = value
+            if not series and kind == COUNTER:
+                entry[2].setdefault(tuple(extra), 0)
+    lines = []
+    for full, (kind, help_text, series) in sorted(merged.items()):
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        for key, value in sorted(series.items()):
+            labels = _format_labels(key)
+            if kind == SUMMARY:
+                lines.append(f"{full}_sum{labels} {value[0]}")
+                lines.append(f"{full}_count{labels} {value[1]}")
+            else:
+                lines.append(f"{full}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsGroup:
+    """Several Metrics registries behind one /metrics (orchestrator: one per trader + the shared services)"""
+
+    def __init__(self):
+        self.registries = []
+
+    def add(self, metrics, **labels):
+        self.registries.append((_label_key(labels), metrics))
+        return metrics
+
+    def render(self):
+        return render_registries(list(self.registries))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """GET /metrics on a daemon thread; bind failure only disables the endpoint"""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    @classmethod
+    def from_env(cls, metrics):
+        return cls(metrics, os.getenv("METRICS_HOST", "127.0.0.1"), int(os.getenv("METRICS_PORT", "9108")))
+
+    def start(self):
+        if not self.port:
+            return False
+        handler = type("MetricsHandler", (_Handler,), {"metrics": self.metrics})
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        except OSError as e:
+            structured_log.console(f"❌ [METRICS] cannot bind {self.host}:{self.port}: {e}", name="metrics_server")
+            return False
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
@@ -1,18 +1,37 @@
 # ml_predictor.py
-import joblib
-import pandas as pd
+# joblib / pandas / sklearn model ကို ပထမဆုံး prediction မှာမှ load (startup မြန်အောင်)
+import logging
 import os
 
+import structured_log
+
 MODEL_FILE = "sl_mistake_classifier.pkl"
+_UNLOADED = object()
 
 class SLPredictor:
     def __init__(self):
+        self._model = _UNLOADED
         if os.path.exists(MODEL_FILE):
-            self.model = joblib.load(MODEL_FILE)
-            print(f"[ML] Model loaded: {MODEL_FILE}")
+            structured_log.console(f"🧠 [ML] Model found: {MODEL_FILE} (loads on first prediction)", name="ml_predictor")
         else:
-            self.model = None
-            print(f"[ML] No model found. Using fallback rules.")
+            self._model = None
+            structured_log.console("⚠️ [ML] No model found. Using fallback rules.", name="ml_predictor")
+    
+    @property
+    def model(self):
+        if self._model is _UNLOADED:
+            try:
+                import joblib
+                self._model = joblib.load(MODEL_FILE)
+                structured_log.console(f"✅ [ML] Model loaded: {MODEL_FILE}", name="ml_predictor")
+            except Exception as e:
+                self._model = None
+                structured_log.console(f"❌ [ML] Model load failed ({e}). Using fallback rules.", name="ml_predictor")
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
     
     def predict_mistake(self, trade_data, market_data):
         if not self.model:
@@ -25,7 +44,7 @@ class SLPredictor:
             "exit_price": trade_data["exit_price"],
             "pnl": trade_data["pnl"],
             "leverage": trade_data.get("leverage", 1),
-            "position_size_usd": trade_data.get("position_size", 50.0),
+            "position_size_usd": trade_data.get("position_size_usd", 50.0),
             "loss_percent": abs(trade_data["pnl"]) / trade_data.get("position_size_usd", 50.0) * 100,
             "atr_percent": market_data.get("atr_percent", 0),
             "volatility_spike": 1 if market_data.get("atr_percent", 0) > 3.0 else 0,
@@ -36,10 +55,11 @@ class SLPredictor:
             "sl_distance_pct": market_data.get("sl_distance_pct", 0),
         }
         
+        import pandas as pd
         df = pd.DataFrame([input_data])
         pred = self.model.predict(df)[0]
         prob = self.model.predict_proba(df)[0][pred]
         
         result = "MISTAKE" if pred else "NORMAL"
-        print(f"[PREDICT] → {result} (Confidence: {prob:.1%})")
+        structured_log.console(f"🔮 [PREDICT] → {result} (Confidence: {prob:.1%})", level=logging.DEBUG, name="ml_predictor")
         return bool(pred)
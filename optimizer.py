@@ -0,0 +1,248 @@
+# optimizer.py
+# Parameter sweep + walk-forward optimizer - CPU core အကုန်သုံးပြီး vector_backtest ကို အပြိုင် run
+# Price/indicator array တွေကို shared memory ထဲ တစ်ခါတည်း ထည့် (worker တိုင်း copy မလုပ်ရ)
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.stats import rankdata
+
+from backtest import MarketSeries, load_klines
+from data_collector import classify_trade_outcome
+from vector_backtest import (
+    CLOSE_TYPES, DEFAULT_PARAMS, VectorBacktest, aligned_features, param_grid, summarize
+)
+
+# bot.py ထဲ hard-coded ဖြစ်နေတဲ့ entry/exit rule တွေရဲ့ search space
+PARAM_SPACE = {
+    "rsi_oversold": [25.0, 30.0, 35.0, 40.0],
+    "rsi_overbought": [60.0, 65.0, 70.0, 75.0],
+    "min_votes": [2, 3, 4],
+    "stop_loss_pct": [-3.0, -4.0, -5.0, -6.0, -8.0],
+    "partial_trigger_pct": [6.0, 7.5, 9.0, 10.5, 12.0],
+    "partial_percent": [40, 50, 60, 70],
+    "breakeven_pct": [10.0, 12.0, 14.0],
+    "floor_start_pct": [12.0, 15.0, 18.0],
+    "floor_ratio": [0.6, 0.7, 0.75, 0.8],
+    "trailing": [True, False],
+}
+
+RANK_KEYS = ("total_pnl", "max_drawdown", "wtl_rate")
+# Trade မရှိတဲ့ config က drawdown 0 / WTL 0 နဲ့ rank ကောင်းနေမှာစိုးလို့ - ဒီထက်နည်းရင် ranking ထဲ မဝင်
+MIN_TRADES = 5
+
+# === WORKER SIDE ===
+_ENGINE = None
+_SHM = None
+
+
+def _init_worker(shm_name, names, length, first_ready):
+    """Shared memory block ကို attach လုပ်ပြီး process တစ်ခုမှာ engine တစ်ခု"""
+    global _ENGINE, _SHM
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(names), length), dtype=np.float64, buffer=_SHM.buf)
+    _ENGINE = VectorBacktest({name: block[i] for i, name in enumerate(names)}, first_ready)
+
+
+def wtl_rate(legs):
+    """Winner-turn-loser % of closes, classified by data_collector.classify_trade_outcome"""
+    if not len(legs):
+        return 0.0
+    wtl = 0
+    for leg in legs:
+        outcome = classify_trade_outcome({
+            "pnl": float(leg["pnl"]),
+            "peak_pnl_pct": float(leg["peak_pct"]),
+            "close_reason": CLOSE_TYPES[leg["close_type"]],
+        })
+        wtl += outcome == "WINNER_TURN_LOSER"
+    return round(wtl / len(legs) * 100, 1)
+
+
+def _evaluate(job):
+    params, decision_every, start, end = job
+    legs = _ENGINE.run(params, decision_every, start, end)
+    result = summarize(legs)
+    result["wtl_rate"] = wtl_rate(legs)
+    return params, result
+
+
+# === PARENT SIDE ===
+def random_combos(n, space=None, seed=0):
+    """Search space ထဲက random sample n ခု (duplicate မပါ)"""
+    space = space or PARAM_SPACE
+    rng = random.Random(seed)
+    seen = set()
+    combos = []
+    for _ in range(n * 20):
+        if len(combos) >= n:
+            break
+        choice = {k: rng.choice(v) for k, v in space.items()}
+        key = tuple(sorted(choice.items()))
+        if key not in seen:
+            seen.add(key)
+            combos.append(dict(DEFAULT_PARAMS, **choice))
+    return combos
+
+
+def rank(results, min_trades=MIN_TRADES):
+    """
+    Rank by PnL (high), drawdown (low) and WTL rate (low): each metric gets an average
+    rank (ties share it), the sum decides the order, total PnL breaks ties. Results with
+    fewer than min_trades full closes are not ranked (rank_score None) and go last,
+    best PnL first - an idle config must never win on its zero drawdown.
+    """
+    eligible = [r for r in results if r[1]["trades"] >= min_trades]
+    idle = [r for r in results if r[1]["trades"] < min_trades]
+    if eligible:
+        pnl = np.array([r["total_pnl"] for _, r in eligible])
+        dd = np.array([r["max_drawdown"] for _, r in eligible])
+        wtl = np.array([r["wtl_rate"] for _, r in eligible])
+        score = rankdata(-pnl) + rankdata(dd) + rankdata(wtl)
+        for (_, result), s in zip(eligible, score):
+            result["rank_score"] = float(s)
+    for _, result in idle:
+        result["rank_score"] = None
+    return (sorted(eligible, key=lambda r: (r[1]["rank_score"], -r[1]["total_pnl"]))
+            + sorted(idle, key=lambda r: -r[1]["total_pnl"]))
+
+
+class Optimizer:
+    """
+    Owns the shared-memory copy of one pair's aligned features and a process pool
+    whose workers attach to it. Use as a context manager so the block is unlinked.
+    """
+
+    def __init__(self, series, workers=None):
+        features = aligned_features(series)
+        self.names = list(features)
+        self.length = len(features["close"])
+        self.first_ready = series.first_ready
+        self.shm = shared_memory.SharedMemory(create=True, size=len(self.names) * self.length * 8)
+        block = np.ndarray((len(self.names), self.length), dtype=np.float64, buffer=self.shm.buf)
+        for i, name in enumerate(self.names):
+            block[i] = features[name]
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.shm.name, self.names, self.length, self.first_ready),
+        )
+
+    def evaluate(self, combos, decision_every=1, start=0, end=None):
+        jobs = [(params, decision_every, start, end) for params in combos]
+        chunksize = max(1, len(jobs) // (self.workers * 8))
+        return list(self.pool.map(_evaluate, jobs, chunksize=chunksize))
+
+    def search(self, combos, decision_every=1, start=0, end=None, min_trades=MIN_TRADES):
+        return rank(self.evaluate(combos, decision_every, start, end), min_trades)
+
+    def walk_forward(self, combos, folds=4, train_ratio=0.7, decision_every=1, min_trades=MIN_TRADES):
+        """
+        Rolling windows over the warmed-up data: optimise on the train part,
+        then score the winner on the following unseen test part. A fold where no
+        candidate reaches min_trades on train is reported as skipped, not won.
+        """
+        span = self.length - self.first_ready
+        window = span // folds
+        report = []
+        for fold in range(folds):
+            start = self.first_ready + fold * window
+            split = start + int(window * train_ratio)
+            end = start + window if fold < folds - 1 else self.length
+            ranked = self.search(combos, decision_every, start, split, min_trades)
+            entry = {"fold": fold, "train_bars": [start, split], "test_bars": [split, end]}
+            if not ranked or ranked[0][1]["rank_score"] is None:
+                entry["skipped"] = f"no candidate with {min_trades}+ train trades"
+                report.append(entry)
+                continue
+            best_params, train_result = ranked[0]
+            _, test_result = self.evaluate([best_params], decision_every, split, end)[0]
+            report.append({
+                **entry,
+                "params": _changed(best_params),
+                "train": train_result,
+                "test": test_result,
+            })
+        return report
+
+    def close(self):
+        self.pool.shutdown()
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _changed(params):
+    return {k: v for k, v in params.items() if v != DEFAULT_PARAMS[k]}
+
+
+def _parse_grid(specs):
+    """["stop_loss_pct=-4,-5", "trailing=true,false"] → param_grid()"""
+    ranges = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        if key not in DEFAULT_PARAMS:
+            raise SystemExit(f"Unknown parameter: {key}")
+        kind = type(DEFAULT_PARAMS[key])
+        if kind is bool:
+            ranges[key] = [v.strip().lower() in ("1", "true", "yes") for v in values.split(",")]
+        else:
+            ranges[key] = [kind(v) for v in values.split(",")]
+    return param_grid(**ranges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid / random search and walk-forward over bot.py rule parameters")
+    parser.add_argument("file", help="PAIR=path (CSV or JSON 5m klines)")
+    parser.add_argument("--grid", nargs="*", help="key=v1,v2 ... (grid search over these keys)")
+    parser.add_argument("--random", type=int, default=1000, help="random combos when --grid is not given")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--walk-forward", type=int, default=0, metavar="FOLDS")
+    parser.add_argument("--min-trades", type=int, default=MIN_TRADES, help="full closes a config needs to be ranked")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", default="optimizer_results.json")
+    args = parser.parse_args()
+
+    pair, _, path = args.file.partition("=")
+    series = MarketSeries(pair, load_klines(path))
+    combos = _parse_grid(args.grid) if args.grid else random_combos(args.random, seed=args.seed)
+
+    started = time.perf_counter()
+    with Optimizer(series, workers=args.workers) as optimizer:
+        if args.walk_forward:
+            output = {"walk_forward": optimizer.walk_forward(combos, folds=args.walk_forward, min_trades=args.min_trades)}
+            for fold in output["walk_forward"]:
+                if "skipped" in fold:
+                    print(f"[WF] fold {fold['fold']} | skipped: {fold['skipped']}")
+                    continue
+                print(f"[WF] fold {fold['fold']} | train PnL ${fold['train']['total_pnl']:.2f} → "
+                      f"test PnL ${fold['test']['total_pnl']:.2f} | DD ${fold['test']['max_drawdown']:.2f} | "
+                      f"WTL {fold['test']['wtl_rate']}% | {fold['params']}")
+        else:
+            ranked = optimizer.search(combos, min_trades=args.min_trades)
+            output = {"ranked": [{"params": _changed(p), **r} for p, r in ranked]}
+            for row in output["ranked"][:args.top]:
+                print(json.dumps(row, ensure_ascii=False))
+    elapsed = time.perf_counter() - started
+    output["combinations"] = len(combos)
+    output["elapsed_sec"] = round(elapsed, 2)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"[OPT] {len(combos)} combinations on {optimizer.workers} workers in {elapsed:.2f}s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
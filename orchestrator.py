@@ -0,0 +1,287 @@
+# orchestrator.py
+# Account / strategy အများကို process တစ်ခုထဲမှာ menu မပါဘဲ run - config file တစ်ခုကနေ trader (live + paper) အများ
+# Trader တိုင်း သူ့ budget / pairs / state files (state_dir, ml_training_data.csv အပါအဝင်) သီးသန့်၊ ဒါပေမဲ့ ဒီ resource တွေကို တစ်ခုတည်း share:
+#   - market-data client + MarketDataCache (pair တစ်ခုရဲ့ klines/price ကို TTL အတွင်း တစ်ခါပဲ ဆွဲ)
+#   - circuit breakers + last good prices (outage ကို trader တိုင်း သီးသီး မရှာရ)
+#   - LLMRouter (keep-alive pool + model latency profile တစ်ခု)
+#   - /metrics endpoint တစ်ခု (trader="<name>" label), cycle clock တစ်ခု
+# Cycle တိုင်း trader အားလုံးကို worker pool နဲ့ တပြိုင်နက် run → အားလုံးပြီးမှ interval sleep တစ်ခါ
+# (SIM_CLOCK မှာလည်း trader အားလုံး virtual time တစ်ခုတည်းပေါ်မှာ)
+#
+#   python orchestrator.py traders.json        (or ORCHESTRATOR_CONFIG=traders.json)
+#   {
+#     "interval": 180, "workers": 4, "report_every": 4, "state_root": "accounts",
+#     "traders": [
+#       {"name": "main", "mode": "live", "budget": 500, "pairs": ["SOLUSDT"],
+#        "api_key_env": "BINANCE_API_KEY", "secret_key_env": "BINANCE_SECRET_KEY"},
+#       {"name": "wide-paper", "mode": "paper", "budget": 1000, "pairs": ["SOLUSDT", "BTCUSDT"],
+#        "max_concurrent_trades": 6, "prefilter": false, "llm_batch": true}
+#     ]
+#   }
+# Trader keys: name, mode (live|paper), budget, pairs, max_concurrent_trades, max_position_size_percent,
+#   prefilter, llm_batch, universe ({"top_n": 5, ...} UniverseScanner args), state_dir (default state_root/name),
+#   api_key_env / secret_key_env (env var names - secrets never go in the config file)
+# Env (PROMPT_STYLE, LLM_*, BREAKER_*, MARKET_CACHE_TTL, METRICS_PORT ...) process တစ်ခုလုံးအတွက် တူတူ
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bot
+import structured_log
+from bot import FullyAutonomous1HourAITrader, FullyAutonomous1HourPaperTrader
+import circuit_breaker
+from exchange_cache import SymbolMetadataCache
+from llm_router import LLMRouter
+from market_cache import MarketDataCache
+from metrics_server import Metrics, MetricsGroup, MetricsServer
+from sim_clock import clock_from_env
+from universe_scanner import PublicFuturesREST
+
+MODES = ("live", "paper")
+TRADER_KEYS = {"name", "mode", "budget", "pairs", "max_concurrent_trades", "max_position_size_percent",
+               "prefilter", "llm_batch", "universe", "state_dir", "api_key_env", "secret_key_env"}
+
+
+def load_config(path):
+    """Config file → dict; unknown trader keys / duplicate names / bad modes are errors, not silent defaults"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    traders = config.get("traders") or []
+    if not traders:
+        raise ValueError(f"{path}: no traders configured")
+    names = set()
+    for trader in traders:
+        name = trader.get("name")
+        if not name or name in names:
+            raise ValueError(f"{path}: every trader needs a unique name (got {name!r})")
+        names.add(name)
+        if trader.get("mode", "paper") not in MODES:
+            raise ValueError(f"{path}: trader {name}: mode must be one of {', '.join(MODES)}")
+        unknown = set(trader) - TRADER_KEYS
+        if unknown:
+            raise ValueError(f"{path}: trader {name}: unknown keys {', '.join(sorted(unknown))}")
+    return config
+
+
+class SharedServices:
+    """What every trader in the process uses through one instance (handed to the bots via profile["shared"])"""
+
+    def __init__(self, clock, market_client, llm_router, market_cache, metrics):
+        self.clock = clock
+        self.market_client = market_client
+        self.llm_router = llm_router
+        self.market_cache = market_cache
+        self.metrics = metrics
+        self.breakers = {}
+        self.last_prices = {}
+        self.last_market_data = {}
+        # One symbol-metadata cache (one disk file, one refresher thread) for the union of all traders' pairs
+        self.symbol_meta = SymbolMetadataCache.from_env()
+        self.symbol_pairs = []
+        self._symbol_listeners = []
+        self._symbol_lock = threading.Lock()
+
+    def watch_symbols(self, pairs, on_update):
+        """
+        Add a trader's pairs to the shared list (the refresher holds this same list) and its
+        precision callback to the fan-out → (pairs, on_update) for SymbolMetadataCache.
+        """
+        with self._symbol_lock:
+            self.symbol_pairs.extend(pair for pair in pairs if pair not in self.symbol_pairs)
+            if on_update not in self._symbol_listeners:
+                self._symbol_listeners.append(on_update)
+        return self.symbol_pairs, self._notify_symbols
+
+    def _notify_symbols(self, symbols):
+        for listener in list(self._symbol_listeners):
+            listener(symbols)
+
+    @classmethod
+    def from_env(cls, clock, llm_workers=None):
+        metrics = Metrics()
+        LLMRouter.declare_metrics(metrics)
+        metrics.counter("market_cache_total", "Shared market-data lookups by result (hit / miss / wait)")
+        metrics.declare_rest_metrics()
+
+        if os.getenv('FAKE_EXCHANGE_KLINES'):
+            from fake_exchange import FakeBinanceClient
+            market_client = FakeBinanceClient.for_clock(clock)
+        else:
+            # Public endpoints only - account keys stay with each live trader's own client
+            market_client = PublicFuturesREST()
+            metrics.track_requests_session(market_client.session)
+
+        llm_router = LLMRouter.from_env(os.getenv('OPENROUTER_API_KEY'), headers=bot.LLM_HEADERS, metrics=metrics,
+                                        max_workers=llm_workers)
+        services = cls(clock, market_client, llm_router, MarketDataCache.from_env(clock.time, metrics), metrics)
+        circuit_breaker.declare_metrics(metrics, services.breakers)
+        return services
+
+
+class TraderSlot:
+    """One configured trader: its bot (+ paper wrapper) and one cycle of it"""
+
+    def __init__(self, config, shared, state_root="accounts"):
+        self.name = config["name"]
+        self.mode = config.get("mode", "paper")
+        profile = dict(config, shared=shared)
+        profile.setdefault("state_dir", os.path.join(state_root, self.name))
+        self.bot = FullyAutonomous1HourAITrader(shared.clock, profile)
+        self.paper = None
+        if self.mode == "live" and not self.bot.binance:
+            # Same fallback as the interactive menu - but loud, this account is not trading for real
+            self.bot.print_color("❌ Binance connection failed - running this trader as PAPER", self.bot.Fore.RED + self.bot.Style.BRIGHT)
+            self.mode = "paper"
+        if self.mode == "paper":
+            self.paper = FullyAutonomous1HourPaperTrader(self.bot)
+            # Position gauges follow the paper ledger (the bot's own ledger stays empty)
+            ledger = self.paper.paper_positions
+            self.bot.metrics.gauge("open_positions", "Open positions", lambda: len(ledger))
+            self.bot.metrics.gauge("available_budget_usd", "Budget not reserved by open positions", lambda: ledger.available_budget)
+        self.cycles = 0
+
+    def run_cycle(self):
+        """Same per-cycle steps as start_trading / start_paper_trading, minus the sleep (the orchestrator owns it)"""
+        self.cycles += 1
+        self.bot.metrics.inc("cycles_total", mode=self.mode)
+        if self.paper is not None:
+            self.paper.paper_cycle_count = self.cycles
+            self.bot.print_color(f"\n🔄 PAPER TRADING CYCLE {self.cycles} (BOUNCE-PROOF V2)", self.bot.Fore.CYAN + self.bot.Style.BRIGHT)
+            self.paper.run_paper_trading_cycle()
+        else:
+            self.bot.cycle_count = self.cycles
+            self.bot.print_color(f"\n🔄 TRADING CYCLE {self.cycles} (BOUNCE-PROOF V2)", self.bot.Fore.CYAN + self.bot.Style.BRIGHT)
+            self.bot.run_trading_cycle()
+
+    def summary(self):
+        if self.paper is not None:
+            budget, ledger, history = self.paper.paper_balance, self.paper.paper_positions, self.paper.paper_history
+        else:
+            budget, ledger, history = self.bot.total_budget, self.bot.ai_opened_trades, self.bot.real_trade_history
+        pnl = [t.get('pnl', 0) for t in history]
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "budget": budget,
+            "available": ledger.available_budget,
+            "open": len(ledger),
+            "trades": len(pnl),
+            "wins": sum(1 for p in pnl if p > 0),
+            "pnl": sum(pnl),
+        }
+
+    def show_final(self):
+        """start_* loops' stop report"""
+        if self.paper is not None:
+            self.paper.show_paper_history(15)
+            self.paper.show_paper_stats()
+        else:
+            self.bot.show_trade_history(15)
+            self.bot.show_trading_stats()
+        self.bot.show_prefilter_stats()
+
+
+class Orchestrator:
+    def __init__(self, config, shared=None):
+        self.config = config
+        self.interval = float(config.get("interval", 180))
+        self.report_every = int(config.get("report_every", 4))
+        self.workers = int(config.get("workers", len(config["traders"])))
+        self.clock = shared.clock if shared is not None else clock_from_env()
+        # LLM pool sized for every trader asking at once (+ hedges)
+        self.shared = shared or SharedServices.from_env(self.clock, llm_workers=max(4, 2 * len(config["traders"])))
+        self.metrics = MetricsGroup()
+        self.metrics.add(self.shared.metrics, trader="shared")
+
+        started = time.perf_counter()
+        state_root = config.get("state_root", "accounts")
+        self.slots = []
+        for trader in config["traders"]:
+            slot = TraderSlot(trader, self.shared, state_root)
+            self.metrics.add(slot.bot.metrics, trader=slot.name)
+            self.slots.append(slot)
+        self.print_color(f"🧩 ORCHESTRATOR: {len(self.slots)} traders ({', '.join(f'{s.name}:{s.mode}' for s in self.slots)}) "
+                         f"ready in {(time.perf_counter() - started) * 1000:.0f}ms", bot.Fore.CYAN + bot.Style.BRIGHT)
+
+        self.metrics_server = MetricsServer.from_env(self.metrics)
+        if self.metrics_server.start():
+            self.print_color(f"📈 METRICS: http://{self.metrics_server.host}:{self.metrics_server.port}/metrics", bot.Fore.BLUE)
+        self.cycle = 0
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_config(path))
+
+    def print_color(self, text, color="", level=None):
+        structured_log.console(text, color if bot.COLORAMA_AVAILABLE else "", level=level, name="orchestrator")
+
+    def run_cycle(self, pool):
+        """Every trader's cycle in parallel; one trader's crash never stops the others"""
+        self.cycle += 1
+        self.print_color(f"\n🧩 ORCHESTRATOR CYCLE {self.cycle} ({len(self.slots)} traders)", bot.Fore.CYAN + bot.Style.BRIGHT)
+        jobs = {pool.submit(slot.run_cycle): slot for slot in self.slots}
+        for job, slot in jobs.items():
+            try:
+                job.result()
+            except Exception as e:
+                slot.bot.print_color(f"Trader cycle failed: {e}", bot.Fore.RED)
+
+    def report(self):
+        """Aggregate view across traders + the shared services"""
+        rows = [slot.summary() for slot in self.slots]
+        self.print_color(f"\n🧩 ORCHESTRATOR REPORT (cycle {self.cycle})", bot.Fore.GREEN + bot.Style.BRIGHT)
+        self.print_color("=" * 80, bot.Fore.GREEN)
+        self.print_color(f"{'TRADER':<16} {'MODE':<6} {'BUDGET':>9} {'AVAILABLE':>10} {'OPEN':>5} {'TRADES':>7} {'WIN%':>6} {'P&L':>10}", bot.Fore.WHITE)
+        for row in rows + [{
+            "name": "TOTAL", "mode": "", "budget": sum(r["budget"] for r in rows), "available": sum(r["available"] for r in rows),
+            "open": sum(r["open"] for r in rows), "trades": sum(r["trades"] for r in rows),
+            "wins": sum(r["wins"] for r in rows), "pnl": sum(r["pnl"] for r in rows),
+        }]:
+            win_rate = row["wins"] / row["trades"] * 100 if row["trades"] else 0.0
+            color = bot.Fore.GREEN if row["pnl"] > 0 else bot.Fore.RED if row["pnl"] < 0 else bot.Fore.WHITE
+            self.print_color(f"{row['name']:<16} {row['mode']:<6} {row['budget']:>9.2f} {row['available']:>10.2f} {row['open']:>5} "
+                             f"{row['trades']:>7} {win_rate:>5.1f}% {row['pnl']:>+10.2f}", color)
+        lines = [self.shared.market_cache.summary_line()] + self.shared.llm_router.summary_lines()
+        lines += [b.summary_line() for b in list(self.shared.breakers.values())]
+        for line in lines:
+            self.print_color(f"   {line}", bot.Fore.WHITE)
+        return rows
+
+    def run(self, max_cycles=None):
+        """Cycle → sleep(interval) until Ctrl+C / end of simulation / max_cycles; final per-trader + aggregate report"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="trader") as pool:
+            try:
+                while max_cycles is None or self.cycle < max_cycles:
+                    self.run_cycle(pool)
+                    if self.cycle % self.report_every == 0:
+                        self.report()
+                    self.clock.sleep(self.interval)
+            except KeyboardInterrupt:
+                self.print_color(f"\n🛑 ORCHESTRATOR STOPPED", bot.Fore.RED + bot.Style.BRIGHT)
+        for slot in self.slots:
+            slot.show_final()
+            slot.bot.show_latency_stats()
+        rows = self.report()
+        structured_log.flush()
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several live / paper traders from one config file")
+    parser.add_argument("config", nargs="?", default=os.getenv("ORCHESTRATOR_CONFIG", "traders.json"))
+    parser.add_argument("--cycles", type=int, help="stop after N cycles (default: run until Ctrl+C)")
+    args = parser.parse_args()
+    try:
+        orchestrator = Orchestrator.from_file(args.config)
+    except (OSError, ValueError) as e:
+        print(f"❌ Orchestrator config error: {e}")
+        raise SystemExit(1)
+    orchestrator.run(args.cycles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# pattern_index.py
+# Market setup → ရှုံးနှုန်း / expectancy index (time-decayed, O(1) lookup)
+
+import json
+import os
+import time
+
+import numpy as np
+
+DEFAULT_HALF_LIFE_DAYS = 14.0
+
+RSI_EDGES = (30, 45, 55, 70)
+RSI_LABELS = ("RSI<30", "RSI30-45", "RSI45-55", "RSI55-70", "RSI>70")
+ATR_EDGES = (0.5, 1.0, 2.0, 3.0)
+ATR_LABELS = ("ATR<0.5", "ATR0.5-1", "ATR1-2", "ATR2-3", "ATR>3")
+
+
+def _bucket(value, edges, labels):
+    for edge, label in zip(edges, labels):
+        if value < edge:
+            return label
+    return labels[-1]
+
+
+def market_context(market_data, now=None):
+    """get_price_history() output → trade မှာ သိမ်းထားမယ့် compact feature dict"""
+    mtf = market_data.get('mtf_analysis', {}) if market_data else {}
+    h1 = mtf.get('1h', {})
+    h4 = mtf.get('4h', {})
+    ts = now if now is not None else time.time()
+    return {
+        "h1_trend": h1.get('trend'),
+        "h4_trend": h4.get('trend'),
+        "rsi": h1.get('rsi', 50),
+        "atr_percent": h1.get('atr_percent', 0.0),
+        "hour": time.gmtime(ts).tm_hour,
+    }
+
+
+def pattern_keys(pair, direction, context):
+    """(exact key, coarse key) - exact က evidence နည်းရင် coarse (pair/hour မပါ) ကို သုံး"""
+    h1, h4 = context.get("h1_trend"), context.get("h4_trend")
+    if h1 and h1 == h4:
+        alignment = f"ALIGNED_{h1}"
+    else:
+        alignment = "MIXED"
+    rsi = _bucket(context.get("rsi", 50) or 50, RSI_EDGES, RSI_LABELS)
+    atr = _bucket(context.get("atr_percent", 0.0) or 0.0, ATR_EDGES, ATR_LABELS)
+    coarse = f"{direction}|{alignment}|{rsi}|{atr}"
+    exact = f"{pair}|{coarse}|H{context.get('hour', 0):02d}"
+    return exact, coarse
+
+
+class MistakePatternIndex:
+    """
+    key → [weight, loss_weight, pnl_pct_sum, last_update] with exponential decay.
+    Decay is applied lazily on touch, so record() and lookup() stay O(1)
+    no matter how many trades have been seen.
+    """
+
+    def __init__(self, path="ai_pattern_index.json", half_life_days=DEFAULT_HALF_LIFE_DAYS):
+        self.path = path
+        self.half_life = half_life_days * 86400
+        self.stats = {}
+        self.load()
+
+    def _decay(self, entry, now):
+        age = now - entry[3]
+        if age > 0:
+            factor = 0.5 ** (age / self.half_life)
+            entry[0] *= factor
+            entry[1] *= factor
+            entry[2] *= factor
+            entry[3] = now
+        return entry
+
+    def _add(self, key, is_loss, pnl_pct, ts):
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = [0.0, 0.0, 0.0, ts]
+        self._decay(entry, ts)
+        entry[0] += 1.0
+        entry[1] += 1.0 if is_loss else 0.0
+        entry[2] += pnl_pct
+
+    def record(self, pair, direction, context, pnl_pct, ts=None):
+        ts = ts if ts is not None else time.time()
+        for key in pattern_keys(pair, direction, context):
+            self._add(key, pnl_pct < 0, pnl_pct, ts)
+
+    def lookup(self, pair, direction, context, min_evidence=3.0, now=None):
+        """
+        Returns {"key", "evidence", "loss_rate", "expectancy"} for the most specific
+        key with enough (decayed) evidence, or None.
+        """
+        now = now if now is not None else time.time()
+        for key in pattern_keys(pair, direction, context):
+            entry = self.stats.get(key)
+            if entry is None:
+                continue
+            weight, losses, pnl_sum, _ = self._decay(entry, now)
+            if weight >= min_evidence:
+                return {
+                    "key": key,
+                    "evidence": weight,
+                    "loss_rate": losses / weight,
+                    "expectancy": pnl_sum / weight,
+                }
+        return None
+
+    def rebuild(self, records, now=None):
+        """
+        Bulk rebuild from history (list of (pair, direction, context, pnl_pct, ts)).
+        Decay weights + per-key sums are computed with NumPy in one pass.
+        """
+        self.stats = {}
+        if not records:
+            return
+        now = now if now is not None else time.time()
+        keys = []
+        pnl = []
+        ts = []
+        for pair, direction, context, pnl_pct, t in records:
+            for key in pattern_keys(pair, direction, context):
+                keys.append(key)
+                pnl.append(pnl_pct)
+                ts.append(t)
+        unique, inverse = np.unique(np.array(keys), return_inverse=True)
+        pnl = np.asarray(pnl, dtype=float)
+        weights = 0.5 ** ((now - np.asarray(ts, dtype=float)) / self.half_life)
+        weight_sum = np.bincount(inverse, weights=weights)
+        loss_sum = np.bincount(inverse, weights=weights * (pnl < 0))
+        pnl_sum = np.bincount(inverse, weights=weights * pnl)
+        for i, key in enumerate(unique.tolist()):
+            self.stats[key] = [float(weight_sum[i]), float(loss_sum[i]), float(pnl_sum[i]), now]
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.stats = json.load(f)
+        except Exception:
+            self.stats = {}
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats, f, separators=(",", ":"))
+        except Exception:
+            pass
+
+    def __len__(self):
+        return len(self.stats)
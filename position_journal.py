@@ -0,0 +1,87 @@
+# position_journal.py
+# Position event log (write-ahead) - restart ဖြစ်လည်း open position တွေ မပျောက်အောင်
+
+import json
+import os
+import time
+
+from trade_records import Position
+
+# Event types
+OPEN = "OPEN"
+PARTIAL = "PARTIAL"
+BREAKEVEN = "BREAKEVEN"
+PEAK = "PEAK"        # peak_pnl new high - profit floor / trailing rules survive a restart
+CLOSE = "CLOSE"
+
+
+class PositionJournal:
+    """
+    Append-only JSON-lines log of position events.
+    Every event is flushed + fsync'd before the caller continues, so replay()
+    after a crash returns exactly the positions that were open.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def _handle(self):
+        if self._file is None or self._file.closed:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, event, pair, data=None):
+        record = {"ev": event, "pair": pair, "ts": time.time()}
+        if data:
+            record["data"] = data
+        f = self._handle()
+        f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def replay(self):
+        """Log ကို အစကနေ ပြန်ဖတ်ပြီး open positions {pair: Position} ပြန်တည်ဆောက်"""
+        positions = {}
+        if not os.path.exists(self.path):
+            return positions
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # crash ဖြစ်တုန်း တစ်ဝက်ရေးထားတဲ့ နောက်ဆုံး line - ကျော်
+                    continue
+                event = record.get("ev")
+                pair = record.get("pair")
+                data = record.get("data", {})
+                if event == OPEN:
+                    positions[pair] = Position.from_dict(data)
+                elif event == CLOSE:
+                    positions.pop(pair, None)
+                elif pair in positions:
+                    # PARTIAL / BREAKEVEN / PEAK → field updates
+                    position = positions[pair]
+                    for key, value in data.items():
+                        if key in Position.__slots__:
+                            position[key] = value
+        return positions
+
+    def compact(self, positions):
+        """Open positions ကိုပဲ OPEN event အဖြစ် ပြန်ရေး (atomic replace)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for pair, position in positions.items():
+                record = {"ev": OPEN, "pair": pair, "ts": time.time(), "data": position.to_dict()}
+                f.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._file = None
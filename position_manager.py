@@ -0,0 +1,192 @@
+# position_manager.py
+# Thread-safe position ledger - budget နဲ့ position တွေကို lock တစ်ခုအောက်မှာပဲ ပြင်မယ်
+
+import threading
+from contextlib import contextmanager
+
+
+class PositionLedger:
+    """
+    Open positions + budget accounting ကို တစ်နေရာတည်းမှာ စုထားတာ
+    Budget flow: reserve() → commit() (order fill) / release() (order fail)
+    Every mutation runs under one RLock, so parallel entry/exit pipelines can share it.
+    With a journal attached, every position change is also written to the event log.
+    """
+
+    def __init__(self, total_budget, max_concurrent_trades, journal=None):
+        self._lock = threading.RLock()
+        self.journal = journal
+        self.total_budget = float(total_budget)
+        self.max_concurrent_trades = max_concurrent_trades
+        self._available = float(total_budget)
+        self._reserved = {}    # pair -> reserved USD (order in flight)
+        self._positions = {}   # pair -> open position
+        self._peaks = {}       # pair -> last journaled peak_pnl
+
+    # === READ ACCESS ===
+    @property
+    def available_budget(self):
+        with self._lock:
+            return self._available
+
+    @property
+    def reserved_budget(self):
+        with self._lock:
+            return sum(self._reserved.values())
+
+    def __contains__(self, pair):
+        with self._lock:
+            return pair in self._positions
+
+    def __len__(self):
+        with self._lock:
+            return len(self._positions)
+
+    def __getitem__(self, pair):
+        with self._lock:
+            return self._positions[pair]
+
+    def get(self, pair, default=None):
+        with self._lock:
+            return self._positions.get(pair, default)
+
+    def items(self):
+        """Snapshot list - iterate လုပ်နေတုန်း တခြား thread က ပြင်လည်း မပျက်ဘူး"""
+        with self._lock:
+            return list(self._positions.items())
+
+    def pairs(self):
+        with self._lock:
+            return list(self._positions)
+
+    @contextmanager
+    def locked(self):
+        """Multi-step read-modify-write အတွက် lock ကို အပြင်ကနေ ကိုင်ချင်ရင်"""
+        with self._lock:
+            yield self
+
+    def _log(self, event, pair, data):
+        if "peak_pnl" in data:
+            self._peaks[pair] = data["peak_pnl"]
+        if self.journal is not None:
+            self.journal.append(event, pair, data)
+
+    # === BUDGET: RESERVE / COMMIT / RELEASE ===
+    def can_open(self, pair, position_size_usd):
+        with self._lock:
+            if pair in self._positions:
+                return False, "Position already exists"
+            if pair in self._reserved:
+                return False, "Order already in flight"
+            if len(self._positions) + len(self._reserved) >= self.max_concurrent_trades:
+                return False, f"Max concurrent trades reached ({self.max_concurrent_trades})"
+            if position_size_usd > self._available:
+                return False, f"Insufficient budget: ${position_size_usd:.2f} > ${self._available:.2f}"
+            return True, "OK"
+
+    def reserve(self, pair, position_size_usd):
+        """Check + deduct budget atomically. Returns (ok, reason)."""
+        with self._lock:
+            ok, reason = self.can_open(pair, position_size_usd)
+            if ok:
+                self._reserved[pair] = float(position_size_usd)
+                self._available -= position_size_usd
+            return ok, reason
+
+    def release(self, pair):
+        """Order မအောင်မြင်ရင် reserve ထားတဲ့ budget ပြန်ထည့်"""
+        with self._lock:
+            amount = self._reserved.pop(pair, 0.0)
+            self._available += amount
+            return amount
+
+    def commit(self, pair, position):
+        """Reservation → open position (budget ကို reserve တုန်းက နုတ်ပြီးသား)"""
+        with self._lock:
+            if pair not in self._reserved:
+                raise KeyError(f"No budget reserved for {pair}")
+            del self._reserved[pair]
+            self._positions[pair] = position
+            self._log("OPEN", pair, position.to_dict())
+            return position
+
+    def restore(self, pair, position):
+        """Recovery (journal replay / exchange reconcile) - limit မစစ်ဘဲ margin နုတ်ပြီး ပြန်ထည့်"""
+        with self._lock:
+            previous = self._positions.get(pair)
+            if previous is not None:
+                self._available += previous['position_size_usd']
+            self._positions[pair] = position
+            self._available -= position['position_size_usd']
+            self._peaks[pair] = position.get('peak_pnl', 0)  # replayed peak is already on disk
+            return position
+
+    def mark(self, event, pair, **fields):
+        """Position field update (e.g. BREAKEVEN) + journal"""
+        with self._lock:
+            position = self._positions.get(pair)
+            if position is None:
+                return None
+            for key, value in fields.items():
+                position[key] = value
+            self._log(event, pair, fields)
+            return position
+
+    def record_peak(self, pair):
+        """
+        should_close_trade raises peak_pnl in memory only - journal it (PEAK) whenever it
+        passes the last journaled value, so a restart restores the real high-water mark.
+        """
+        with self._lock:
+            position = self._positions.get(pair)
+            if position is None:
+                return False
+            peak = position.get('peak_pnl')
+            if peak is None or peak <= self._peaks.get(pair, float("-inf")):
+                return False
+            self._log("PEAK", pair, {"peak_pnl": peak})
+            return True
+
+    # === CLOSING ===
+    def partial_close(self, pair, partial_percent, pnl):
+        """
+        Position ကို partial_percent ရာခိုင်နှုန်း လျှော့ပြီး budget ပြန်ထည့်
+        Returns (closed_quantity, closed_position_size) or None if the pair is not open.
+        """
+        with self._lock:
+            position = self._positions.get(pair)
+            if position is None:
+                return None
+            fraction = partial_percent / 100
+            closed_quantity = position['quantity'] * fraction
+            closed_position_size = position['position_size_usd'] * fraction
+            position['quantity'] = position['quantity'] - closed_quantity
+            position['position_size_usd'] = position['position_size_usd'] - closed_position_size
+            self._available += closed_position_size + pnl
+            self._log("PARTIAL", pair, {
+                "quantity": position['quantity'],
+                "position_size_usd": position['position_size_usd'],
+                "peak_pnl": position.get('peak_pnl', 0),
+                "partial_done": True,
+                "pnl": pnl,
+            })
+            return closed_quantity, closed_position_size
+
+    def close(self, pair, pnl):
+        """Full close - position ဖယ်ပြီး margin + PnL ပြန်ထည့်. Returns the removed position or None."""
+        with self._lock:
+            position = self._positions.pop(pair, None)
+            self._peaks.pop(pair, None)
+            if position is not None:
+                self._available += position['position_size_usd'] + pnl
+                self._log("CLOSE", pair, {"pnl": pnl})
+            return position
+
+    def discard(self, pair):
+        """Budget မထိဘဲ position ကို ဖယ် (already accounted for elsewhere)"""
+        with self._lock:
+            position = self._positions.pop(pair, None)
+            self._peaks.pop(pair, None)
+            if position is not None:
+                self._log("CLOSE", pair, {"pnl": 0.0})
+            return position
@@ -0,0 +1,55 @@
+# prefilter.py
+# LLM မခေါ်ခင် deterministic gate - prompt ထဲက rule တွေ မပြည့်နိုင်ရင် DeepSeek ကို မမေးဘဲ HOLD
+# mtf_analysis field တွေ + get_improved_fallback_decision ရဲ့ signal scoring ကိုပဲ သုံး (network / LLM မလို)
+#   PREFILTER=1 (default) / 0 = every pair goes to the LLM like before
+
+import os
+
+TREND_DIRECTION = {"BULLISH": "LONG", "BEARISH": "SHORT"}
+OVERSOLD = 30
+OVERBOUGHT = 70
+
+
+def enabled():
+    return os.getenv("PREFILTER", "1").lower() not in ("0", "false", "no", "off")
+
+
+def screen(mtf, position_direction=None):
+    """
+    {"passed", "reason", "detail", "direction"} - reason is a short key for stats/metrics.
+    New entry:  1H/4H trend must align, 15m must not contradict it, RSI not stretched into it,
+                and the fallback signal count must lean the same way.
+    Open position: only a 1H/4H flip against it can become a REVERSE, anything else is HOLD.
+    """
+    h1, h4, m15 = mtf.get('1h'), mtf.get('4h'), mtf.get('15m', {})
+    if not h1 or not h4:
+        return {"passed": False, "reason": "no_data", "detail": "missing 1H/4H analysis", "direction": None}
+
+    h1_trend, h4_trend = h1.get('trend'), h4.get('trend')
+    if h1_trend != h4_trend or h1_trend not in TREND_DIRECTION:
+        return {"passed": False, "reason": "trend_conflict", "detail": f"1H {h1_trend} vs 4H {h4_trend}", "direction": None}
+    direction = TREND_DIRECTION[h1_trend]
+
+    if position_direction is not None:
+        if position_direction == direction:
+            return {"passed": False, "reason": "position_aligned", "detail": f"holding {position_direction}, trend unchanged", "direction": direction}
+        return {"passed": True, "reason": "reverse_candidate", "detail": f"holding {position_direction}, 1H/4H now {h1_trend}", "direction": direction}
+
+    # Same signals as get_improved_fallback_decision, measured against the trend direction
+    bullish = (h1_trend == 'BULLISH') + (h4_trend == 'BULLISH')
+    bearish = (h1_trend == 'BEARISH') + (h4_trend == 'BEARISH')
+    rsi = h1.get('rsi', 50)
+    bullish += rsi < 35
+    bearish += rsi > 65
+    crossover = m15.get('crossover')
+    bullish += crossover == 'GOLDEN'
+    bearish += crossover == 'DEATH'
+    with_trend, against = (bullish, bearish) if direction == 'LONG' else (bearish, bullish)
+
+    if (direction == 'LONG' and rsi > OVERBOUGHT) or (direction == 'SHORT' and rsi < OVERSOLD):
+        return {"passed": False, "reason": "rsi_stretched", "detail": f"{direction} with 1H RSI {rsi}", "direction": direction}
+    if TREND_DIRECTION.get(m15.get('trend'), direction) != direction:
+        return {"passed": False, "reason": "no_trigger", "detail": f"15m {m15.get('trend')} against {direction}", "direction": direction}
+    if against >= with_trend:
+        return {"passed": False, "reason": "weak_signals", "detail": f"signals {with_trend}/{against}", "direction": direction}
+    return {"passed": True, "reason": "setup", "detail": f"{direction} setup, signals {with_trend}/{against}", "direction": direction}
@@ -0,0 +1,278 @@
+# prompt_builder.py
+# Entry decision prompt - static system block (rules + schema, call တိုင်း byte-for-byte တူ → provider prompt cache)
+# + compact numeric market block (pair တစ်ခုချင်း) ကို token budget အတွင်း
+#   PROMPT_STYLE=compact (default) / legacy (old free-form prompt - old LLM replay stores နဲ့ key တူ)
+#   Batch mode (LLM_BATCH=1): shortlist pair အားလုံးကို request တစ်ခုထဲ → {"decisions": [...]} (budget ကို model က ခွဲ)
+#   PROMPT_TOKEN_BUDGET=350 (market block)   PROMPT_MAX_TOKENS=120 (reply)
+
+import json
+import os
+
+from llm_router import first_json_object
+
+TIMEFRAMES = ['5m', '15m', '1h', '4h', '1d']
+REQUIRED_TIMEFRAMES = ('15m', '1h', '4h')
+TREND_CODE = {'BULLISH': 'B', 'BEARISH': 'S'}
+CROSS_CODE = {'GOLDEN': 'G', 'DEATH': 'D'}
+
+# Compact reply keys → parse_ai_trading_decision keys
+REPLY_KEYS = {'p': 'pair', 'd': 'decision', 'usd': 'position_size_usd', 'lev': 'leverage', 'conf': 'confidence', 'why': 'reasoning'}
+
+_ROLE = "You are an autonomous USDT-M futures trader on a 1H horizon. No TP/SL orders: you close positions manually.\n"
+_ENCODING = """TF rows: tf trend(B=bull,S=bear) xover(G=golden,D=death,-) rsi vol_spike(1/0) atr% support resistance.
+Optional: pos = open position (side entry pnl%), lessons = past mistakes to avoid.
+"""
+_RULES = """Rules:
+- Enter only if 1H and 4H trends align; confirm with a 15m crossover and a volume spike.
+- RSI<30 oversold, RSI>70 overbought.
+- Size 5-10% of budget (min $50); leverage 5-10 by volatility.
+- With an open position, REVERSE_LONG / REVERSE_SHORT (close it and open the opposite side) only if ALL hold:
+  pnl<=-2%, 1H and 4H flipped against it, 15m crossover in the new direction, volume spike.
+- Otherwise HOLD.
+"""
+_DECISION = '"d":"LONG|SHORT|HOLD|REVERSE_LONG|REVERSE_SHORT","usd":0,"lev":5,"conf":0,"why":"<=15 words"'
+
+SYSTEM_PROMPT = (_ROLE + "Each message is one pair. Header: pair, price, free budget USD, 1H/4H alignment.\n"
+                 + _ENCODING + _RULES
+                 + "Reply with one JSON object and nothing else:\n{" + _DECISION + "}")
+
+BATCH_SYSTEM_PROMPT = (_ROLE + "Each message starts with the free budget USD, then one block per pair. Block header: pair, price, 1H/4H alignment.\n"
+                       + _ENCODING + _RULES
+                       + "- Split the budget across pairs: total usd of new entries <= budget, stronger setups get more.\n"
+                       + "Reply with one JSON object and nothing else, one entry per pair in message order:\n"
+                       + '{"decisions":[{"p":"PAIR",' + _DECISION + '}]}')
+
+
+def estimate_tokens(text):
+    """~4 chars per token (no tokenizer dependency) - budget guard, not billing"""
+    return (len(text) + 3) // 4
+
+
+def _num(value):
+    return f"{value:.6g}"
+
+
+def _tf_row(tf, d):
+    return (f"{tf:<4}{TREND_CODE.get(d.get('trend'), '?')} {CROSS_CODE.get(d.get('crossover'), '-')} "
+            f"{d.get('rsi', 50):.0f} {1 if d.get('vol_spike') else 0} {d.get('atr_percent', 0):.2f} "
+            f"{_num(d.get('support', 0))} {_num(d.get('resistance', 0))}")
+
+
+def market_block(pair, market_data, budget_usd, position=None, lessons=(), token_budget=350):
+    """
+    Required: header, 15m/1h/4h rows, open position. Then 5m/1d rows and lesson lines
+    in priority order while the block stays within token_budget. budget_usd=None → no
+    budget in the header (batch blocks share one budget line).
+    """
+    mtf = market_data.get('mtf_analysis', {})
+    h1, h4 = mtf.get('1h', {}).get('trend'), mtf.get('4h', {}).get('trend')
+    align = "ALIGNED" if h1 and h1 == h4 else "MIXED"
+    budget = f" budget {budget_usd:.0f}" if budget_usd is not None else ""
+    header = [f"{pair} px {_num(market_data.get('current_price', 0))}{budget} {align}",
+              "tf  tr x rsi vs atr% sup res"]
+    rows = {tf: _tf_row(tf, mtf[tf]) for tf in TIMEFRAMES if tf in mtf}
+    selected = {tf for tf in REQUIRED_TIMEFRAMES if tf in rows}
+    pos = []
+    if position is not None:
+        direction, entry, pnl = position
+        pos.append(f"pos {direction} {_num(entry)} {pnl:+.2f}%")
+
+    used = estimate_tokens("\n".join(header + [rows[tf] for tf in selected] + pos))
+    kept = []
+    optional = [(tf, rows[tf]) for tf in ('5m', '1d') if tf in rows]
+    optional += [(None, ("lessons: " if i == 0 else "") + line) for i, line in enumerate(lessons)]
+    for tf, line in optional:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        used += cost
+        if tf is not None:
+            selected.add(tf)
+        else:
+            kept.append(line)
+    return "\n".join(header + [rows[tf] for tf in TIMEFRAMES if tf in selected] + pos + kept)
+
+
+def batch_block(entries, budget_usd, lessons=(), token_budget=350):
+    """
+    entries = [(pair, market_data, position or None)] → budget line + one market block per
+    pair (token_budget each), then the shared lesson lines while the total stays within budget.
+    """
+    blocks = [f"budget {budget_usd:.0f} pairs {len(entries)}"]
+    blocks += [market_block(pair, market_data, None, position, (), token_budget) for pair, market_data, position in entries]
+    used = estimate_tokens("\n".join(blocks))
+    limit = token_budget * len(entries)
+    for i, line in enumerate(lessons):
+        line = ("lessons: " if i == 0 else "") + line
+        if used + estimate_tokens(line) + 1 > limit:
+            break
+        used += estimate_tokens(line) + 1
+        blocks.append(line)
+    return "\n".join(blocks)
+
+
+def compact_lessons(learning_context):
+    """get_learning_enhanced_prompt text → short lesson lines (headers / boilerplate dropped)"""
+    out = []
+    for line in (learning_context or "").splitlines():
+        line = line.strip()
+        if line.startswith("- "):
+            out.append(line[2:])
+        elif line.startswith("Latest:"):
+            out.append(line)
+    return out
+
+
+def expand_reply(data):
+    """Compact reply keys → the keys parse_ai_trading_decision reads (full keys pass through)"""
+    return {REPLY_KEYS.get(key, key): value for key, value in data.items()}
+
+
+def batch_decisions(content):
+    """Batch reply → list of expanded decision dicts, or None when it isn't {"decisions": [...]}"""
+    obj = first_json_object(content)
+    if obj is None:
+        return None
+    decisions = json.loads(obj).get("decisions")
+    if not isinstance(decisions, list):
+        return None
+    return [expand_reply(item) for item in decisions if isinstance(item, dict)]
+
+
+def valid_batch_reply(content):
+    """LLMRouter validator for batch mode (a plain single-decision object gets the request retried/hedged)"""
+    return batch_decisions(content) is not None
+
+
+def style():
+    return os.getenv("PROMPT_STYLE", "compact").lower()
+
+
+def batch_enabled():
+    return os.getenv("LLM_BATCH", "0").lower() in ("1", "true", "yes", "on")
+
+
+def compact_payload(model, pair, market_data, budget_usd, position=None, learning_context=""):
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": market_block(pair, market_data, budget_usd, position, compact_lessons(learning_context),
+                                                     int(os.getenv("PROMPT_TOKEN_BUDGET", "350")))}
+        ],
+        "temperature": 0.3,
+        "max_tokens": int(os.getenv("PROMPT_MAX_TOKENS", "120")),
+        "response_format": {"type": "json_object"}
+    }
+
+
+def legacy_payload(model, pair, market_data, budget_usd, position=None, learning_context=""):
+    """The original free-form prompt, unchanged (recorded LLM replay stores are keyed on it)"""
+    current_price = market_data.get('current_price', 0)
+    mtf = market_data.get('mtf_analysis', {})
+
+    # === MULTI-TIMEFRAME TEXT SUMMARY ===
+    mtf_text = "MULTI-TIMEFRAME ANALYSIS:\n"
+    for tf in TIMEFRAMES:
+        if tf in mtf:
+            d = mtf[tf]
+            mtf_text += f"- {tf.upper()}: {d.get('trend', 'N/A')} | "
+            if 'crossover' in d:
+                mtf_text += f"Signal: {d['crossover']} | "
+            if 'rsi' in d:
+                mtf_text += f"RSI: {d['rsi']} | "
+            if 'vol_spike' in d:
+                mtf_text += f"Vol: {'SPIKE' if d['vol_spike'] else 'Normal'} | "
+            if 'support' in d and 'resistance' in d:
+                mtf_text += f"S/R: {d['support']:.4f}/{d['resistance']:.4f}"
+            mtf_text += "\n"
+
+    # === TREND ALIGNMENT ===
+    h1_trend = mtf.get('1h', {}).get('trend')
+    h4_trend = mtf.get('4h', {}).get('trend')
+    alignment = "STRONG" if h1_trend == h4_trend and h1_trend else "WEAK"
+
+    # === REVERSE ANALYSIS ===
+    reverse_analysis = ""
+    if position is not None:
+        direction, entry, pnl = position
+        reverse_analysis = f"""
+                EXISTING POSITION:
+                - Direction: {direction}
+                - Entry: ${entry:.4f}
+                - PnL: {pnl:.2f}%
+                - REVERSE if trend flipped?
+                """
+
+    prompt = f"""
+YOU ARE A PROFESSIONAL AI TRADER. Budget: ${budget_usd:.2f}
+
+{mtf_text}
+TREND ALIGNMENT: {alignment}
+
+1H TRADING PAIR: {pair}
+Current Price: ${current_price:.6f}
+{reverse_analysis}
+{learning_context}
+
+RULES:
+- Only trade if 1H and 4H trend align
+- Confirm entry with 15m crossover + volume spike
+- RSI < 30 = oversold, > 70 = overbought
+- Position size: 5-10% of budget ($50 min)
+- Leverage: 5-10x based on volatility
+- NO TP/SL - you will close manually
+
+REVERSE POSITION STRATEGY (CRITICAL):
+- Use "REVERSE_LONG"  → Close current SHORT + Open LONG immediately
+- Use "REVERSE_SHORT" → Close current LONG  + Open SHORT immediately
+- REVERSE only if ALL conditions met:
+  1. Current PnL ≤ -2%
+  2. 1H and 4H trend flipped (opposite to current position)
+  3. 15m shows crossover in new direction
+  4. Volume spike confirms momentum
+- Example:
+  • You have SHORT @ $100 → Price now $103 → PnL: -3%
+  • 4H: BEARISH → BULLISH, 15m: GOLDEN cross, Volume: SPIKE
+  → Return "REVERSE_LONG"
+
+Return JSON:
+{{
+    "decision": "LONG" | "SHORT" | "HOLD" | "REVERSE_LONG" | "REVERSE_SHORT",
+    "position_size_usd": number,
+    "entry_price": number,
+    "leverage": number,
+    "confidence": 0-100,
+    "reasoning": "MTF alignment + signal + risk"
+}}
+"""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "You are a fully autonomous AI trader with reverse position capability. You manually close positions based on market conditions - no TP/SL orders are set. Analyze when to enter AND when to exit based on technical analysis. Monitor every 3 minute."},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 800
+    }
+
+
+def batch_payload(model, entries, budget_usd, learning_context=""):
+    """chat/completions body for one request covering every entry (pair, market_data, position); always compact"""
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": batch_block(entries, budget_usd, compact_lessons(learning_context),
+                                                    int(os.getenv("PROMPT_TOKEN_BUDGET", "350")))}
+        ],
+        "temperature": 0.3,
+        "max_tokens": int(os.getenv("PROMPT_MAX_TOKENS", "120")) * len(entries),
+        "response_format": {"type": "json_object"}
+    }
+
+
+def build_payload(model, pair, market_data, budget_usd, position=None, learning_context=""):
+    """chat/completions body for an entry decision; position = (direction, entry_price, pnl_percent) or None"""
+    builder = legacy_payload if style() == "legacy" else compact_payload
+    return builder(model, pair, market_data, budget_usd, position, learning_context)
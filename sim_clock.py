@@ -0,0 +1,75 @@
+# sim_clock.py
+# Injectable clock - bot.py / learn_script.py က time.time()/time.sleep() အစား self.clock ကို သုံး
+#   SystemClock     live / paper trading (wall clock, sleep က တကယ်စောင့်)
+#   SimulatedClock  recorded data replay - sleep() က မစောင့်ဘဲ virtual time ကို ချက်ချင်း ရှေ့တိုး
+# SIM_CLOCK=1 + FAKE_EXCHANGE_KLINES → fake exchange ရဲ့ data range ပေါ်မှာ 3-minute cycle တွေ seconds အတွင်း ပြီး
+# Warmup: simulated start (FAKE_EXCHANGE_START) ရှေ့မှာ daily bar အနည်းဆုံး 21 ခု (= 5m data 21 ရက်) လို - 1d EMA21
+#   မပြည့်ရင် MTF analysis fail → pair ကို HOLD (replay ထဲ live api.binance.com data မရောရအောင် network fallback မလုပ်)
+
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class SimulationFinished(KeyboardInterrupt):
+    """
+    Virtual time ran past the end of the recorded data.
+    Subclasses KeyboardInterrupt so the trading loops stop exactly like Ctrl+C
+    (final history + stats, then exit) and `except Exception` blocks don't swallow it.
+    """
+
+
+class SystemClock:
+    simulated = False
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def now(self, tz=None):
+        """datetime.now(tz) equivalent"""
+        return datetime.fromtimestamp(self.time(), tz)
+
+
+class SimulatedClock(SystemClock):
+    """Virtual epoch-seconds clock: only sleep()/advance()/set_time() move it"""
+
+    simulated = True
+
+    def __init__(self, start=None, end=None):
+        self._now = float(start if start is not None else time.time())
+        self.end = end
+        self.slept = 0.0
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        with self._lock:
+            if seconds > 0:
+                self._now += seconds
+                self.slept += seconds
+            finished = self.end is not None and self._now >= self.end
+        if finished:
+            raise SimulationFinished(f"simulated clock reached {self.now():%Y-%m-%d %H:%M}")
+
+    def set_time(self, ts, end=None):
+        with self._lock:
+            self._now = float(ts)
+            if end is not None:
+                self.end = end
+
+
+def clock_from_env():
+    """SIM_CLOCK=1 (fake exchange နဲ့ပဲ အဓိပ္ပာယ်ရှိ) → SimulatedClock, otherwise SystemClock"""
+    if os.getenv("SIM_CLOCK", "").strip().lower() in ("1", "true", "yes") and os.getenv("FAKE_EXCHANGE_KLINES"):
+        return SimulatedClock()
+    return SystemClock()
@@ -0,0 +1,248 @@
+# structured_log.py
+# Queue-based structured logging - trading thread က queue ထဲ ထည့်ရုံပဲ၊ terminal/file ရေးတာ background thread
+#   LOG_LEVEL=INFO          DEBUG / INFO / WARNING / ERROR
+#   LOG_CONSOLE=color       color / plain (ANSI မပါ) / off
+#   LOG_JSON_FILE=trader_log.jsonl   JSON line per record (empty = off, 50MB x 3 rotate)
+# sample=N → ပုံစံတူ line (ဂဏန်းတွေ မရေ) N ခုမှာ တစ်ခုပဲ ထုတ်
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+
+ROOT = "trader"
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+DIGITS = re.compile(r"\d+(?:\.\d+)?")
+RESET = "\x1b[0m"
+
+_queue = None
+_listener = None
+_loggers = {}
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """{"ts", "level", "logger", "msg", ...fields} - ANSI codes stripped"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": ANSI.sub("", record.getMessage()).strip(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Message as the old print_color showed it; record.color = ANSI prefix"""
+
+    def __init__(self, color=True):
+        super().__init__()
+        self.color = color
+
+    def format(self, record):
+        text = record.getMessage()
+        if record.exc_text:
+            text = f"{text}\n{record.exc_text}"
+        if not self.color:
+            return ANSI.sub("", text)
+        color = getattr(record, "color", "")
+        return f"{color}{text}{RESET}" if color else text
+
+
+class _BatchFlush:
+    """Per-record flush ကို ကျော်၊ listener က batch တစ်ခုပြီးမှ flush_batch() တစ်ခါ"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class ConsoleHandler(_BatchFlush, logging.StreamHandler):
+    pass
+
+
+class JsonFileHandler(_BatchFlush, logging.handlers.RotatingFileHandler):
+    """Size check once per batch instead of a stat + tell per record"""
+
+    def shouldRollover(self, record):
+        return False
+
+    def flush_batch(self):
+        super().flush_batch()
+        if self.stream is not None and self.maxBytes > 0 and self.stream.tell() >= self.maxBytes:
+            self.doRollover()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record itself (only this handler sees it): merge args, pre-render the traceback"""
+
+    def prepare(self, record):
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BatchListener:
+    """
+    QueueListener equivalent that drains whatever is queued, hands it to the handlers
+    and flushes each handler once per batch - one write syscall per burst of lines.
+    """
+
+    _sentinel = None
+
+    def __init__(self, log_queue, handlers, batch_size=512):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record is self._sentinel:
+                    stop = True
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                try:
+                    handler.flush_batch()
+                except Exception:
+                    pass
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+
+class SamplingFilter(logging.Filter):
+    """record.sample = N → only every Nth record of the same shape passes (runs in the caller thread)"""
+
+    def __init__(self):
+        super().__init__()
+        self.counts = {}
+
+    def filter(self, record):
+        every = getattr(record, "sample", None)
+        if not every or every <= 1:
+            return True
+        key = (record.name, DIGITS.sub("#", str(record.msg)))
+        seen = self.counts.get(key, 0)
+        self.counts[key] = seen + 1
+        return seen % every == 0
+
+
+def setup(level=None, console=None, json_file=None):
+    """Idempotent; arguments override the LOG_* environment variables"""
+    global _queue, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return logging.getLogger(ROOT)
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        console = (console or os.getenv("LOG_CONSOLE", "color")).lower()
+        json_file = os.getenv("LOG_JSON_FILE", "trader_log.jsonl") if json_file is None else json_file
+
+        handlers = []
+        if console != "off":
+            stream = ConsoleHandler(sys.stdout)
+            stream.setFormatter(ConsoleFormatter(color=console == "color"))
+            handlers.append(stream)
+        if json_file:
+            rotating = JsonFileHandler(json_file, maxBytes=50 * 1024 * 1024, backupCount=3, encoding="utf-8")
+            rotating.setFormatter(JsonFormatter())
+            handlers.append(rotating)
+
+        _queue = queue.Queue(-1)
+        queue_handler = _QueueHandler(_queue)
+        queue_handler.addFilter(SamplingFilter())
+        logger = logging.getLogger(ROOT)
+        logger.setLevel(getattr(logging, level, logging.INFO))
+        logger.handlers = [queue_handler]
+        logger.propagate = False
+        _listener = BatchListener(_queue, handlers)
+        _listener.start()
+        atexit.register(shutdown)
+        return logger
+
+
+def get_logger(name=None):
+    log = _loggers.get(name)
+    if log is None:
+        setup()
+        log = _loggers[name] = logging.getLogger(f"{ROOT}.{name}" if name else ROOT)
+    return log
+
+
+def flush():
+    """Block until everything queued so far is written (before input(), at the end of a run)"""
+    if _queue is not None and _listener is not None:
+        _queue.join()
+
+
+def shutdown():
+    """Drain the queue and close the handlers (registered with atexit)"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def infer_level(text):
+    """print_color callers don't pass a level - guess from the message"""
+    lowered = text.lower()
+    if "❌" in text or "error" in lowered or "failed" in lowered:
+        return logging.ERROR
+    if "⚠" in text or "warning" in lowered:
+        return logging.WARNING
+    return logging.INFO
+
+
+def console(text, color="", level=None, sample=None, name=None, **fields):
+    """print_color replacement: level inferred when not given, extra keyword args go to the JSON fields"""
+    log = get_logger(name)
+    level = level if level is not None else infer_level(text)
+    if not log.isEnabledFor(level):
+        return
+    # makeRecord + handle = Logger.log without the findCaller() stack walk (hot path)
+    log.handle(log.makeRecord(log.name, level, "", 0, text, None, None,
+                              extra={"color": color, "sample": sample, "fields": fields or None}))
@@ -0,0 +1,68 @@
+# test_circuit_breaker.py
+# CircuitBreaker state machine on a fake clock: trip, fail fast, single half-open probe, backoff, slow calls
+
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", window=10, min_calls=4, failure_rate=0.5, slow_seconds=0.05, cooldown=30,
+                          time_fn=clock.time)
+
+
+def boom():
+    raise ConnectionError("down")
+
+
+def trip(breaker):
+    for _ in range(4):
+        with pytest.raises(ConnectionError):
+            breaker.call(boom)
+
+
+def test_trips_after_errors_and_fails_fast(breaker):
+    trip(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 1)
+    assert breaker.rejected == 1
+
+
+def test_failed_probe_doubles_cooldown(breaker, clock):
+    trip(breaker)
+    clock.advance(31)
+    assert breaker.allow()
+    assert not breaker.allow(), "half-open must allow exactly one probe"
+    breaker.record(False)
+    assert breaker.state == OPEN and breaker.cooldown == 60
+    clock.advance(31)
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_and_resets_cooldown(breaker, clock):
+    trip(breaker)
+    clock.advance(31)
+    assert breaker.allow()
+    breaker.record(False)
+    clock.advance(61)
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == CLOSED and breaker.cooldown == 30
+
+
+def test_slow_successes_count_as_failures(breaker):
+    for _ in range(4):
+        breaker.call(time.sleep, 0.06)
+    assert breaker.state == OPEN
+
+
+def test_disabled_breaker_never_opens(clock):
+    breaker = CircuitBreaker("off", min_calls=1, time_fn=clock.time, enabled=False)
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            breaker.call(boom)
+    assert breaker.state == CLOSED
@@ -0,0 +1,119 @@
+# test_llm_router.py
+# LLMRouter against a local stub OpenRouter: hedging, invalid JSON, latency ranking, deadline, SSE cut / reject
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_router import LLMRouter, LLMRouterError, first_json_object
+
+BEHAVIOUR = {"slow/model": (3.0, '{"decision": "HOLD"}'), "fast/model": (0.05, '{"decision": "LONG"}'),
+             "broken/model": (0.01, "not json at all")}
+# SSE models: chunks every 50ms, then 3s of rambling after the object
+STREAMING = {"stream/model": ['Sure. {"decision": "SH', 'ORT", "reasoning": "a \\"}\\" b"}', "\n\nBecause"] + [" more"] * 60,
+             "garbled/model": ['{"decision": HOLD}', " and then"] + [" more"] * 60}
+PAYLOAD = {"messages": [{"role": "user", "content": "ping"}]}
+
+
+class Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # chunked SSE, like the real API
+
+    def chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body.get("stream") and body["model"] in STREAMING:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                self.chunk(b": OPENROUTER PROCESSING\n\n")
+                for piece in STREAMING[body["model"]]:
+                    delta = {"choices": [{"delta": {"content": piece}}]}
+                    self.chunk(f"data: {json.dumps(delta)}\n\n".encode())
+                    time.sleep(0.05)
+                self.chunk(b"data: [DONE]\n\n")
+                self.chunk(b"")
+            except OSError:
+                pass  # client hung up early
+            return
+        delay, content = BEHAVIOUR[body["model"]]
+        time.sleep(delay)
+        reply = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        try:
+            self.wfile.write(reply)
+        except OSError:
+            pass  # deadline passed, client gone
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    server.shutdown()
+    server.server_close()
+
+
+def test_slow_primary_is_hedged_to_fast_alternate(url):
+    router = LLMRouter(["slow/model", "fast/model"], url=url, timeout=10, hedge_after=0.5)
+    started = time.perf_counter()
+    _, model, _ = router.complete(PAYLOAD)
+    assert model == "fast/model"
+    assert time.perf_counter() - started < 1.5
+
+
+def test_invalid_json_is_replaced(url):
+    router = LLMRouter(["broken/model", "fast/model"], url=url, timeout=10, hedge_after=5)
+    _, model, _ = router.complete(PAYLOAD)
+    assert model == "fast/model"
+    assert router.profiles["broken/model"].errors == 1
+
+
+def test_latency_ranking_prefers_fast_model(url):
+    router = LLMRouter(["slow/model", "fast/model"], url=url, timeout=10, hedge_after=None)
+    for _ in range(6):
+        router.complete(PAYLOAD)
+    assert router.ranked()[0] == "fast/model"
+
+
+def test_deadline_enforced(url):
+    router = LLMRouter(["slow/model"], url=url, timeout=1, hedge_after=0.3)
+    with pytest.raises(LLMRouterError) as error:
+        router.complete(PAYLOAD)
+    assert error.value.kind == "deadline"
+
+
+def test_stream_cut_at_closing_brace(url):
+    router = LLMRouter(["stream/model"], url=url, timeout=10, hedge_after=5)
+    started = time.perf_counter()
+    content, _, _ = router.complete(PAYLOAD)
+    assert json.loads(content)["decision"] == "SHORT"
+    assert time.perf_counter() - started < 0.5
+
+
+def test_malformed_stream_rejected_early(url):
+    router = LLMRouter(["garbled/model", "fast/model"], url=url, timeout=10, hedge_after=5)
+    started = time.perf_counter()
+    _, model, _ = router.complete(PAYLOAD)
+    assert model == "fast/model"
+    assert time.perf_counter() - started < 0.5
+
+
+def test_first_json_object():
+    assert first_json_object('x {"a": 1} y {"b": 2}') == '{"a": 1}'
+    assert first_json_object('{"a": }') is None
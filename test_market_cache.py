@@ -0,0 +1,55 @@
+# test_market_cache.py
+# MarketDataCache: TTL hits, single-flight under concurrency, failed fetches never cached
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from market_cache import MarketDataCache
+
+
+@pytest.fixture
+def cache(clock):
+    return MarketDataCache(ttl=60, time_fn=clock.time)
+
+
+def test_concurrent_misses_share_one_fetch(cache):
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        time.sleep(0.1)
+        return {"current_price": 100.0}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get(("mtf", "SOLUSDT"), slow_fetch), range(8)))
+    assert len(fetches) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.misses == 1 and cache.waits == 7
+
+
+def test_hit_within_ttl_refetch_after(cache, clock):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return len(fetches)
+
+    assert cache.get("k", fetch) == 1
+    clock.advance(30)
+    assert cache.get("k", fetch) == 1
+    clock.advance(31)
+    assert cache.get("k", fetch) == 2
+    assert cache.get("p", fetch, ttl=0) == 3
+
+
+def test_failed_fetch_not_cached(cache):
+    assert cache.get(("price", "SOLUSDT"), lambda: None, ttl=5) is None
+    assert cache.get(("price", "SOLUSDT"), lambda: 101.5, ttl=5) == 101.5
+
+
+def test_fetch_error_releases_waiters(cache):
+    with pytest.raises(RuntimeError):
+        cache.get("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert cache.get("k", lambda: 1) == 1
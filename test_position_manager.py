@@ -0,0 +1,40 @@
+# test_position_manager.py
+# PositionLedger + PositionJournal: peak_pnl high-water mark survives a crash / replay
+
+from bot import should_close_trade
+from position_journal import PositionJournal
+from position_manager import PositionLedger
+from trade_records import Position
+
+
+def open_position(ledger, price=100.0):
+    ledger.reserve("SOLUSDT", 50.0)
+    return ledger.commit("SOLUSDT", Position("SOLUSDT", "LONG", price, 2.5, 50.0, 5))
+
+
+def test_rising_peak_is_journaled_and_replayed(tmp_path):
+    journal = PositionJournal(str(tmp_path / "positions.wal"), fsync=False)
+    ledger = PositionLedger(500, 4, journal=journal)
+    position = open_position(ledger)
+
+    should_close_trade(position, 102.0)          # +10% at 5x → peak in memory only
+    assert ledger.record_peak("SOLUSDT")
+    assert not ledger.record_peak("SOLUSDT")     # unchanged peak → no extra event
+    should_close_trade(position, 101.0)          # price falls back, peak stays
+    assert not ledger.record_peak("SOLUSDT")
+
+    recovered = PositionJournal(journal.path).replay()["SOLUSDT"]
+    assert recovered['peak_pnl'] == position['peak_pnl'] > 0
+
+
+def test_restored_peak_is_not_rejournaled(tmp_path):
+    path = str(tmp_path / "positions.wal")
+    ledger = PositionLedger(500, 4, journal=PositionJournal(path, fsync=False))
+    position = open_position(ledger)
+    should_close_trade(position, 103.0)
+    ledger.record_peak("SOLUSDT")
+
+    restarted = PositionLedger(500, 4, journal=PositionJournal(path, fsync=False))
+    for pair, replayed in PositionJournal(path).replay().items():
+        restarted.restore(pair, replayed)
+    assert not restarted.record_peak("SOLUSDT")
@@ -0,0 +1,187 @@
+# trade_records.py
+# Slotted Position / ClosedTrade records - ad-hoc dict တွေအစား field တွေ ပုံသေ
+
+# History file ထဲက အဟောင်း key နာမည်တွေ → record field
+_LEGACY_KEYS = {
+    "position_size": "position_size_usd",
+    "peak_pnl": "peak_pnl_pct",
+}
+
+
+def _leveraged_pnl_pct(direction, entry_price, price, leverage):
+    if not entry_price:
+        return 0.0
+    if direction == "LONG":
+        return (price - entry_price) / entry_price * 100 * leverage
+    return (entry_price - price) / entry_price * 100 * leverage
+
+
+class _Record:
+    """
+    __slots__ record that still answers the dict protocol (trade['pnl'], trade.get(...), 'x' in trade)
+    so the exit rules, learner and ML logger keep working unchanged.
+    A field counts as present when it is not None.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return getattr(self, key, None) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def keys(self):
+        return [k for k in self.__slots__ if getattr(self, k, None) is not None]
+
+    def to_dict(self):
+        """JSON-ready dict (history file / WAL / ML logger)"""
+        out = {}
+        for k in self.__slots__:
+            value = getattr(self, k, None)
+            if value is not None:
+                out[k] = value
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        """Tolerant loader - legacy key names are mapped, unknown keys are dropped"""
+        record = cls.__new__(cls)
+        for k in cls.__slots__:
+            setattr(record, k, None)
+        for key, value in data.items():
+            key = _LEGACY_KEYS.get(key, key)
+            if key in cls.__slots__ and getattr(record, key) is None:
+                setattr(record, key, value)
+        record._fill_defaults()
+        return record
+
+    def _fill_defaults(self):
+        pass
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.keys())
+        return f"{type(self).__name__}({fields})"
+
+
+class Position(_Record):
+    """Open position tracked by the 3-layer exit system"""
+    __slots__ = (
+        "pair", "direction", "entry_price", "quantity", "position_size_usd", "leverage",
+        "entry_time", "entry_time_th", "status", "ai_confidence", "ai_reasoning",
+        "entry_context", "has_tp_sl", "peak_pnl", "partial_done", "breakeven_done",
+    )
+
+    def __init__(self, pair, direction, entry_price, quantity, position_size_usd, leverage,
+                 entry_time=None, entry_time_th=None, status="ACTIVE", ai_confidence=0.0,
+                 ai_reasoning="", entry_context=None, has_tp_sl=False, peak_pnl=0.0,
+                 partial_done=False, breakeven_done=False):
+        self.pair = pair
+        self.direction = direction
+        self.entry_price = float(entry_price)
+        self.quantity = float(quantity)
+        self.position_size_usd = float(position_size_usd)
+        self.leverage = leverage
+        self.entry_time = entry_time
+        self.entry_time_th = entry_time_th
+        self.status = status
+        self.ai_confidence = ai_confidence
+        self.ai_reasoning = ai_reasoning
+        self.entry_context = entry_context  # market setup at entry (pattern index key)
+        self.has_tp_sl = has_tp_sl
+        self.peak_pnl = peak_pnl
+        self.partial_done = partial_done
+        self.breakeven_done = breakeven_done
+
+    def _fill_defaults(self):
+        if self.status is None:
+            self.status = "ACTIVE"
+        if self.has_tp_sl is None:
+            self.has_tp_sl = False
+        if self.peak_pnl is None:
+            self.peak_pnl = 0.0
+        if self.partial_done is None:
+            self.partial_done = False
+        if self.breakeven_done is None:
+            self.breakeven_done = False
+
+    @classmethod
+    def from_dict(cls, data):
+        record = super().from_dict(data)
+        # Position မှာ live peak က peak_pnl (legacy mapping ကို ပြန်ဖြေ)
+        if "peak_pnl" in data:
+            record.peak_pnl = data["peak_pnl"]
+        return record
+
+    def pnl_percent_at(self, price):
+        return _leveraged_pnl_pct(self.direction, self.entry_price, price, self.leverage)
+
+
+class ClosedTrade(_Record):
+    """Full or partial close - one row in the trade history / ML dataset"""
+    __slots__ = tuple(k for k in Position.__slots__ if k not in ("peak_pnl", "partial_done", "breakeven_done")) + (
+        "exit_price", "pnl", "pnl_percent", "peak_pnl_pct", "close_reason", "close_time",
+        "close_timestamp", "partial_percent", "closed_quantity", "closed_position_size",
+        "trade_type", "display_type",
+    )
+
+    @classmethod
+    def from_position(cls, position, exit_price, pnl, close_reason, close_time=None,
+                      partial_percent=100, closed_quantity=None, closed_position_size=None,
+                      status=None):
+        """Position snapshot + exit fields. peak_pnl_pct ကို ဒီမှာ တစ်ခါတည်း တွက်ထား"""
+        trade = cls.__new__(cls)
+        for k in cls.__slots__:
+            setattr(trade, k, getattr(position, k, None))
+        trade.status = status or ("CLOSED" if partial_percent >= 100 else "PARTIAL_CLOSE")
+        trade.exit_price = float(exit_price)
+        trade.pnl = float(pnl)
+        trade.pnl_percent = position.pnl_percent_at(exit_price)
+        peak = position.peak_pnl
+        if peak is None:
+            peak = max(0.0, trade.pnl_percent)
+        trade.peak_pnl_pct = round(peak, 3)
+        trade.close_reason = close_reason
+        trade.close_time = close_time
+        trade.close_timestamp = None
+        trade.partial_percent = partial_percent
+        trade.closed_quantity = closed_quantity
+        trade.closed_position_size = closed_position_size
+        trade.trade_type = None
+        trade.display_type = "FULL_CLOSE" if partial_percent >= 100 else f"PARTIAL_{partial_percent}%"
+        return trade
+
+    def _fill_defaults(self):
+        if self.partial_percent is None:
+            self.partial_percent = 100
+        if self.pnl is None:
+            self.pnl = 0.0
+        if self.peak_pnl_pct is None:
+            if self.exit_price is not None and self.entry_price:
+                self.peak_pnl_pct = max(0.0, _leveraged_pnl_pct(self.direction, self.entry_price, self.exit_price, self.leverage or 1))
+            else:
+                self.peak_pnl_pct = 0.0
+        if self.display_type is None:
+            self.display_type = "FULL_CLOSE" if self.partial_percent >= 100 else f"PARTIAL_{self.partial_percent}%"
+
+
+def load_trade_history(raw_history):
+    """JSON list → ClosedTrade list"""
+    return [t if isinstance(t, ClosedTrade) else ClosedTrade.from_dict(t) for t in raw_history]
+
+
+def dump_trade_history(history):
+    """ClosedTrade list → JSON-ready list"""
+    return [t.to_dict() if isinstance(t, _Record) else t for t in history]
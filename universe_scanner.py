@@ -0,0 +1,168 @@
+# universe_scanner.py
+# Dynamic pair universe - USDT-M futures အားလုံးထဲက trade လုပ်သင့်တဲ့ top N ကို ရွေး
+#   1. 24hr ticker bulk request တစ်ခု → quote volume အများဆုံး candidate K ခု
+#   2. Candidate တွေရဲ့ 1h klines (parallel) → ATR% + 1h/4h EMA trend alignment (numpy, symbol × bar matrix)
+#   3. score = volume rank + ATR% rank + alignment → top N (held positions အမြဲ ပါ)
+# LLM ကို shortlist ထဲက pair တွေပဲ မေးတာမို့ market coverage တိုးလည်း LLM cost မတိုး
+#   UNIVERSE_TOP_N=0 (off, static available_pairs)   UNIVERSE_CANDIDATES=20   UNIVERSE_MIN_VOLUME=20000000 (USDT/24h)
+#   UNIVERSE_STICKINESS=0.05 - လက်ရှိ pair တွေကို score bonus (cycle တိုင်း အပြောင်းအလဲ မဖြစ်အောင်)
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+import structured_log
+
+FAPI = "https://fapi.binance.com/fapi/v1"
+WEIGHTS = {"volume": 0.4, "atr": 0.3, "trend": 0.3}
+
+
+class PublicFuturesREST:
+    """
+    No API key (paper trading / orchestrator market data): the public endpoints the scanner and
+    the market-data path need, on one keep-alive session. FUTURES_URL + session → binance_fetcher
+    revalidates exchangeInfo with ETags like it does for python-binance's Client.
+    """
+    FUTURES_URL = "https://fapi.binance.com/fapi"
+    FUTURES_API_VERSION = "v1"
+
+    def __init__(self, session=None):
+        self.session = session or requests.Session()
+
+    def _get(self, path, params):
+        response = self.session.get(f"{FAPI}/{path}", params=params, timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    def futures_ticker(self, **params):
+        return self._get("ticker/24hr", params)
+
+    def futures_klines(self, **params):
+        return self._get("klines", params)
+
+    def futures_symbol_ticker(self, **params):
+        return self._get("ticker/price", params)
+
+    def futures_exchange_info(self, **params):
+        return self._get("exchangeInfo", params)
+
+    def futures_ping(self, **params):
+        return self._get("ping", params)
+
+
+def _rank(values):
+    """Percentile rank in [0, 1] (single value → 1)"""
+    if len(values) < 2:
+        return np.ones(len(values))
+    return values.argsort().argsort() / (len(values) - 1)
+
+
+def _ema(closes, period):
+    """EMA along the bar axis for every symbol row at once"""
+    alpha = 2 / (period + 1)
+    ema = closes[:, 0].copy()
+    for j in range(1, closes.shape[1]):
+        ema += alpha * (closes[:, j] - ema)
+    return ema
+
+
+class UniverseScanner:
+    def __init__(self, top_n=0, candidates=20, min_quote_volume=20e6, stickiness=0.05, interval="1h", bars=100, atr_period=14, ema_period=20):
+        self.top_n = top_n
+        self.stickiness = stickiness
+        self.candidates = max(candidates, top_n)
+        self.min_quote_volume = min_quote_volume
+        self.interval = interval
+        self.bars = bars
+        self.atr_period = atr_period
+        self.ema_period = ema_period
+        self.last_ranking = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            top_n=int(os.getenv("UNIVERSE_TOP_N", "0")),
+            candidates=int(os.getenv("UNIVERSE_CANDIDATES", "20")),
+            min_quote_volume=float(os.getenv("UNIVERSE_MIN_VOLUME", "20000000")),
+            stickiness=float(os.getenv("UNIVERSE_STICKINESS", "0.05")),
+        )
+
+    @property
+    def enabled(self):
+        return self.top_n > 0
+
+    def _candidates(self, client):
+        symbols, volumes = [], []
+        for t in client.futures_ticker():
+            symbol = t["symbol"]
+            # Perpetual USDT pairs only (delivery contracts look like BTCUSDT_250627)
+            if not symbol.endswith("USDT") or "_" in symbol:
+                continue
+            volume = float(t.get("quoteVolume", 0))
+            if volume >= self.min_quote_volume:
+                symbols.append(symbol)
+                volumes.append(volume)
+        order = np.argsort(volumes)[::-1][:self.candidates]
+        return [symbols[i] for i in order], np.array(volumes)[order]
+
+    def _klines(self, client, symbols):
+        def fetch(symbol):
+            try:
+                return client.futures_klines(symbol=symbol, interval=self.interval, limit=self.bars)
+            except Exception as e:
+                structured_log.console(f"⚠️ [UNIVERSE] klines failed for {symbol}: {e}", level=logging.WARNING, name="universe_scanner")
+                return []
+        with ThreadPoolExecutor(max_workers=min(8, len(symbols) or 1), thread_name_prefix="universe") as pool:
+            return list(pool.map(fetch, symbols))
+
+    def scan(self, client):
+        """Every candidate scored, best first: [{"symbol", "score", "quote_volume", "atr_percent", "trend"}]"""
+        symbols, volumes = self._candidates(client)
+        if not symbols:
+            return []
+        # Newest `bars` bars of symbols with full history → (symbols × bars) matrices
+        rows = self._klines(client, symbols)
+        keep = [i for i, k in enumerate(rows) if len(k) >= max(self.atr_period, self.ema_period * 4) + 1]
+        if not keep:
+            return []
+        width = min(len(rows[i]) for i in keep)
+        ohlc = np.array([[r[2:5] for r in rows[i][-width:]] for i in keep], dtype=float)
+        highs, lows, closes = ohlc[:, :, 0], ohlc[:, :, 1], ohlc[:, :, 2]
+        symbols = [symbols[i] for i in keep]
+        volumes = volumes[keep]
+
+        prev = closes[:, :-1]
+        true_range = np.maximum(highs[:, 1:] - lows[:, 1:],
+                                np.maximum(np.abs(highs[:, 1:] - prev), np.abs(lows[:, 1:] - prev)))
+        atr_percent = true_range[:, -self.atr_period:].mean(axis=1) / closes[:, -1] * 100
+
+        # Trend alignment: 1h and 4h close vs EMA + EMA slope; |mean sign| = 1 when all agree (long or short)
+        closes_4h = closes[:, (width - 1) % 4::4]
+        signs = np.stack([
+            np.sign(closes[:, -1] - _ema(closes, self.ema_period)),
+            np.sign(closes_4h[:, -1] - _ema(closes_4h, self.ema_period)),
+            np.sign(_ema(closes, self.ema_period) - _ema(closes[:, :-4], self.ema_period)),
+        ])
+        trend = np.abs(signs.mean(axis=0))
+
+        score = (WEIGHTS["volume"] * _rank(np.log(volumes)) + WEIGHTS["atr"] * _rank(atr_percent)
+                 + WEIGHTS["trend"] * trend)
+        ranking = [
+            {"symbol": symbols[i], "score": round(float(score[i]), 3), "quote_volume": float(volumes[i]),
+             "atr_percent": round(float(atr_percent[i]), 2), "trend": round(float(trend[i]), 2)}
+            for i in np.argsort(-score, kind="stable")
+        ]
+        self.last_ranking = ranking
+        return ranking
+
+    def select(self, client, pinned=(), current=()):
+        """Top N symbols (current members get the stickiness bonus) + pinned open positions - empty when the scan found nothing"""
+        ranking = self.scan(client)
+        if not ranking:
+            return []
+        ranked = sorted(ranking, key=lambda row: -(row["score"] + (self.stickiness if row["symbol"] in current else 0)))
+        pairs = [row["symbol"] for row in ranked[:self.top_n]]
+        return pairs + [pair for pair in pinned if pair not in pairs]
@@ -0,0 +1,301 @@
+# vector_backtest.py
+# Vectorized backtest - fallback signal votes + 3-layer exit thresholds ကို array operation နဲ့ တွက်
+# Threshold combination ထောင်ချီကို စက္ကန့်ပိုင်းအတွင်း sweep လုပ်လို့ရအောင်
+
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+from backtest import MarketSeries, load_klines
+
+# bot.get_improved_fallback_decision + bot.should_close_trade ထဲက hard-coded တန်ဖိုးတွေ
+DEFAULT_PARAMS = {
+    # entry (fallback signal votes)
+    "rsi_oversold": 35.0,
+    "rsi_overbought": 65.0,
+    "min_votes": 3,
+    "max_opposite": 1,
+    "position_size_usd": 20.0,
+    "leverage": 5,
+    # exit (3-layer)
+    "stop_loss_pct": -5.0,
+    "partial_trigger_pct": 9.0,
+    "partial_percent": 60,
+    "breakeven_pct": 12.0,
+    "floor_start_pct": 15.0,
+    "floor_ratio": 0.75,
+    "trailing": True,
+}
+ENTRY_KEYS = ("rsi_oversold", "rsi_overbought", "min_votes", "max_opposite")
+
+# close_type codes
+STOP_LOSS, PARTIAL, PROFIT_FLOOR_HIT, TRAILING_HIT = range(4)
+CLOSE_TYPES = ("STOP_LOSS", "PARTIAL", "PROFIT_FLOOR_HIT", "TRAILING_HIT")
+
+# data_collector.classify_trade_outcome နဲ့ အစီအစဉ် တူ
+OUTCOMES = ("WINNER_TURN_LOSER", "GOOD_WINNER", "PURE_WINNER", "STOP_LOSS_MISTAKE", "PURE_LOSER")
+
+LEG_DTYPE = np.dtype([
+    ("entry_idx", np.int64), ("exit_idx", np.int64), ("direction", np.int8),
+    ("entry_price", float), ("exit_price", float), ("partial_percent", np.int16),
+    ("pnl", float), ("pnl_pct", float), ("peak_pct", float), ("close_type", np.int8),
+])
+
+
+def param_grid(**ranges):
+    """param_grid(stop_loss_pct=[-4, -5], floor_ratio=[0.7, 0.75]) → list of full param dicts"""
+    keys = list(ranges)
+    return [dict(DEFAULT_PARAMS, **dict(zip(keys, values))) for values in itertools.product(*(ranges[k] for k in keys))]
+
+
+def _first(mask, start=0):
+    """First True index at/after start, or len(mask)"""
+    sub = mask[start:]
+    i = int(sub.argmax()) if len(sub) else 0
+    return start + i if len(sub) and sub[i] else len(mask)
+
+
+def aligned_features(series):
+    """
+    MarketSeries → flat float64 arrays on the base 5m timeline (everything the
+    vectorized engine needs; plain arrays so they can live in shared memory)
+    """
+    i1, i4, i15 = series.index["1h"], series.index["4h"], series.index["15m"]
+    return {
+        "close": np.asarray(series.base["close"], dtype=float),
+        "h1_bull": series.arrays["1h"]["bullish"][i1].astype(float),
+        "h4_bull": series.arrays["4h"]["bullish"][i4].astype(float),
+        "h1_rsi": np.round(series.arrays["1h"]["rsi"][i1], 1),
+        "m15_cross": series.arrays["15m"]["crossover"][i15].astype(float),
+    }
+
+
+def signal_directions(features, first_ready, params=None):
+    """
+    get_improved_fallback_decision over every base bar at once.
+    Returns int8 array: +1 LONG, -1 SHORT, 0 HOLD / not warmed up.
+    """
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    h1_bull = features["h1_bull"] > 0.5
+    h4_bull = features["h4_bull"] > 0.5
+    rsi = features["h1_rsi"]
+    cross = features["m15_cross"]
+
+    bull = h1_bull.astype(np.int8) + h4_bull + (rsi < p["rsi_oversold"]) + (cross == 1)
+    bear = (~h1_bull).astype(np.int8) + ~h4_bull + (rsi > p["rsi_overbought"]) + (cross == -1)
+
+    direction = np.zeros(len(rsi), dtype=np.int8)
+    direction[(bear >= p["min_votes"]) & (bull <= p["max_opposite"])] = -1
+    direction[(bull >= p["min_votes"]) & (bear <= p["max_opposite"])] = 1   # LONG wins ties like the elif chain
+    direction[:first_ready] = 0
+    return direction
+
+
+def classify_outcomes(legs):
+    """classify_trade_outcome() vectorized → index into OUTCOMES"""
+    pnl = legs["pnl"]
+    peak = legs["peak_pct"]
+    return np.select(
+        [(peak >= 9.0) & (pnl <= 0), (pnl > 0) & (peak >= 8.0), pnl > 0, legs["close_type"] == STOP_LOSS],
+        [0, 1, 2, 3],
+        default=4,
+    ).astype(np.int8)
+
+
+class VectorBacktest:
+    """
+    One pair, fixed position size. Entry signals are computed for every bar in one shot;
+    each trade's exit is found with array scans over its price path (peak = running max),
+    so the Python loop runs once per trade, not once per bar.
+    Price paths are cached per entry, so exit-parameter sweeps reuse them.
+    Budget is assumed not to bind (one position per pair) and positions on different
+    pairs are not limited by max_concurrent_trades - use backtest.Backtester for that.
+    """
+
+    def __init__(self, features, first_ready, total_budget=500, max_position_size_percent=10, quantity_precision=3):
+        self.features = features
+        self.first_ready = first_ready
+        self.close = features["close"]
+        self.total_budget = total_budget
+        self.max_position_size_percent = max_position_size_percent
+        self.quantity_precision = quantity_precision
+        self._signals = {}
+        self._paths = {}
+
+    @classmethod
+    def from_series(cls, series, **kwargs):
+        return cls(aligned_features(series), series.first_ready, **kwargs)
+
+    def signals(self, params):
+        key = tuple(params[k] for k in ENTRY_KEYS)
+        cached = self._signals.get(key)
+        if cached is None:
+            direction = signal_directions(self.features, self.first_ready, params)
+            cached = self._signals[key] = (direction, np.flatnonzero(direction))
+        return cached
+
+    def _path(self, e, direction, leverage, span):
+        key = (e, direction, leverage)
+        cached = self._paths.get(key)
+        if cached is not None and (len(cached[0]) >= span or e + 1 + len(cached[0]) >= len(self.close)):
+            return cached
+        window = self.close[e + 1:e + 1 + span]
+        entry_price = self.close[e]
+        pnl = direction * (window - entry_price) / entry_price * 100 * leverage
+        peak = np.maximum.accumulate(np.maximum(pnl, 0.0))   # peak_pnl starts at 0 on entry
+        cached = self._paths[key] = (pnl, peak)
+        return cached
+
+    def _exit_events(self, pnl, peak, p):
+        """
+        should_close_trade() rules over one price path.
+        Returns [(offset, partial_percent, close_type), ...]; a trailing None (or None
+        alone) means the window ended while the position was still open.
+        """
+        m = len(pnl)
+        stop = pnl <= p["stop_loss_pct"]
+        k_stop = _first(stop)
+        k_part = _first(peak >= p["partial_trigger_pct"])
+        if k_stop <= k_part:
+            return [(k_stop, 100, STOP_LOSS)] if k_stop < m else None
+
+        events = [(k_part, p["partial_percent"], PARTIAL)]
+        # BREAKEVEN_ACTIVATED takes a check without closing
+        k_be = _first(peak >= p["breakeven_pct"])
+        if k_be == k_part:
+            k_be += 1
+        floor = (peak >= p["floor_start_pct"]) & (pnl <= peak * p["floor_ratio"])
+        rule = np.ones(m, dtype=bool) if p["trailing"] else floor.copy()
+        if k_part < k_be < m:
+            rule[k_be] = False
+        k_close = _first(stop | rule, k_part + 1)
+        if k_close >= m:
+            return events + [None]
+        close_type = STOP_LOSS if stop[k_close] else (PROFIT_FLOOR_HIT if floor[k_close] else TRAILING_HIT)
+        events.append((k_close, 100, close_type))
+        return events
+
+    def run(self, params=None, decision_every=1, start=0, end=None):
+        """
+        Returns a structured array of closed legs (LEG_DTYPE).
+        start/end limit the entry bars (walk-forward windows); exits may run past end.
+        """
+        p = dict(DEFAULT_PARAMS, **(params or {}))
+        if p["position_size_usd"] > self.total_budget * self.max_position_size_percent / 100:
+            return np.zeros(0, dtype=LEG_DTYPE)
+        direction, candidates = self.signals(p)
+        if decision_every > 1:
+            candidates = candidates[candidates % decision_every == 0]
+        if end is not None:
+            candidates = candidates[:np.searchsorted(candidates, end)]
+
+        n = len(self.close)
+        leverage = p["leverage"]
+        legs = []
+        pos = start
+        while True:
+            j = np.searchsorted(candidates, pos)
+            if j >= len(candidates):
+                break
+            e = int(candidates[j])
+            d = int(direction[e])
+            entry_price = float(self.close[e])
+            quantity = round(p["position_size_usd"] * leverage / entry_price, self.quantity_precision)
+            if quantity <= 0:
+                pos = e + 1
+                continue
+
+            span = 256
+            while True:
+                pnl, peak = self._path(e, d, leverage, span)
+                events = self._exit_events(pnl, peak, p)
+                if (events is not None and events[-1] is not None) or e + 1 + len(pnl) >= n:
+                    break
+                span *= 4
+
+            remaining = quantity
+            exit_idx = e
+            for event in events or [None]:
+                if event is None:
+                    break
+                k, pct, close_type = event
+                exit_idx = e + 1 + k
+                exit_price = float(self.close[exit_idx])
+                leg_qty = remaining * pct / 100
+                legs.append((e, exit_idx, d, entry_price, exit_price, pct,
+                             d * (exit_price - entry_price) * leg_qty, pnl[k], round(float(peak[k]), 3), close_type))
+                remaining -= leg_qty
+            if events is None or events[-1] is None:
+                break   # position still open at the end of the data
+            pos = exit_idx + 1
+        return np.array(legs, dtype=LEG_DTYPE)
+
+    def summary(self, legs):
+        return summarize(legs)
+
+
+def summarize(legs):
+    """Backtester.summary() equivalent from a leg array"""
+    full = legs[legs["partial_percent"] >= 100]
+    pnl = legs["pnl"]
+    if len(pnl):
+        equity = np.cumsum(pnl)
+        drawdown = float(np.max(np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity))
+    else:
+        drawdown = 0.0
+    outcome_idx = classify_outcomes(legs)
+    counts = np.bincount(outcome_idx, minlength=len(OUTCOMES))
+    return {
+        "trades": int(len(full)),
+        "closes": int(len(legs)),
+        "win_rate": round(float(np.mean(full["pnl"] > 0)) * 100, 1) if len(full) else 0.0,
+        "total_pnl": round(float(pnl.sum()), 2),
+        "max_drawdown": round(drawdown, 2),
+        "wtl_rate": round(float(counts[0]) / len(legs) * 100, 1) if len(legs) else 0.0,
+        "outcomes": {OUTCOMES[i]: int(c) for i, c in enumerate(counts) if c},
+    }
+
+
+def sweep(engine, combos, decision_every=1):
+    """Every param dict in combos → (params, summary), best total PnL first"""
+    results = [(params, summarize(engine.run(params, decision_every))) for params in combos]
+    results.sort(key=lambda r: r[1]["total_pnl"], reverse=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized backtest / threshold sweep on local 5m klines")
+    parser.add_argument("file", help="PAIR=path (CSV or JSON 5m klines)")
+    parser.add_argument("--sweep", action="store_true", help="sweep a default exit-threshold grid")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    pair, _, path = args.file.partition("=")
+    engine = VectorBacktest.from_series(MarketSeries(pair, load_klines(path)))
+    started = time.perf_counter()
+    if args.sweep:
+        combos = param_grid(
+            stop_loss_pct=[-3.0, -4.0, -5.0, -6.0, -8.0],
+            partial_trigger_pct=[6.0, 7.5, 9.0, 10.5, 12.0],
+            partial_percent=[40, 50, 60, 70],
+            breakeven_pct=[10.0, 12.0, 14.0],
+            floor_ratio=[0.6, 0.7, 0.75, 0.8],
+            trailing=[True, False],
+        )
+        results = sweep(engine, combos)
+        elapsed = time.perf_counter() - started
+        print(f"{len(combos)} combinations in {elapsed:.2f}s")
+        for params, result in results[:args.top]:
+            changed = {k: v for k, v in params.items() if v != DEFAULT_PARAMS[k]}
+            print(json.dumps({"params": changed, **result}, ensure_ascii=False))
+    else:
+        result = summarize(engine.run())
+        result["elapsed_sec"] = round(time.perf_counter() - started, 3)
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()